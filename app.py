@@ -1,13 +1,17 @@
 import os
 import logging
-from datetime import datetime
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, session
+from datetime import datetime, timezone
+import json
+import time
+import queue
+from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, session, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_cors import CORS
 from models import User, TradingStrategy, BacktestResult, TradingSignal, PaperTrade
-from database import init_db, db  # Usa seu database.py
+from database import init_db, db, keyset_page  # Usa seu database.py
+from migrations import run_migrations
 
 
 # Configure logging
@@ -58,20 +62,73 @@ login_manager.login_view = 'login'
 
 # Import models after db initialization
 from models import User, TradingStrategy, BacktestResult, TradingSignal
+from utils.auth import user_cache, market_data_auth, issue_market_data_token, MARKET_DATA_TOKEN_TTL_SECONDS
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Identities are cached briefly and dropped when the user row changes
+    return user_cache.get(int(user_id))
 
-# Create database tables
+# Create database tables, and columns and indexes added to existing ones since
 with app.app_context():
-    db.create_all()
+    run_migrations()
 
 # Import utility modules
-from utils.technical_indicators import get_technical_indicators
-from utils.binance_api import get_bitcoin_data, get_account_info
-from utils.prediction_model import predict_price
-from utils.backtesting import run_backtest
+from utils.technical_indicators import get_technical_indicators, get_technical_indicators_batch
+from utils.binance_api import get_market_data, get_market_frame, get_market_frames, get_account_info, klines_to_records, DEFAULT_SYMBOL
+from utils.prediction_model import predict_price, predict_price_batch
+from utils.forecasting import MODEL_TYPES as FORECAST_MODELS
+from utils.backtesting import run_parameter_sweep
+from utils.backtest_cache import backtest_cache
+from utils.candle_store import get_candles
+from utils.market_data_client import market_data_client
+from utils.kline_cache import kline_cache
+from utils.streaming_indicators import streaming_indicators
+from utils.signal_engine import default_signal_cache
+from utils.price_stream import price_broadcaster, FeedLimitError
+from utils.backtest_jobs import backtest_jobs, save_backtest_result, JobQueueFullError, TERMINAL_STATUSES
+
+from utils.paper_trading import paper_trading_engine
+from utils.portfolio import portfolio_marker
+from utils.signal_scheduler import signal_scheduler
+from routes.paper_trade_routes import paper_trade_api
+
+backtest_jobs.init_app(app)
+paper_trading_engine.init_app(app)
+portfolio_marker.init_app(app)
+signal_scheduler.init_app(app)
+app.register_blueprint(paper_trade_api)
+
+def load_market_data(symbol, interval, limit):
+    """Load candles for a request: a stored date range if start_date/end_date are given, else the latest candles."""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if start_date or end_date:
+        return load_date_range(symbol, interval, start_date, end_date)
+    return get_market_frame(symbol, interval, limit)
+
+def load_date_range(symbol, interval, start_date, end_date):
+    """Load stored candles between two optional 'YYYY-MM-DD' dates (UTC)."""
+    start_ms = int(datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000) if start_date else None
+    end_ms = int(datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000) if end_date else None
+    data = get_candles(symbol, interval, start_ms, end_ms)
+    if data.empty:
+        raise ValueError("No data available for the specified date range")
+    return data
+
+# Maximum number of symbols accepted by the batch endpoints
+MAX_BATCH_SYMBOLS = 200
+
+def request_symbol():
+    """Trading pair requested through the `symbol` query parameter."""
+    return request.args.get('symbol', DEFAULT_SYMBOL).upper()
+
+def request_symbols():
+    """Trading pairs requested through the comma-separated `symbols` query parameter."""
+    symbols = [s.strip().upper() for s in request.args.get('symbols', DEFAULT_SYMBOL).split(',') if s.strip()]
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise ValueError(f"At most {MAX_BATCH_SYMBOLS} symbols can be requested at once")
+    return symbols
 
 # Routes
 @app.route('/')
@@ -163,43 +220,160 @@ def technical_analysis():
     return render_template('technical_analysis.html')
 
 @app.route('/api/bitcoin/price', methods=['GET'])
-@login_required
+@market_data_auth
 def get_bitcoin_price():
     interval = request.args.get('interval', '1h')
     limit = int(request.args.get('limit', 100))
     try:
-        data = get_bitcoin_data(interval, limit)
+        data = get_market_data(request_symbol(), interval, limit)
         return jsonify(data)
     except Exception as e:
         logging.error(f"Error fetching Bitcoin data: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/indicators', methods=['GET'])
+# Seconds between keep-alive comments on idle event streams
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Seconds a client refused by a full worker waits before reconnecting
+STREAM_RETRY_SECONDS = 30
+
+@app.route('/api/stream/prices', methods=['GET'])
+@market_data_auth
+def stream_prices():
+    """Server-sent events with the latest price of a symbol, shared by every connected client."""
+    symbol = request_symbol()
+    try:
+        subscriber = price_broadcaster.subscribe(symbol)
+    except FeedLimitError as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': str(STREAM_RETRY_SECONDS)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if subscriber is None:
+        # Every open stream holds a request thread; refuse rather than starve the worker
+        return Response(f"retry: {STREAM_RETRY_SECONDS * 1000}\n\n", status=503, mimetype='text/event-stream',
+                        headers={'Retry-After': str(STREAM_RETRY_SECONDS), 'Cache-Control': 'no-cache'})
+
+    def events():
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+        finally:
+            price_broadcaster.unsubscribe(symbol, subscriber)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/market/klines', methods=['GET'])
+@market_data_auth
+def market_klines_batch():
+    interval = request.args.get('interval', '1h')
+    limit = int(request.args.get('limit', 100))
+    try:
+        frames = get_market_frames(request_symbols(), interval, limit)
+        return jsonify({symbol: klines_to_records(df) for symbol, df in frames.items()})
+    except Exception as e:
+        logging.error(f"Error fetching batch market data: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/market_data/token', methods=['POST'])
 @login_required
+def market_data_token():
+    """Token for the market-data routes, checked without a session or database lookup."""
+    return jsonify({
+        'token': issue_market_data_token(current_user.id),
+        'expires_in': MARKET_DATA_TOKEN_TTL_SECONDS
+    })
+
+@app.route('/api/market_data/stats', methods=['GET'])
+@login_required
+def market_data_stats():
+    return jsonify({
+        'providers': market_data_client.stats(),
+        'kline_cache': kline_cache.stats(),
+        'default_signal_cache': default_signal_cache.stats(),
+        'price_streams': price_broadcaster.stats(),
+        'user_cache': user_cache.stats()
+    })
+
+@app.route('/api/signals/scheduler', methods=['GET'])
+@login_required
+def signal_scheduler_stats():
+    return jsonify(signal_scheduler.stats())
+
+@app.route('/api/indicators', methods=['GET'])
+@market_data_auth
 def technical_indicators():
     interval = request.args.get('interval', '1h')
     limit = int(request.args.get('limit', 100))
+    symbol = request_symbol()
     try:
-        data = get_bitcoin_data(interval, limit)
-        indicators = get_technical_indicators(data)
+        if request.args.get('start_date') or request.args.get('end_date'):
+            indicators = get_technical_indicators(load_market_data(symbol, interval, limit))
+        else:
+            # Latest candles: only new or revised candles are fed to the streaming engine
+            data = get_market_frame(symbol, interval, limit)
+            indicators = streaming_indicators.get_indicators(symbol, interval, data, limit)
         return jsonify(indicators)
     except Exception as e:
         logging.error(f"Error calculating technical indicators: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/indicators/batch', methods=['GET'])
+@market_data_auth
+def technical_indicators_batch():
+    interval = request.args.get('interval', '1h')
+    limit = int(request.args.get('limit', 100))
+    try:
+        symbols = request_symbols()
+        frames = get_market_frames(symbols, interval, limit)
+        return jsonify(get_technical_indicators_batch(frames, limit, symbols))
+    except Exception as e:
+        logging.error(f"Error calculating batch technical indicators: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/predict', methods=['GET'])
-@login_required
+@market_data_auth
 def predict():
     interval = request.args.get('interval', '1h')
     periods = int(request.args.get('periods', 24))
+    model = request.args.get('model', 'linear')
+    if model not in FORECAST_MODELS:
+        return jsonify({"error": f"Unknown model '{model}', expected one of: {', '.join(FORECAST_MODELS)}"}), 400
     try:
-        data = get_bitcoin_data(interval, 500)
-        prediction = predict_price(data, periods)
+        symbol = request_symbol()
+        data = load_market_data(symbol, interval, 500)
+        if request.args.get('start_date') or request.args.get('end_date'):
+            # Historical ranges are one-off fits, not the live model
+            prediction = predict_price(data, periods, interval=interval, model=model)
+        else:
+            prediction = predict_price(data, periods, symbol=symbol, interval=interval, model=model)
         return jsonify(prediction)
     except Exception as e:
         logging.error(f"Error generating prediction: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/predict/batch', methods=['GET'])
+@market_data_auth
+def predict_batch():
+    intervals = [i.strip() for i in request.args.get('intervals', '1h').split(',') if i.strip()]
+    periods = int(request.args.get('periods', 24))
+    model = request.args.get('model', 'linear')
+    if model not in FORECAST_MODELS:
+        return jsonify({"error": f"Unknown model '{model}', expected one of: {', '.join(FORECAST_MODELS)}"}), 400
+    try:
+        symbols = request_symbols()
+        result = {}
+        for interval in intervals:
+            frames = get_market_frames(symbols, interval, 500)
+            result[interval] = predict_price_batch(frames, interval, periods, model=model)
+        return jsonify(result)
+    except Exception as e:
+        logging.error(f"Error generating batch predictions: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/backtest', methods=['POST'])
 @login_required
 def api_backtest():
@@ -211,24 +385,123 @@ def api_backtest():
         strategy = TradingStrategy.query.filter_by(id=strategy_id, user_id=current_user.id).first()
         if not strategy:
             return jsonify({"error": "Strategy not found"}), 404
-        result = run_backtest(strategy, start_date, end_date)
-        backtest_result = BacktestResult(
-            user_id=current_user.id,
-            strategy_id=strategy_id,
-            start_date=datetime.strptime(start_date, '%Y-%m-%d'),
-            end_date=datetime.strptime(end_date, '%Y-%m-%d'),
-            profit_loss=result['profit_loss'],
-            win_rate=result['win_rate'],
-            total_trades=result['total_trades'],
-            result_data=str(result)
-        )
-        db.session.add(backtest_result)
+        result = backtest_cache.run(strategy, start_date, end_date)
+        save_backtest_result(current_user.id, strategy.id, start_date, end_date, result)
         db.session.commit()
         return jsonify(result)
     except Exception as e:
         logging.error(f"Error running backtest: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/backtest/results', methods=['GET'])
+@login_required
+def list_backtest_results():
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        # Only the summary columns are loaded; detailed results stay deferred
+        results, next_cursor = keyset_page(BacktestResult.query.filter_by(user_id=current_user.id), BacktestResult,
+                                           limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'results': [result.summary_dict() for result in results], 'next_cursor': next_cursor})
+
+@app.route('/api/backtest/results/<int:result_id>', methods=['GET'])
+@login_required
+def get_backtest_result(result_id):
+    try:
+        result = BacktestResult.query.filter_by(id=result_id, user_id=current_user.id).first()
+        if result is None:
+            return jsonify({"error": "Backtest result not found"}), 404
+        return jsonify(dict(result.summary_dict(), result=result.result))
+    except Exception as e:
+        logging.error(f"Error loading backtest result {result_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/backtest/jobs', methods=['POST'])
+@login_required
+def api_backtest_job_submit():
+    data = request.json
+    try:
+        strategy = TradingStrategy.query.filter_by(id=data.get('strategy_id'), user_id=current_user.id).first()
+        if not strategy:
+            return jsonify({"error": "Strategy not found"}), 404
+        job, created = backtest_jobs.submit(
+            current_user.id,
+            strategy,
+            data.get('start_date'),
+            data.get('end_date'),
+            initial_capital=float(data.get('initial_capital', 10000))
+        )
+        return jsonify(dict(job.to_dict(), deduplicated=not created)), 202
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error submitting backtest job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/backtest/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def api_backtest_job_status(job_id):
+    job = backtest_jobs.get(job_id, current_user.id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(backtest_jobs.job_status(job))
+
+@app.route('/api/backtest/jobs/<int:job_id>/stream', methods=['GET'])
+@login_required
+def api_backtest_job_stream(job_id):
+    """Server-sent events with the job's progress, ending with its final status."""
+    user_id = current_user.id
+    if not backtest_jobs.get(job_id, user_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        last = None
+        while True:
+            db.session.expire_all()
+            job = backtest_jobs.get(job_id, user_id)
+            if job.status in TERMINAL_STATUSES:
+                yield f"event: {job.status.lower()}\ndata: {json.dumps(backtest_jobs.job_status(job))}\n\n"
+                return
+            status = (job.status, job.progress, job.stage)
+            if status != last:
+                last = status
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+            time.sleep(0.5)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/backtest/sweep', methods=['POST'])
+@login_required
+def api_backtest_sweep():
+    data = request.json
+    strategy_id = data.get('strategy_id')
+    try:
+        strategy = TradingStrategy.query.filter_by(id=strategy_id, user_id=current_user.id).first()
+        if not strategy:
+            return jsonify({"error": "Strategy not found"}), 404
+        param_grid = data.get('param_grid')
+        if not isinstance(param_grid, dict) or not param_grid:
+            return jsonify({"error": "param_grid must be an object of parameter name to list of values"}), 400
+        result = run_parameter_sweep(
+            strategy,
+            param_grid,
+            data.get('start_date'),
+            data.get('end_date'),
+            initial_capital=float(data.get('initial_capital', 10000)),
+            sort_by=data.get('sort_by', 'total_return_pct'),
+            top=data.get('top')
+        )
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error running parameter sweep: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/strategies', methods=['GET', 'POST'])
 @login_required
 def strategies():
@@ -238,7 +511,8 @@ def strategies():
             'id': s.id,
             'name': s.name,
             'description': s.description,
-            'parameters': s.parameters
+            'parameters': s.parameters,
+            'is_active': s.is_active
         } for s in user_strategies])
     else:
         data = request.json
@@ -246,7 +520,8 @@ def strategies():
             user_id=current_user.id,
             name=data.get('name'),
             description=data.get('description'),
-            parameters=data.get('parameters')
+            parameters=data.get('parameters'),
+            is_active=bool(data.get('is_active', True))
         )
         db.session.add(strategy)
         db.session.commit()
@@ -254,40 +529,45 @@ def strategies():
             'id': strategy.id,
             'name': strategy.name,
             'description': strategy.description,
-            'parameters': strategy.parameters
+            'parameters': strategy.parameters,
+            'is_active': strategy.is_active
         }), 201
 
+@app.route('/api/signals', methods=['GET'])
+@login_required
+def list_signals():
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        user_signals, next_cursor = keyset_page(TradingSignal.query.filter_by(user_id=current_user.id), TradingSignal,
+                                                limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        'signals': [{
+            'id': s.id,
+            'signal_type': s.signal_type,
+            'price': s.price,
+            'confidence': s.confidence,
+            'reason': s.reason,
+            'created_at': s.created_at.isoformat()
+        } for s in user_signals],
+        'next_cursor': next_cursor
+    })
+
 @app.route('/api/signals/generate', methods=['POST'])
 @login_required
 def generate_signals():
     try:
-        data = get_bitcoin_data('1h', 100)
-        indicators = get_technical_indicators(data)
-        last_price = float(data[-1]['close'])
-        rsi = indicators['rsi'][-1]
-        macd = indicators['macd'][-1]
-        signal = indicators['macd_signal'][-1]
-        signal_type = None
-        reason = []
-        if rsi < 30:
-            reason.append("RSI oversold")
-            signal_type = "BUY"
-        elif rsi > 70:
-            reason.append("RSI overbought")
-            signal_type = "SELL"
-        if macd > signal and macd > 0:
-            reason.append("MACD bullish crossover")
-            signal_type = "BUY"
-        elif macd < signal and macd < 0:
-            reason.append("MACD bearish crossover")
-            signal_type = "SELL"
+        # Evaluated once per closed candle and shared by every user
+        evaluation = default_signal_cache.get(DEFAULT_SYMBOL, '1h')
+        signal_type = evaluation['signal_type']
         if signal_type:
             new_signal = TradingSignal(
                 user_id=current_user.id,
                 signal_type=signal_type,
-                price=last_price,
+                price=evaluation['price'],
                 confidence=0.75,
-                reason=', '.join(reason)
+                reason=evaluation['reason']
             )
             db.session.add(new_signal)
             db.session.commit()
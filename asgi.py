@@ -0,0 +1,247 @@
+"""
+Asyncio serving mode for the read-only market-data API.
+
+The price, indicator and prediction routes are served by small async
+handlers, so a worker waits on upstream requests without holding a thread
+per request. The price stream is served the same way, so open browser tabs
+cost a queue each rather than a request thread. Everything else is passed
+through to the Flask app. Run with e.g.:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 1
+
+Keep a single worker process: the paper trading engine holds every user's
+pending orders and open positions in memory (see utils.paper_trading), so
+a second worker would not see orders placed through the first.
+"""
+import os
+import asyncio
+import logging
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl, urlencode
+from a2wsgi import WSGIMiddleware
+from flask_login.utils import decode_cookie
+from app import app as flask_app, load_date_range, FORECAST_MODELS, STREAM_KEEPALIVE_SECONDS
+from utils.binance_api import klines_to_records, DEFAULT_SYMBOL
+from utils.technical_indicators import get_technical_indicators
+from utils.streaming_indicators import streaming_indicators
+from utils.prediction_model import predict_price
+from utils.async_market_data import get_market_frame_async, async_market_data_client, coalescer
+from utils.auth import verify_market_data_token
+from utils.price_stream import price_broadcaster, FeedLimitError
+
+# Threads serving the Flask (WSGI) routes
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 64))
+
+wsgi_application = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+
+
+def query_symbol(query):
+    """Trading pair requested through the `symbol` query parameter."""
+    return query.get('symbol', DEFAULT_SYMBOL).upper()
+
+
+def request_token(headers, query):
+    """Market-data token from an 'Authorization: Bearer' header or the `token` query parameter, as utils.auth does."""
+    authorization = headers.get(b'authorization', b'').decode('latin-1')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return query.get('token')
+
+
+def is_authenticated(headers):
+    """Check the Flask-Login session or remember-me cookie without touching the database."""
+    cookies = SimpleCookie()
+    cookies.load(headers.get(b'cookie', b'').decode('latin-1'))
+    session_cookie = cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if session_cookie is not None:
+        serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        try:
+            session = serializer.loads(session_cookie.value,
+                                       max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+            if session.get('_user_id'):
+                return True
+        except Exception:
+            pass
+    remember_cookie = cookies.get(flask_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token'))
+    if remember_cookie is not None:
+        with flask_app.app_context():
+            return decode_cookie(remember_cookie.value) is not None
+    return False
+
+
+async def bitcoin_price(query):
+    interval = query.get('interval', '1h')
+    try:
+        limit = int(query.get('limit', 100))
+        data = await get_market_frame_async(query_symbol(query), interval, limit)
+        return 200, klines_to_records(data)
+    except Exception as e:
+        logging.error(f"Error fetching Bitcoin data: {str(e)}")
+        return 500, {"error": str(e)}
+
+
+async def technical_indicators(query):
+    interval = query.get('interval', '1h')
+    symbol = query_symbol(query)
+    try:
+        limit = int(query.get('limit', 100))
+        if query.get('start_date') or query.get('end_date'):
+            data = await asyncio.to_thread(load_date_range, symbol, interval, query.get('start_date'),
+                                           query.get('end_date'))
+            indicators = await asyncio.to_thread(get_technical_indicators, data)
+        else:
+            data = await get_market_frame_async(symbol, interval, limit)
+            indicators = await asyncio.to_thread(streaming_indicators.get_indicators, symbol, interval, data, limit)
+        return 200, indicators
+    except Exception as e:
+        logging.error(f"Error calculating technical indicators: {str(e)}")
+        return 500, {"error": str(e)}
+
+
+async def predict(query):
+    interval = query.get('interval', '1h')
+    model = query.get('model', 'linear')
+    if model not in FORECAST_MODELS:
+        return 400, {"error": f"Unknown model '{model}', expected one of: {', '.join(FORECAST_MODELS)}"}
+    symbol = query_symbol(query)
+    try:
+        periods = int(query.get('periods', 24))
+        if query.get('start_date') or query.get('end_date'):
+            # Historical ranges are one-off fits, not the live model
+            data = await asyncio.to_thread(load_date_range, symbol, interval, query.get('start_date'),
+                                           query.get('end_date'))
+            prediction = await asyncio.to_thread(predict_price, data, periods, interval=interval, model=model)
+        else:
+            data = await get_market_frame_async(symbol, interval, 500)
+            prediction = await asyncio.to_thread(predict_price, data, periods, symbol=symbol, interval=interval,
+                                                 model=model)
+        return 200, prediction
+    except Exception as e:
+        logging.error(f"Error generating prediction: {str(e)}")
+        return 500, {"error": str(e)}
+
+
+# Paths served by the async handlers; they answer GET only, like their Flask counterparts
+ASYNC_ROUTES = {
+    '/api/bitcoin/price': bitcoin_price,
+    '/api/indicators': technical_indicators,
+    '/api/predict': predict
+}
+
+
+# Server-sent events path, streamed directly rather than coalesced
+STREAM_PATH = '/api/stream/prices'
+
+
+async def stream_prices(query, receive, send):
+    """Server-sent events with the latest price of a symbol, until the client disconnects."""
+    symbol = query_symbol(query)
+    try:
+        subscriber = price_broadcaster.subscribe_async(symbol)
+    except FeedLimitError as e:
+        await send_json(send, 503, flask_app.json.dumps({"error": str(e)}).encode('utf-8'))
+        return
+    except ValueError as e:
+        await send_json(send, 400, flask_app.json.dumps({"error": str(e)}).encode('utf-8'))
+        return
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    next_event = asyncio.ensure_future(subscriber.get())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*')
+            ]
+        })
+        while True:
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=STREAM_KEEPALIVE_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                return
+            if next_event in done:
+                body = next_event.result()
+                next_event = asyncio.ensure_future(subscriber.get())
+            else:
+                body = b": keepalive\n\n"
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    except OSError:
+        # The connection went away mid-write
+        pass
+    finally:
+        price_broadcaster.unsubscribe(symbol, subscriber)
+        next_event.cancel()
+        disconnected.cancel()
+
+
+async def respond(path, query):
+    """Run a handler and serialise its response once (shared by coalesced requests)."""
+    status, payload = await ASYNC_ROUTES[path](query)
+    return status, flask_app.json.dumps(payload).encode('utf-8')
+
+
+async def application(scope, receive, send):
+    """ASGI entry point: async handlers for the market-data routes, Flask for everything else."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_market_data_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    path = scope.get('path')
+    if scope['type'] != 'http' or (path not in ASYNC_ROUTES and path != STREAM_PATH) or scope['method'] != 'GET':
+        await wsgi_application(scope, receive, send)
+        return
+
+    headers = dict(scope['headers'])
+    query = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+    token = request_token(headers, query)
+    if token is not None:
+        if verify_market_data_token(token, flask_app.secret_key) is None:
+            # Same response as utils.auth.market_data_auth
+            await send_json(send, 401, flask_app.json.dumps({"error": "Invalid or expired token"}).encode('utf-8'))
+            return
+    elif not is_authenticated(headers):
+        # Same response as login_required: redirect to the login page
+        location = f"/login?{urlencode({'next': path})}"
+        await send({'type': 'http.response.start', 'status': 302, 'headers': [(b'location', location.encode())]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    if path == STREAM_PATH:
+        await stream_prices(query, receive, send)
+        return
+
+    # The token does not change the response, so requests from different users still share a run
+    query.pop('token', None)
+    # Identical concurrent requests share one handler run
+    status, body = await coalescer.run(('response', path, tuple(sorted(query.items()))),
+                                       lambda: respond(path, query))
+    await send_json(send, status, body)
+
+
+async def send_json(send, status, body):
+    """Send a complete JSON response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            # Flask-CORS allows any origin on the Flask routes
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
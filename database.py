@@ -1,9 +1,74 @@
 # database.py
+import os
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert, tuple_
 from config import Config
 
+# Rows per executemany batch in bulk_insert
+BULK_INSERT_BATCH_SIZE = int(os.environ.get('BULK_INSERT_BATCH_SIZE', 1000))
+
 db = SQLAlchemy()
 
 def init_db(app):
     app.config.from_object(Config)
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
+
+def bulk_insert(model, rows, batch_size=BULK_INSERT_BATCH_SIZE):
+    """
+    Insert many rows with executemany INSERTs instead of one ORM object each (the caller commits)
+
+    Column defaults (e.g. created_at) are applied as for ORM inserts.
+
+    Args:
+        model: The db.Model class
+        rows (list): Dicts of column values
+        batch_size (int): Rows per statement execution
+
+    Returns:
+        int: Number of rows inserted
+    """
+    statement = insert(model.__table__)
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(statement, rows[start:start + batch_size])
+    return len(rows)
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor for the row after which the next page starts."""
+    return f'{created_at.isoformat()}_{row_id}'
+
+def decode_cursor(cursor):
+    """
+    Raises:
+        ValueError: If the cursor was not made by encode_cursor
+    """
+    created_at, _, row_id = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(row_id)
+
+def keyset_page(query, model, limit, cursor=None):
+    """
+    One page of a query, newest first, using keyset pagination on (created_at, id)
+
+    Unlike LIMIT/OFFSET, each page seeks straight to its first row through
+    the (user_id, created_at) indexes, however deep the page is, and rows
+    inserted meanwhile do not shift later pages.
+
+    Args:
+        query: Query on `model`, already filtered (e.g. by user_id)
+        model: The db.Model class; it needs created_at and id columns
+        limit (int): Page size
+        cursor (str): next_cursor of the previous page, or None for the first page
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id)
+    return rows, None
@@ -0,0 +1,95 @@
+# migrations.py
+import logging
+from sqlalchemy import inspect, text
+from database import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def add_missing_columns(table):
+    """
+    Add columns declared on a table but missing from the existing database table
+
+    db.create_all() only creates missing tables, so columns added to a model
+    later are added here (nullable unless they have a scalar default).
+
+    Args:
+        table: The sqlalchemy Table (model.__table__)
+
+    Returns:
+        list: Names of the columns added
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table.name):
+        return []
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    added = []
+    with db.engine.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}'
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                ddl += f" DEFAULT {default!r}" if isinstance(default, str) else f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += ' NOT NULL'
+            connection.execute(text(ddl))
+            added.append(column.name)
+    return added
+
+def create_missing_indexes(table):
+    """
+    Create indexes declared on a table but missing from the existing database table
+
+    Args:
+        table: The sqlalchemy Table (model.__table__)
+
+    Returns:
+        list: Names of the indexes created
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table.name):
+        return []
+    existing = {index['name'] for index in inspector.get_indexes(table.name)}
+    created = []
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(db.engine)
+            created.append(index.name)
+    return created
+
+def run_migrations():
+    """
+    Bring the database schema up to date with the models
+
+    Creates missing tables, then adds missing columns and indexes to the
+    existing ones. Every step checks the live schema first, so it is safe
+    to run on every start. Must be called inside an app context, after the
+    models are imported.
+
+    Returns:
+        dict: table name -> {'columns': [...], 'indexes': [...]} for the tables changed
+    """
+    db.create_all()
+    changes = {}
+    for table in db.metadata.sorted_tables:
+        columns = add_missing_columns(table)
+        indexes = create_missing_indexes(table)
+        if columns or indexes:
+            changes[table.name] = {'columns': columns, 'indexes': indexes}
+            logger.info(f"Migrated {table.name}: added columns {columns}, indexes {indexes}")
+    return changes
+
+if __name__ == '__main__':
+    import os
+    import json
+    from flask import Flask
+    import models  # noqa: F401 (registers the tables)
+
+    # A bare app on the web app's database, so migrating does not start its background threads
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///neuraltrade.db")
+    db.init_app(app)
+    with app.app_context():
+        print(json.dumps(run_migrations(), indent=2))
@@ -1,9 +1,15 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 from database import db
 from flask_login import UserMixin
 import json
+import logging
 import ta  # Biblioteca para indicadores técnicos (pip install ta)
 import pandas as pd
+from utils.rule_expressions import compile_rule, rule_set_for, RuleSyntaxError
+
+# Set up logging
+logger = logging.getLogger(__name__)
 
 # Removendo a inicialização do Flask daqui
 # app = Flask(__name__) # Removido
@@ -30,10 +36,11 @@ class User(UserMixin, db.Model):
 class TradingStrategy(db.Model):
     __tablename__ = 'trading_strategies' #Adicionado nome da tabela
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False) #Alterado para users.id
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True) #Alterado para users.id
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text)
     parameters = db.Column(db.Text, nullable=False)  # JSON string of strategy parameters
+    is_active = db.Column(db.Boolean, nullable=False, default=True)  # Evaluated by the signal scheduler on every candle close
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -45,6 +52,8 @@ class TradingStrategy(db.Model):
 
 class BacktestResult(db.Model):
     __tablename__ = 'backtest_results' #Adicionado nome da tabela
+    # Per-user listings filter on user_id and order by created_at
+    __table_args__ = (db.Index('ix_backtest_results_user_id_created_at', 'user_id', 'created_at'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False) #Alterado para users.id
     strategy_id = db.Column(db.Integer, db.ForeignKey('trading_strategies.id'), nullable=False) #Alterado para trading_strategies.id
@@ -53,14 +62,105 @@ class BacktestResult(db.Model):
     profit_loss = db.Column(db.Float, nullable=False)
     win_rate = db.Column(db.Float)
     total_trades = db.Column(db.Integer)
-    result_data = db.Column(db.Text)  # JSON string of detailed backtest results
+    max_drawdown_pct = db.Column(db.Float)
+    profit_factor = db.Column(db.Float)
+    # Detailed results are deferred so listings only load the summary columns
+    result_data = db.deferred(db.Column(db.Text))  # Legacy JSON string of detailed backtest results
+    result_blob = db.deferred(db.Column(db.LargeBinary))  # Compressed columnar result (utils.backtest_storage)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @property
+    def result(self):
+        """The detailed result (trades, equity curve, metrics), decoded on first access."""
+        if not hasattr(self, '_decoded_result'):
+            from utils.backtest_storage import decode_backtest_result
+            if self.result_blob is not None:
+                self._decoded_result = decode_backtest_result(self.result_blob)
+            elif self.result_data:
+                try:
+                    self._decoded_result = json.loads(self.result_data)
+                except ValueError:
+                    # Older rows stored str(result), a Python repr that is not JSON; only the summary survives
+                    logger.warning(f"Resultado detalhado do backtest {self.id} ilegível (formato antigo); usando apenas o resumo.")
+                    self._decoded_result = None
+            else:
+                self._decoded_result = None
+        return self._decoded_result
+
+    def summary_dict(self):
+        return {
+            'id': self.id,
+            'strategy_id': self.strategy_id,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+            'profit_loss': self.profit_loss,
+            'win_rate': self.win_rate,
+            'total_trades': self.total_trades,
+            'max_drawdown_pct': self.max_drawdown_pct,
+            'profit_factor': self.profit_factor,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
     def __repr__(self):
         return f'<BacktestResult {self.id} - PL: {self.profit_loss}>'
 
+class BacktestJob(db.Model):
+    __tablename__ = 'backtest_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    strategy_id = db.Column(db.Integer, db.ForeignKey('trading_strategies.id'), nullable=False)
+    job_key = db.Column(db.String(64), nullable=False, index=True)  # Hash of (parameters, date range, capital) used to deduplicate submissions
+    start_date = db.Column(db.String(10), nullable=False)  # 'YYYY-MM-DD', as submitted
+    end_date = db.Column(db.String(10), nullable=False)
+    initial_capital = db.Column(db.Float, nullable=False, default=10000)
+    status = db.Column(db.String(20), nullable=False, default='QUEUED')  # QUEUED, RUNNING, COMPLETED, FAILED
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0 to 1.0
+    stage = db.Column(db.String(40))
+    error = db.Column(db.Text)
+    backtest_result_id = db.Column(db.Integer, db.ForeignKey('backtest_results.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    backtest_result = db.relationship('BacktestResult', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'strategy_id': self.strategy_id,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'initial_capital': self.initial_capital,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'error': self.error,
+            'backtest_result_id': self.backtest_result_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<BacktestJob {self.id} - {self.status}>'
+
+class BacktestCacheEntry(db.Model):
+    __tablename__ = 'backtest_cache'
+    cache_key = db.Column(db.String(64), primary_key=True)  # Hash of (parameters, date range, capital, candle data version)
+    result_blob = db.Column(db.LargeBinary, nullable=False)  # Compressed columnar result (utils.backtest_storage)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<BacktestCacheEntry {self.cache_key[:12]} - {self.hits} hits>'
+
 class TradingSignal(db.Model):
     __tablename__ = 'trading_signals' #Adicionado nome da tabela
+    # Per-user listings filter on user_id and order by created_at
+    __table_args__ = (db.Index('ix_trading_signals_user_id_created_at', 'user_id', 'created_at'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False) #Alterado para users.id
     signal_type = db.Column(db.String(10), nullable=False)  # BUY, SELL, HOLD
@@ -74,47 +174,144 @@ class TradingSignal(db.Model):
 
 class PaperTrade(db.Model):
     __tablename__ = 'paper_trades' #Adicionado nome da tabela
+    # Per-user listings filter on user_id and order by created_at
+    __table_args__ = (db.Index('ix_paper_trades_user_id_created_at', 'user_id', 'created_at'),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False) #Alterado para users.id
     signal_id = db.Column(db.Integer, db.ForeignKey('trading_signals.id')) #Alterado para trading_signals.id
+    symbol = db.Column(db.String(20), nullable=False, default='BTCUSDT')
     trade_type = db.Column(db.String(10), nullable=False)  # BUY, SELL
-    price = db.Column(db.Float, nullable=False)
+    order_type = db.Column(db.String(10), nullable=False, default='MARKET')  # MARKET, LIMIT
+    limit_price = db.Column(db.Float)
+    price = db.Column(db.Float, nullable=False)  # Fill price (the limit price while a limit order is pending)
     quantity = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='OPEN')  # OPEN, CLOSED
+    status = db.Column(db.String(20), default='OPEN')  # PENDING, OPEN, CLOSED, CANCELLED
     close_price = db.Column(db.Float)
     profit_loss = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    filled_at = db.Column(db.DateTime)
     closed_at = db.Column(db.DateTime)
 
     # Relationship
     signal = db.relationship('TradingSignal', backref='paper_trades', lazy=True)
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'signal_id': self.signal_id,
+            'symbol': self.symbol,
+            'trade_type': self.trade_type,
+            'order_type': self.order_type,
+            'limit_price': self.limit_price,
+            'price': self.price,
+            'quantity': self.quantity,
+            'status': self.status,
+            'close_price': self.close_price,
+            'profit_loss': self.profit_loss,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'filled_at': self.filled_at.isoformat() if self.filled_at else None,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None
+        }
+
     def __repr__(self):
         return f'<PaperTrade {self.id} - {self.trade_type} at {self.price}>'
 
+class PortfolioSnapshot(db.Model):
+    __tablename__ = 'portfolio_snapshots'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    open_positions = db.Column(db.Integer, nullable=False, default=0)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)  # Sum of entry price x quantity of open positions
+    unrealized_pnl = db.Column(db.Float, nullable=False, default=0.0)
+    closed_trades = db.Column(db.Integer, nullable=False, default=0)
+    realized_pnl = db.Column(db.Float, nullable=False, default=0.0)
+    prices = db.Column(db.Text)  # JSON of the symbol prices open positions were marked at
+    marked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'open_positions': self.open_positions,
+            'cost_basis': self.cost_basis,
+            'unrealized_pnl': self.unrealized_pnl,
+            'closed_trades': self.closed_trades,
+            'realized_pnl': self.realized_pnl,
+            'total_pnl': self.unrealized_pnl + self.realized_pnl,
+            'prices': json.loads(self.prices) if self.prices else {},
+            'marked_at': self.marked_at.isoformat() if self.marked_at else None
+        }
+
+    def __repr__(self):
+        return f'<PortfolioSnapshot {self.user_id} - PL: {self.unrealized_pnl + self.realized_pnl}>'
+
+class TaskRun(db.Model):
+    __tablename__ = 'task_runs'
+    # One row per run of a periodic background task, so that when every web worker runs the
+    # task's thread only the process that claims a run performs it
+    task = db.Column(db.String(40), primary_key=True)
+    run_key = db.Column(db.String(100), primary_key=True)  # e.g. symbol, interval and candle time
+    claimed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    # Claims older than this are pruned
+    RETENTION = timedelta(days=2)
+
+    @classmethod
+    def is_claimed(cls, task, run_key):
+        return db.session.get(cls, (task, run_key)) is not None
+
+    @classmethod
+    def claim(cls, task, run_key):
+        """
+        Claim a run inside the caller's transaction
+
+        A concurrent claim of the same run waits for this transaction and
+        then fails, so put the claim in the transaction that does the run's
+        writes: if it rolls back, the run can be claimed again.
+
+        Returns:
+            bool: True if this transaction now owns the run
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(task=task, run_key=run_key))
+        except IntegrityError:
+            return False
+        db.session.execute(
+            db.delete(cls).where(cls.task == task, cls.claimed_at < datetime.utcnow() - cls.RETENTION)
+        )
+        return True
+
+    def __repr__(self):
+        return f'<TaskRun {self.task} {self.run_key}>'
+
+# Indicator config keys that tune how a value is interpreted, not how it is computed
+INTERPRETATION_PARAMS = ('overbought', 'oversold')
+
 class AdvancedAnalyzer:
     def __init__(self):
         pass
 
-    def analyze(self, market_data: pd.DataFrame, strategy_parameters: dict):
+    def analyze(self, market_data: pd.DataFrame, strategy_parameters: dict, computed: dict = None):
         """
         Executa a análise avançada com base nos dados de mercado e parâmetros da estratégia.
 
         Args:
             market_data (pd.DataFrame): DataFrame com dados de preço (Open, High, Low, Close, Volume) e timestamps.
             strategy_parameters (dict): Dicionário contendo os parâmetros da estratégia (carregado do JSON).
+            computed (dict): Optional memo of indicator and pattern results over `market_data`,
+                shared between strategies analysed on the same data.
 
         Returns:
             dict: Um dicionário contendo os resultados da análise (sinais brutos, confiança, razão).
         """
+        if computed is None:
+            computed = {}
         analysis_results = {}
 
         # 1. Calcular Indicadores Técnicos
-        technical_signals = self._calculate_technical_indicators(market_data, strategy_parameters.get('technical_indicators', []))
+        technical_signals = self._calculate_technical_indicators(market_data, strategy_parameters.get('technical_indicators', []), computed)
         analysis_results.update(technical_signals)
 
         # 2. Identificar Padrões de Candle
-        candle_signals = self._identify_candle_patterns(market_data, strategy_parameters.get('candle_patterns', []))
+        candle_signals = self._identify_candle_patterns(market_data, strategy_parameters.get('candle_patterns', []), computed)
         analysis_results.update(candle_signals)
 
         # 3. Analisar Sentimento (se habilitado)
@@ -134,38 +331,57 @@ class AdvancedAnalyzer:
 
         return {"signal_type": final_signal, "confidence": confidence, "reason": reason, "raw_signals": analysis_results}
 
-    def _calculate_technical_indicators(self, market_data: pd.DataFrame, indicators_config: list) -> dict:
-        """Calcula os indicadores técnicos configurados."""
+    @staticmethod
+    def _indicator_spec(indicator_config: dict) -> tuple:
+        """(name, canonical params) identifying one indicator computation."""
+        params = {k: v for k, v in indicator_config.items() if k not in ('name',) + INTERPRETATION_PARAMS}
+        return indicator_config.get('name'), json.dumps(params, sort_keys=True, default=str)
+
+    def _compute_indicator(self, market_data: pd.DataFrame, name: str, params: dict):
+        """
+        Calcula um indicador e devolve (categoria, último valor), ou None se falhar.
+        """
+        try:
+            if hasattr(ta.trend, f'{name}_indicator'): #utilizado _indicator
+                indicator_class = getattr(ta.trend, f'{name}_indicator') #utilizado _indicator
+                indicator = indicator_class(market_data['high'], market_data['low'], market_data['close'], **params) # Corrigido para minúsculas
+                return 'technical', indicator.trend().iloc[-1] #utilizado trend()
+            elif hasattr(ta.momentum, f'{name}_indicator'): #utilizado _indicator
+                indicator_class = getattr(ta.momentum, f'{name}_indicator') #utilizado _indicator
+                indicator = indicator_class(market_data['close'], **params) # Corrigido para minúsculas
+                return 'momentum', indicator.momentum().iloc[-1] #utilizado momentum()
+            elif hasattr(ta.volume, f'{name}_indicator'): #utilizado _indicator
+                indicator_class = getattr(ta.volume, f'{name}_indicator') #utilizado _indicator
+                indicator = indicator_class(market_data['close'], market_data['volume'], **params) # Corrigido para minúsculas
+                return 'volume', indicator.volume().iloc[-1] #utilizado volume()
+            elif hasattr(ta.volatility, f'{name}_indicator'): #utilizado _indicator
+                indicator_class = getattr(ta.volatility, f'{name}_indicator') #utilizado _indicator
+                indicator = indicator_class(market_data['high'], market_data['low'], market_data['close'], **params) #Corrigido para maiúsculas
+                return 'volatility', indicator.volatility().iloc[-1] #utilizado volatility()
+        except AttributeError:
+            print(f"Indicador técnico '{name}' não encontrado na biblioteca 'ta'.")
+        except Exception as e:
+            print(f"Erro ao calcular indicador '{name}': {e}")
+        return None
+
+    def _calculate_technical_indicators(self, market_data: pd.DataFrame, indicators_config: list, computed: dict = None) -> dict:
+        """Calcula os indicadores técnicos configurados, reutilizando os já presentes em `computed`."""
+        if computed is None:
+            computed = {}
         signals = {}
         for indicator_config in indicators_config:
             name = indicator_config.get('name')
             params = {k: v for k, v in indicator_config.items() if k not in ['name']}
-            try:
-                if hasattr(ta.trend, f'{name}_indicator'): #utilizado _indicator
-                    indicator_class = getattr(ta.trend, f'{name}_indicator') #utilizado _indicator
-                    indicator = indicator_class(market_data['high'], market_data['low'], market_data['close'], **params) # Corrigido para minúsculas
-                    signals[f'technical_{name}'] = indicator.trend().iloc[-1] #utilizado trend()
-                    # Adicione lógica para interpretar o valor do indicador como um sinal (BUY/SELL)
-                    signals[f'signal_technical_{name}'] = self._interpret_technical_signal(name, signals[f'technical_{name}'], params)
-                elif hasattr(ta.momentum, f'{name}_indicator'): #utilizado _indicator
-                    indicator_class = getattr(ta.momentum, f'{name}_indicator') #utilizado _indicator
-                    indicator = indicator_class(market_data['close'], **params) # Corrigido para minúsculas
-                    signals[f'momentum_{name}'] = indicator.momentum().iloc[-1] #utilizado momentum()
-                    signals[f'signal_momentum_{name}'] = self._interpret_technical_signal(name, signals[f'momentum_{name}'], params)
-                elif hasattr(ta.volume, f'{name}_indicator'): #utilizado _indicator
-                    indicator_class = getattr(ta.volume, f'{name}_indicator') #utilizado _indicator
-                    indicator = indicator_class(market_data['close'], market_data['volume'], **params) # Corrigido para minúsculas
-                    signals[f'volume_{name}'] = indicator.volume().iloc[-1] #utilizado volume()
-                    signals[f'signal_volume_{name}'] = self._interpret_technical_signal(name, signals[f'volume_name'], params)
-                elif hasattr(ta.volatility, f'{name}_indicator'): #utilizado _indicator
-                    indicator_class = getattr(ta.volatility, f'{name}_indicator') #utilizado _indicator
-                    indicator = indicator_class(market_data['high'], market_data['low'], market_data['close'], **params) #Corrigido para maiúsculas
-                    signals[f'volatility_{name}'] = indicator.volatility().iloc[-1] #utilizado volatility()
-                    signals[f'signal_volatility_{name}'] = self._interpret_technical_signal(name, signals[f'volatility_{name}'], params)
-            except AttributeError:
-                print(f"Indicador técnico '{name}' não encontrado na biblioteca 'ta'.")
-            except Exception as e:
-                print(f"Erro ao calcular indicador '{name}': {e}")
+            spec = self._indicator_spec(indicator_config)
+            if spec not in computed:
+                computed[spec] = self._compute_indicator(
+                    market_data, name, {k: v for k, v in params.items() if k not in INTERPRETATION_PARAMS})
+            if computed[spec] is None:
+                continue
+            category, value = computed[spec]
+            signals[f'{category}_{name}'] = value
+            # Adicione lógica para interpretar o valor do indicador como um sinal (BUY/SELL)
+            signals[f'signal_{category}_{name}'] = self._interpret_technical_signal(name, value, params)
         return signals
 
     def _interpret_technical_signal(self, indicator_name: str, value: float, params: dict) -> str:
@@ -181,20 +397,26 @@ class AdvancedAnalyzer:
         # Adicione interpretações para outros indicadores
         return 'HOLD'
 
-    def _identify_candle_patterns(self, market_data: pd.DataFrame, patterns_config: list) -> dict:
-        """Identifica os padrões de candle configurados."""
+    def _identify_candle_patterns(self, market_data: pd.DataFrame, patterns_config: list, computed: dict = None) -> dict:
+        """Identifica os padrões de candle configurados, reutilizando os já presentes em `computed`."""
+        if computed is None:
+            computed = {}
         signals = {}
         for pattern in patterns_config:
-            try:
-                pattern_function = getattr(ta.patterns, pattern)
-                result = pattern_function(market_data['open'], market_data['high'], market_data['low'], market_data['close']) #Corrigido para minusculas
-                if result.iloc[-1]:
-                    signals[f'candle_{pattern}'] = True
-                    signals[f'signal_candle_{pattern}'] = self._interpret_candle_signal(pattern)
-            except AttributeError:
-                print(f"Padrão de candle '{pattern}' não encontrado na biblioteca 'ta'.")
-            except Exception as e:
-                print(f"Erro ao identificar padrão '{pattern}': {e}")
+            key = ('candle_pattern', pattern)
+            if key not in computed:
+                computed[key] = False
+                try:
+                    pattern_function = getattr(ta.patterns, pattern)
+                    result = pattern_function(market_data['open'], market_data['high'], market_data['low'], market_data['close']) #Corrigido para minusculas
+                    computed[key] = bool(result.iloc[-1])
+                except AttributeError:
+                    print(f"Padrão de candle '{pattern}' não encontrado na biblioteca 'ta'.")
+                except Exception as e:
+                    print(f"Erro ao identificar padrão '{pattern}': {e}")
+            if computed[key]:
+                signals[f'candle_{pattern}'] = True
+                signals[f'signal_candle_{pattern}'] = self._interpret_candle_signal(pattern)
         return signals
 
     def _interpret_candle_signal(self, pattern_name: str) -> str:
@@ -222,15 +444,11 @@ class AdvancedAnalyzer:
         weighted_signals = {}
         reason_parts = []
 
-        for rule in combination_rules:
-            condition = rule.get('condition')
-            signal = rule.get('signal')
-            weight = rule.get('weight', 1.0)
-
-            if self._evaluate_condition(condition, raw_signals):
-                weighted_signals.setdefault(signal, 0)
-                weighted_signals[signal] += weight
-                reason_parts.append(f"Regra '{condition}' -> '{signal}' ({weight})")
+        # As regras são compiladas uma vez e reutilizadas entre chamadas e estratégias
+        for rule, signal, weight in rule_set_for(combination_rules).matches(raw_signals):
+            weighted_signals.setdefault(signal, 0)
+            weighted_signals[signal] += weight
+            reason_parts.append(f"Regra '{rule.text}' -> '{signal}' ({weight})")
 
         if not weighted_signals:
             return 'HOLD', 0.0, "Nenhuma regra de combinação satisfeita."
@@ -244,63 +462,51 @@ class AdvancedAnalyzer:
         return final_signal, confidence, reason
 
     def _evaluate_condition(self, condition: str, signals: dict) -> bool:
-        """Avalia uma condição lógica usando os sinais brutos."""
-        # Implementar um parser simples para avaliar a string de condição
-        # Exemplo: "RSI > 70 AND MACD_CROSS_OVER_SIGNAL"
-        # Isso exigirá um pouco de lógica para interpretar os nomes dos sinais e os operadores
-        # Uma abordagem mais robusta seria usar uma biblioteca de avaliação de expressões
+        """Avalia uma condição lógica (ex: "technical_rsi < 30 AND (candle_hammer OR close > 2 * sma)") usando os sinais brutos."""
         try:
-            # Uma implementação muito básica e limitada:
-            parts = condition.split()
-            op = None
-            left_operand = None
-            right_operand = None
-            current_result = True
-
-            i = 0
-            while i < len(parts):
-                part = parts[i]
-                if part in signals:
-                    operand_value = signals.get(part)
-                    # Precisa de lógica mais inteligente para comparar valores
-                    if left_operand is None:
-                        left_operand = operand_value
-                    else:
-                        right_operand = operand_value
-                elif part in ['>', '<', '>=', '<=', '==']:
-                    op = part
-                elif part.upper() == 'AND':
-                    current_result = current_result and self._perform_comparison(left_operand, op, right_operand)
-                    left_operand = None
-                    op = None
-                    right_operand = None
-                elif part.upper() == 'OR':
-                    current_result = current_result or self._perform_comparison(left_operand, op, right_operand)
-                    left_operand = None
-                    op = None
-                    right_operand = None
-                i += 1
-
-            if op and left_operand is not None and right_operand is not None:
-                current_result = current_result and self._perform_comparison(left_operand, op, right_operand)
-
-            return current_result
-        except Exception as e:
+            return compile_rule(condition).evaluate(signals)
+        except RuleSyntaxError as e:
             print(f"Erro ao avaliar condição '{condition}': {e}")
             return False
 
-    def _perform_comparison(self, val1, op, val2):
-        if op == '>':
-            return val1 > val2
-        elif op == '<':
-            return val1 < val2
-        elif op == '>=':
-            return val1 >= val2
-        elif op == '<=':
-            return val1 <= val2
-        elif op == '==':
-            return val1 == val2
-        return False
+class BatchAdvancedAnalyzer(AdvancedAnalyzer):
+    """
+    Analyses many strategies over the same market data (one symbol/interval)
+
+    Indicator specs (name + compute params) and candle patterns are
+    deduplicated across all strategies, each unique one is computed once,
+    and every strategy's rules are then evaluated against the shared results.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.last_run = None
+
+    def analyze_many(self, market_data: pd.DataFrame, strategies_parameters: list) -> list:
+        """
+        Args:
+            market_data (pd.DataFrame): OHLCV data shared by every strategy
+            strategies_parameters (list): Parameter dicts, one per strategy
+
+        Returns:
+            list: analyze() results, in the order of `strategies_parameters`
+        """
+        computed = {}
+        requested = 0
+        for strategy_parameters in strategies_parameters:
+            for indicator_config in strategy_parameters.get('technical_indicators', []):
+                requested += 1
+                spec = self._indicator_spec(indicator_config)
+                if spec not in computed:
+                    computed[spec] = self._compute_indicator(market_data, spec[0], json.loads(spec[1]))
+
+        results = [self.analyze(market_data, strategy_parameters, computed) for strategy_parameters in strategies_parameters]
+        self.last_run = {
+            'strategies': len(strategies_parameters),
+            'indicators_requested': requested,
+            'indicators_computed': sum(1 for key in computed if key[0] != 'candle_pattern')
+        }
+        return results
 
 def generate_trading_signal(user_id: int, strategy_id: int, market_data: pd.DataFrame):
     """Gera um sinal de trading para um usuário e estratégia específicos."""
@@ -0,0 +1,65 @@
+from flask import Blueprint, request, jsonify
+from flask_login import current_user, login_required
+from utils.binance_api import DEFAULT_SYMBOL
+from utils.paper_trading import paper_trading_engine, PaperTradingError
+from utils.portfolio import get_portfolio_summary
+import logging
+
+paper_trade_api = Blueprint('paper_trade_api', __name__)
+
+@paper_trade_api.route('/api/paper_trades', methods=['GET'])
+@login_required
+def list_paper_trades():
+    try:
+        limit = int(request.args.get('limit', 50))
+        return jsonify({
+            'active': paper_trading_engine.active_trades(current_user.id),
+            'history': paper_trading_engine.trade_history(current_user.id, limit)
+        })
+    except Exception as e:
+        logging.error(f"Error listing paper trades: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@paper_trade_api.route('/api/paper_trades', methods=['POST'])
+@login_required
+def create_paper_trade():
+    data = request.get_json() or {}
+    try:
+        trade = paper_trading_engine.place_order(
+            current_user.id,
+            data.get('symbol', DEFAULT_SYMBOL),
+            data.get('trade_type', ''),
+            data.get('quantity'),
+            order_type=data.get('order_type', 'MARKET'),
+            limit_price=data.get('limit_price'),
+            signal_id=data.get('signal_id')
+        )
+        return jsonify(trade), 201
+    except (PaperTradingError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error placing paper trade: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@paper_trade_api.route('/api/paper_trades/<int:trade_id>/close', methods=['POST'])
+@login_required
+def close_paper_trade(trade_id):
+    try:
+        trade = paper_trading_engine.close_trade(current_user.id, trade_id)
+        if trade is None:
+            return jsonify({"error": "Trade not found"}), 404
+        return jsonify(trade)
+    except PaperTradingError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logging.error(f"Error closing paper trade {trade_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@paper_trade_api.route('/api/portfolio/summary', methods=['GET'])
+@login_required
+def portfolio_summary():
+    try:
+        return jsonify(get_portfolio_summary(current_user.id))
+    except Exception as e:
+        logging.error(f"Error loading portfolio summary: {str(e)}")
+        return jsonify({"error": str(e)}), 500
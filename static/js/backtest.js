@@ -136,8 +136,8 @@ document.addEventListener('DOMContentLoaded', function() {
       end_date: endDate
     };
     
-    // Send request
-    fetch('/api/backtest', {
+    // Submit a background job and poll it until it finishes
+    fetch('/api/backtest/jobs', {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
@@ -150,6 +150,7 @@ document.addEventListener('DOMContentLoaded', function() {
       }
       return response.json();
     })
+    .then(job => waitForJob(job.id))
     .then(results => {
       showResults(results);
     })
@@ -166,6 +167,35 @@ document.addEventListener('DOMContentLoaded', function() {
     });
   }
   
+  // Poll a backtest job until it completes, resolving with its results
+  function waitForJob(jobId) {
+    return new Promise((resolve, reject) => {
+      const poll = () => {
+        fetch(`/api/backtest/jobs/${jobId}`)
+          .then(response => {
+            if (!response.ok) {
+              throw new Error('Backtest failed');
+            }
+            return response.json();
+          })
+          .then(job => {
+            if (job.status === 'COMPLETED') {
+              resolve(job.result);
+            } else if (job.status === 'FAILED') {
+              reject(new Error(job.error || 'Backtest failed'));
+            } else {
+              if (runBacktestBtn) {
+                runBacktestBtn.querySelector('span').textContent = `Running... ${Math.round(job.progress * 100)}%`;
+              }
+              setTimeout(poll, 1000);
+            }
+          })
+          .catch(reject);
+      };
+      poll();
+    });
+  }
+  
   // Generate demo results for fallback
   function generateDemoResults() {
     // Create simulated equity curve
@@ -4,46 +4,41 @@
  */
 
 document.addEventListener('DOMContentLoaded', function() {
-    // Inicializar preço do Bitcoin
-    getBitcoinRealTimePrice();
-    
-    // Atualizar a cada 15 segundos
-    setInterval(getBitcoinRealTimePrice, 15000);
+    // Receber o preço do Bitcoin pelo stream do servidor (um único feed compartilhado por todos os clientes)
+    subscribeBitcoinPrice();
 });
 
+// Espera antes de tentar de novo um stream recusado pelo servidor
+const STREAM_RETRY_MS = 30000;
+
 /**
- * Obtém o preço do Bitcoin em tempo real do CoinGecko
+ * Assina o stream de preços (Server-Sent Events) do servidor.
+ * Cada atualização é repassada aos outros módulos como o evento 'btc-price' em window.
  */
-function getBitcoinRealTimePrice() {
-    // Elementos que mostram o preço do Bitcoin
-    const headerPriceElement = document.getElementById('live-btc-price');
-    const headerChangeElement = document.querySelector('.ticker-change');
-    const dashboardPriceElement = document.getElementById('live-btc-price-card');
+function subscribeBitcoinPrice() {
+    if (!window.EventSource) {
+        useFallbackPriceAPI();
+        return;
+    }
     
-    // Usar API pública do CoinGecko para dados 100% reais
-    fetch('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_change=true')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Falha ao obter dados do CoinGecko');
-            }
-            return response.json();
-        })
-        .then(data => {
-            if (data && data.bitcoin) {
-                // Obter preço atual e variação percentual
-                const currentPrice = data.bitcoin.usd;
-                const priceChange = data.bitcoin.usd_24h_change;
-                
-                // Atualizar todos os elementos da UI
-                updateAllBitcoinPrices(currentPrice, priceChange);
-            }
-        })
-        .catch(error => {
-            console.error('Erro ao obter preço do Bitcoin:', error);
-            
-            // Tentar API interna como fallback
+    const source = new EventSource('/api/stream/prices?symbol=BTCUSDT');
+    
+    source.onmessage = function(event) {
+        const tick = JSON.parse(event.data);
+        
+        // Atualizar todos os elementos da UI
+        updateAllBitcoinPrices(tick.price, tick.change_pct);
+        window.dispatchEvent(new CustomEvent('btc-price', { detail: tick }));
+    };
+    
+    source.onerror = function() {
+        // O EventSource reconecta sozinho, exceto quando o servidor recusa o stream (503 com o worker cheio):
+        // nesse caso mostrar o último candle e tentar o stream de novo mais tarde
+        if (source.readyState === EventSource.CLOSED) {
             useFallbackPriceAPI();
-        });
+            setTimeout(subscribeBitcoinPrice, STREAM_RETRY_MS);
+        }
+    };
 }
 
 /**
@@ -70,15 +70,16 @@ document.addEventListener('DOMContentLoaded', function() {
     });
   }
   
-  // Fetch latest trading signals
+  // Fetch latest trading signals (first page only; the dashboard shows the newest ones)
   function fetchLatestSignals() {
-    return fetch('/api/signals')
+    return fetch('/api/signals?limit=5')
       .then(response => {
         if (!response.ok) {
           throw new Error('Failed to fetch signals');
         }
         return response.json();
       })
+      .then(page => page.signals)
       .catch(error => {
         console.error('Error fetching signals:', error);
         // Return placeholder signals for demonstration
@@ -114,8 +115,15 @@ document.addEventListener('DOMContentLoaded', function() {
     // Calculate price and change
     const currentPrice = parseFloat(latestCandle.close);
     const previousPrice = parseFloat(previousCandle.close);
-    const priceChange = currentPrice - previousPrice;
-    const priceChangePercent = (priceChange / previousPrice) * 100;
+    const priceChangePercent = ((currentPrice - previousPrice) / previousPrice) * 100;
+    
+    updateLivePrice({ price: currentPrice, change_pct: priceChangePercent });
+  }
+  
+  // Show a price tick ({price, change_pct}) from the price stream or the latest candles
+  function updateLivePrice(tick) {
+    const currentPrice = tick.price;
+    const priceChangePercent = tick.change_pct;
     
     // Update UI
     if (currentPriceElement) {
@@ -126,7 +134,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     if (btcChangeElement) {
-      const isPositive = priceChange >= 0;
+      const isPositive = priceChangePercent >= 0;
       btcChangeElement.textContent = `${isPositive ? '+' : ''}${priceChangePercent.toFixed(2)}%`;
       btcChangeElement.className = isPositive ? 'positive-value' : 'negative-value';
       
@@ -283,8 +291,8 @@ document.addEventListener('DOMContentLoaded', function() {
     setupRefreshButton();
     setupChartIntervals();
     
-    // Set up automatic refresh every 60 seconds
-    setInterval(updateDashboard, 60000);
+    // Live prices arrive through the shared price stream (see bitcoin-price.js)
+    window.addEventListener('btc-price', event => updateLivePrice(event.detail));
   }
   
   // Initialize if on dashboard page
@@ -11,11 +11,10 @@ document.addEventListener('DOMContentLoaded', function() {
     initDropdowns();
     initTooltips();
     initParticles();
-    updateLivePrices();
     initAnimations();
     
-    // Iniciar funções de atualização periódica
-    setInterval(updateLivePrices, 30000); // Atualizar preços a cada 30 segundos
+    // Preços em tempo real chegam pelo stream aberto em bitcoin-price.js
+    window.addEventListener('btc-price', event => updateLivePrices(event.detail));
 });
 
 /**
@@ -249,71 +248,13 @@ function initParticles() {
 /**
  * Atualiza as informações de preço em tempo real
  */
-function updateLivePrices() {
+function updateLivePrices(tick) {
     const livePriceElement = document.getElementById('live-btc-price');
     const priceChangeElement = document.querySelector('.ticker-change');
     
     if (!livePriceElement) return;
     
-    // Tenta obter dados da API, caso contrário usa dados simulados para demonstração
-    fetchBitcoinPrice()
-        .then(data => {
-            if (data && data.price) {
-                updatePriceDisplay(livePriceElement, priceChangeElement, data.price, data.change);
-            } else {
-                // Fallback para dados simulados (apenas para demonstração de UI)
-                simulatePriceUpdate(livePriceElement, priceChangeElement);
-            }
-        })
-        .catch(() => {
-            // Fallback para dados simulados (apenas para demonstração de UI)
-            simulatePriceUpdate(livePriceElement, priceChangeElement);
-        });
-}
-
-/**
- * Tenta buscar o preço atual do Bitcoin da API
- */
-function fetchBitcoinPrice() {
-    return fetch('/api/bitcoin/price?interval=1h&limit=25')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Falha ao buscar preço');
-            }
-            return response.json();
-        })
-        .then(data => {
-            // Processar dados da API
-            if (Array.isArray(data) && data.length > 0) {
-                const lastPrice = parseFloat(data[data.length - 1].close);
-                const prevPrice = parseFloat(data[data.length - 2].close);
-                const change = (lastPrice - prevPrice) / prevPrice * 100;
-                
-                return {
-                    price: lastPrice,
-                    change: change
-                };
-            }
-            throw new Error('Formato de dados inválido');
-        })
-        .catch(error => {
-            console.error('Erro ao buscar preço do Bitcoin:', error);
-            return null;
-        });
-}
-
-/**
- * Simula atualizações de preço (apenas para demonstração quando API não está disponível)
- */
-function simulatePriceUpdate(priceElement, changeElement) {
-    const currentPrice = parseFloat(priceElement.textContent.replace(/[$,]/g, ''));
-    const basePrice = currentPrice || 42987.65;
-    
-    // Gera uma pequena variação aleatória
-    const change = (Math.random() * 2 - 1) * 0.5; // Entre -0.5% e +0.5%
-    const newPrice = basePrice * (1 + change / 100);
-    
-    updatePriceDisplay(priceElement, changeElement, newPrice, change);
+    updatePriceDisplay(livePriceElement, priceChangeElement, tick.price, tick.change_pct);
 }
 
 /**
@@ -416,31 +357,10 @@ function initTradingViewWidget() {
             "calendar": true,
         });
         
-        // Obter dados reais do Bitcoin para atualizar os sinais e cards
-        const updateRealPrices = async () => {
-            try {
-                // Obter o preço atual do Bitcoin de uma API alternativa
-                const response = await fetch('https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_change=true');
-                const data = await response.json();
-                
-                if (data && data.bitcoin) {
-                    const btcPrice = data.bitcoin.usd;
-                    const btcChange = data.bitcoin.usd_24h_change;
-                    
-                    // Atualizar todos os elementos de preço no dashboard
-                    updateAllPriceElements(btcPrice, btcChange);
-                }
-            } catch (error) {
-                console.error('Erro ao buscar preço real do Bitcoin:', error);
-                // Não mostrar erro ao usuário, usar os dados de exemplo em vez disso
-            }
-        };
-        
-        // Tenta obter preços reais
-        updateRealPrices();
-        
-        // Configurar atualização periódica
-        setInterval(updateRealPrices, 60000); // Atualizar a cada minuto
+        // Atualizar os sinais e cards com os preços reais recebidos pelo stream
+        window.addEventListener('btc-price', event => {
+            updateAllPriceElements(event.detail.price, event.detail.change_pct);
+        });
         
     } catch (error) {
         console.warn('TradingView não foi inicializado', error);
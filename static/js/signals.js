@@ -9,22 +9,17 @@ document.addEventListener('DOMContentLoaded', function() {
   const signalsList = document.getElementById('signals-list');
   const signalFilters = document.querySelectorAll('.signal-filter');
   
-  // Load signals from the server
+  // Load signals from the server (one page at a time; the API pages by cursor)
   function loadSignals() {
     if (!signalsList) return;
     
     // Show loading state
     signalsList.innerHTML = '<div class="text-center py-5"><i class="fas fa-spinner fa-spin fa-2x"></i><p class="mt-2">Loading signals...</p></div>';
     
-    fetch('/api/signals')
-      .then(response => {
-        if (!response.ok) {
-          throw new Error('Failed to fetch signals');
-        }
-        return response.json();
-      })
-      .then(signals => {
-        displaySignals(signals);
+    fetchSignalsPage(null)
+      .then(page => {
+        displaySignals(page.signals);
+        showLoadMore(page.next_cursor);
       })
       .catch(error => {
         console.error('Error loading signals:', error);
@@ -44,6 +39,50 @@ document.addEventListener('DOMContentLoaded', function() {
       });
   }
   
+  // Fetch one page of signals ({signals, next_cursor})
+  function fetchSignalsPage(cursor) {
+    const url = cursor ? `/api/signals?cursor=${encodeURIComponent(cursor)}` : '/api/signals';
+    return fetch(url)
+      .then(response => {
+        if (!response.ok) {
+          throw new Error('Failed to fetch signals');
+        }
+        return response.json();
+      });
+  }
+  
+  // Show a "Load more" button that follows next_cursor
+  function showLoadMore(cursor) {
+    const existing = document.getElementById('signals-load-more');
+    if (existing) {
+      existing.remove();
+    }
+    if (!cursor || !signalsList) return;
+    
+    const loadMoreBtn = document.createElement('button');
+    loadMoreBtn.id = 'signals-load-more';
+    loadMoreBtn.className = 'btn btn-outline-primary btn-block mt-2';
+    loadMoreBtn.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+    loadMoreBtn.addEventListener('click', () => {
+      loadMoreBtn.disabled = true;
+      loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+      fetchSignalsPage(cursor)
+        .then(page => {
+          page.signals.forEach(signal => {
+            signalsList.insertBefore(createSignalElement(signal), loadMoreBtn);
+          });
+          showLoadMore(page.next_cursor);
+        })
+        .catch(error => {
+          console.error('Error loading more signals:', error);
+          showAlert('Failed to load more signals: ' + error.message, 'danger');
+          loadMoreBtn.disabled = false;
+          loadMoreBtn.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+        });
+    });
+    signalsList.appendChild(loadMoreBtn);
+  }
+  
   // Generate demo signals for preview
   function generateDemoSignals() {
     const now = new Date();
@@ -57,8 +57,27 @@ document.addEventListener('DOMContentLoaded', function() {
       prefillTradeFromSignal(signalId);
     }
     
-    // Set up auto-refresh
-    setInterval(updateCurrentPrice, 30000); // Update price every 30 seconds
+    // Live prices arrive through the shared price stream (see bitcoin-price.js)
+    window.addEventListener('btc-price', event => setCurrentPrice(event.detail.price));
+  }
+  
+  // Show a new Bitcoin price
+  function setCurrentPrice(price) {
+    currentPrice = price;
+    
+    // Update UI
+    if (currentPriceElement) {
+      currentPriceElement.textContent = formatCurrency(currentPrice);
+      
+      // Animate price update
+      currentPriceElement.classList.add('animate-pulse');
+      setTimeout(() => {
+        currentPriceElement.classList.remove('animate-pulse');
+      }, 1000);
+    }
+    
+    // Update total value if quantity is entered
+    updateTotalValue();
   }
   
   // Update current Bitcoin price
@@ -72,21 +91,7 @@ document.addEventListener('DOMContentLoaded', function() {
       })
       .then(data => {
         if (data && data.length > 0) {
-          currentPrice = parseFloat(data[0].close);
-          
-          // Update UI
-          if (currentPriceElement) {
-            currentPriceElement.textContent = formatCurrency(currentPrice);
-            
-            // Animate price update
-            currentPriceElement.classList.add('animate-pulse');
-            setTimeout(() => {
-              currentPriceElement.classList.remove('animate-pulse');
-            }, 1000);
-          }
-          
-          // Update total value if quantity is entered
-          updateTotalValue();
+          setCurrentPrice(parseFloat(data[0].close));
         }
       })
       .catch(error => {
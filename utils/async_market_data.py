@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import logging
+import httpx
+from utils.binance_api import (
+    BASE_URL, KLINES_ENDPOINT, klines_weight, parse_klines, get_ring_frame, get_market_data_from_coingecko
+)
+from utils.kline_cache import kline_cache
+from utils.market_data_client import (
+    market_data_client, binance_weight_limiter, CircuitOpenError, RETRY_STATUS_CODES, RATE_LIMIT_STATUS_CODES,
+    DEFAULT_TIMEOUT, MAX_RETRIES
+)
+
+# Upstream connections one worker may hold open at once
+ASYNC_POOL_SIZE = int(os.environ.get('MARKET_DATA_ASYNC_POOL_SIZE', 200))
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """
+    Shares one in-flight coroutine between concurrent callers with the same key.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task. A caller that is cancelled (e.g. its
+    client disconnected) does not cancel the shared work.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key, factory):
+        """
+        Await the in-flight task for `key`, starting it with `factory()` if there is none
+
+        Args:
+            key (hashable): Identity of the work, e.g. ('klines', symbol, interval, limit)
+            factory (callable): Returns the coroutine to run when nothing is in flight
+
+        Returns:
+            The coroutine's result (or raises its exception) for every caller
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.started += 1
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Return coalescing counters for monitoring."""
+        return {'in_flight': len(self._in_flight), 'started': self.started, 'joined': self.joined}
+
+
+class AsyncMarketDataClient:
+    """
+    Asyncio counterpart of MarketDataClient for the async request path.
+
+    Requests go through one pooled httpx.AsyncClient, so a worker can wait
+    on hundreds of upstream calls at once. Retries, timeouts, the Binance
+    weight budget and the per-provider circuit breakers and counters are
+    shared with the synchronous client, so both paths see the same
+    provider health.
+    """
+
+    def __init__(self, shared=market_data_client, pool_size=ASYNC_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 max_retries=MAX_RETRIES):
+        """
+        Args:
+            shared (MarketDataClient): Client whose circuit breakers and counters are shared
+            pool_size (int): Maximum concurrent upstream connections
+            timeout (tuple): (connect, read) timeout in seconds
+            max_retries (int): Retries for transient failures
+        """
+        self.shared = shared
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self.max_retries = max_retries
+        self._client = None
+
+    def _http(self):
+        # Created on first use so the pool belongs to the serving event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        return self._client
+
+    async def get(self, provider, url, params=None):
+        """
+        Perform a GET request against a provider (see MarketDataClient.get)
+
+        Returns:
+            httpx.Response: The final response
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+            httpx.HTTPError: If the request keeps failing at the network level
+        """
+        breaker, stats = self.shared._provider(provider)
+        if not breaker.allow_request():
+            stats.record_short_circuit()
+            raise CircuitOpenError(f"Circuit open for {provider}, skipping request")
+
+        attempt = 0
+        while True:
+            response = None
+            start = time.perf_counter()
+            try:
+                response = await self._http().get(url, params=params)
+            except httpx.HTTPError as e:
+                stats.record(time.perf_counter() - start, error=str(e))
+                if attempt >= self.max_retries:
+                    breaker.record_failure()
+                    raise
+            else:
+                latency = time.perf_counter() - start
+                if response.status_code in RATE_LIMIT_STATUS_CODES:
+                    self.shared._rate_limited(provider, breaker, stats, response, latency)
+                    return response
+                if response.status_code in RETRY_STATUS_CODES:
+                    stats.record(latency, error=f"HTTP {response.status_code}")
+                    if attempt >= self.max_retries:
+                        breaker.record_failure()
+                        return response
+                else:
+                    stats.record(latency, error=None if response.is_success else f"HTTP {response.status_code}")
+                    breaker.record_success()
+                    return response
+
+            attempt += 1
+            stats.record_retry()
+            await asyncio.sleep(self.shared._backoff(attempt, response))
+
+    async def aclose(self):
+        """Close the connection pool (on server shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+async def acquire_binance_weight(weight):
+    """Wait for Binance request weight without blocking the event loop."""
+    while True:
+        wait = binance_weight_limiter.reserve(weight)
+        if not wait:
+            return
+        await asyncio.sleep(wait)
+
+
+async def get_market_frame_async(symbol, interval='1h', limit=100):
+    """
+    Async version of utils.binance_api.get_market_frame
+
+    Serves from the kline ring and the shared kline cache like the sync
+    path. Concurrent misses for the same (symbol, interval, limit) share one
+    upstream request.
+
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+
+    Returns:
+        pd.DataFrame: Columnar OHLCV data (read-only, may be shared through the cache)
+    """
+    symbol = symbol.upper()
+    data = get_ring_frame(symbol, interval, limit)
+    if data is None:
+        data = kline_cache.get(symbol, interval, limit)
+    if data is not None:
+        return data
+    return await coalescer.run(('klines', symbol, interval, limit),
+                               lambda: _fetch_market_data_async(symbol, interval, limit))
+
+
+async def _fetch_market_data_async(symbol, interval, limit):
+    """Fetch klines from Binance and cache them, falling back to CoinGecko."""
+    try:
+        params = {'symbol': symbol, 'interval': interval, 'limit': min(limit, 1000)}
+        await acquire_binance_weight(klines_weight(params['limit']))
+        response = await async_market_data_client.get('binance', f"{BASE_URL}{KLINES_ENDPOINT}", params)
+        used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if used_weight:
+            binance_weight_limiter.observe_used(used_weight)
+        if response.status_code != 200:
+            logger.warning(f"Binance API error: {response.text}")
+            raise Exception(f"Binance returned HTTP {response.status_code}")
+        data = parse_klines(response.json())
+    except Exception as e:
+        logger.error(f"Error in async get_market_data from Binance for {symbol}: {str(e)}")
+        # The CoinGecko fallback is rare enough to run on the synchronous client
+        logger.info("Attempting to use CoinGecko API as backup")
+        data = await asyncio.to_thread(get_market_data_from_coingecko, symbol, interval, limit)
+    kline_cache.put(symbol, interval, limit, data)
+    return data.iloc[-limit:]
+
+
+# Shared async client and coalescer used by the ASGI app
+async_market_data_client = AsyncMarketDataClient()
+coalescer = RequestCoalescer()
@@ -0,0 +1,195 @@
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from flask import current_app, request, jsonify
+from flask_login import UserMixin, login_required
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from database import db
+from models import User
+
+# Seconds a loaded user identity is served without a database query
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+
+# Lifetime of market-data API tokens
+MARKET_DATA_TOKEN_TTL_SECONDS = int(os.environ.get('MARKET_DATA_TOKEN_TTL_SECONDS', 3600))
+
+_TOKEN_SALT = 'market-data-token'
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CachedUser(UserMixin):
+    """Read-only identity of a logged-in user, as exposed through current_user."""
+
+    def __init__(self, id, username, email, created_at):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+class UserIdentityCache:
+    """
+    Short-lived cache of user identities for Flask-Login's user_loader.
+
+    Authenticated requests (including frequent front-end polling) get the
+    identity from memory instead of querying the users table every time.
+    Entries are dropped as soon as a User row is updated or deleted through
+    the ORM in this process; changes made by other processes show up once
+    the TTL expires.
+    """
+
+    def __init__(self, ttl=USER_CACHE_TTL_SECONDS):
+        """
+        Args:
+            ttl (float): Seconds an identity is served from memory
+        """
+        self.ttl = ttl
+        self._entries = {}  # user id -> (expires_at, CachedUser)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """
+        Return a user's identity, querying the database only on a miss
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            CachedUser: The identity, or None if there is no such user
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        row = db.session.execute(
+            select(User.id, User.username, User.email, User.created_at).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        identity = CachedUser(*row)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, identity)
+        return identity
+
+    def invalidate(self, user_id):
+        """Drop a user's cached identity."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache counters for monitoring."""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared cache used by the app's user_loader
+user_cache = UserIdentityCache()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # Drop it now and again once committed, so a request that reloads the
+    # user before the commit cannot keep the old profile cached
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_rolled_back_users(session, previous_transaction):
+    session.info.pop('changed_user_ids', None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_user_change(orm_execute_state):
+    # Bulk UPDATE/DELETE statements bypass the mapper events
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+            mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        user_cache.clear()
+
+
+def _token_serializer(secret_key=None):
+    return URLSafeTimedSerializer(secret_key or current_app.secret_key, salt=_TOKEN_SALT)
+
+
+def issue_market_data_token(user_id, secret_key=None):
+    """
+    Create a signed token granting read access to the market-data API
+
+    Args:
+        user_id (int): User the token is issued to
+        secret_key (str): Signing key (defaults to the current app's secret key)
+
+    Returns:
+        str: The token
+    """
+    return _token_serializer(secret_key).dumps({'uid': user_id})
+
+
+def verify_market_data_token(token, secret_key=None):
+    """
+    Check a market-data token from its signature and age alone (no session or database)
+
+    Args:
+        token (str): Token from issue_market_data_token
+        secret_key (str): Signing key (defaults to the current app's secret key)
+
+    Returns:
+        int: The user ID the token was issued to, or None if it is invalid or expired
+    """
+    try:
+        return _token_serializer(secret_key).loads(token, max_age=MARKET_DATA_TOKEN_TTL_SECONDS)['uid']
+    except (BadSignature, KeyError, TypeError):
+        return None
+
+
+def request_token(headers, args):
+    """Token from an 'Authorization: Bearer' header or, for EventSource clients, the `token` query parameter."""
+    authorization = headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return args.get('token')
+
+
+def market_data_auth(view):
+    """
+    login_required for market-data routes, also accepting a market-data token
+
+    Requests carrying a valid token skip the session and user lookup
+    entirely; anything else goes through login_required as before.
+    """
+    protected = login_required(view)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request_token(request.headers, request.args)
+        if token is not None:
+            if verify_market_data_token(token) is None:
+                return jsonify({"error": "Invalid or expired token"}), 401
+            return view(*args, **kwargs)
+        return protected(*args, **kwargs)
+    return wrapper
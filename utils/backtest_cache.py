@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import BacktestCacheEntry
+from utils.backtesting import run_backtest, backtest_range_ms, BACKTEST_INTERVAL
+from utils.backtest_storage import encode_backtest_result, decode_backtest_result
+from utils.binance_api import DEFAULT_SYMBOL
+from utils.candle_store import get_candle_store
+
+# Entries not used for this many days are pruned when new results are stored
+BACKTEST_CACHE_TTL_DAYS = float(os.environ.get('BACKTEST_CACHE_TTL_DAYS', 30))
+
+# Bump when a change to the backtest engine makes earlier results stale
+BACKTEST_ENGINE_VERSION = 1
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def backtest_cache_key(parameters, start_date_str, end_date_str, initial_capital, data_version):
+    """
+    Content hash of a backtest: what it computes and the candle data it reads
+
+    Args:
+        parameters (str): JSON string of strategy parameters
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        initial_capital (float): Initial capital in USD
+        data_version (str): Candle data fingerprint from backtest_data_version
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    try:
+        params = json.loads(parameters)
+    except Exception:
+        params = parameters
+    canonical = json.dumps([BACKTEST_ENGINE_VERSION, params, start_date_str, end_date_str,
+                            float(initial_capital), data_version],
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def backtest_data_version(symbol, start_date_str, end_date_str, sync=True):
+    """
+    Fingerprint of the candles a backtest period reads
+
+    Revising any candle in the range, or a new candle closing inside it,
+    changes the fingerprint, so cache entries keyed on it go stale on their own.
+
+    Args:
+        symbol (str): Trading pair, e.g. 'BTCUSDT'
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        sync (bool): Bring the candle store up to date first
+
+    Returns:
+        str: The fingerprint
+    """
+    start_ms, end_ms = backtest_range_ms(start_date_str, end_date_str)
+    store = get_candle_store()
+    if sync:
+        try:
+            store.sync(symbol, BACKTEST_INTERVAL, start_ms)
+        except Exception as e:
+            logger.error(f"Error syncing candle store for {symbol} {BACKTEST_INTERVAL}: {str(e)}")
+    return store.range_version(symbol, BACKTEST_INTERVAL, start_ms, end_ms)
+
+
+class BacktestCache:
+    """Content-addressed store of backtest results, shared across users and processes via the database."""
+
+    def __init__(self, ttl_days=BACKTEST_CACHE_TTL_DAYS):
+        """
+        Args:
+            ttl_days (float): Days an unused entry is kept
+        """
+        self.ttl = timedelta(days=ttl_days)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        """
+        Return the cached result for a key, or None (the caller commits the hit counter)
+
+        Args:
+            cache_key (str): Key from backtest_cache_key
+
+        Returns:
+            dict: The result in run_backtest's shape, or None
+        """
+        blob = db.session.execute(
+            db.select(BacktestCacheEntry.result_blob).where(BacktestCacheEntry.cache_key == cache_key)
+        ).scalar()
+        if blob is None:
+            return None
+        db.session.execute(
+            update(BacktestCacheEntry).where(BacktestCacheEntry.cache_key == cache_key)
+            .values(hits=BacktestCacheEntry.hits + 1, last_used_at=datetime.utcnow())
+        )
+        return decode_backtest_result(blob)
+
+    def put(self, cache_key, result):
+        """
+        Store a result under a key and prune unused entries (the caller commits)
+
+        Args:
+            cache_key (str): Key from backtest_cache_key
+            result (dict): Backtest result as returned by run_backtest
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.add(BacktestCacheEntry(cache_key=cache_key, result_blob=encode_backtest_result(result)))
+        except IntegrityError:
+            # Another worker stored the same backtest first
+            return
+        db.session.execute(
+            delete(BacktestCacheEntry).where(BacktestCacheEntry.last_used_at < datetime.utcnow() - self.ttl)
+        )
+        with self._lock:
+            self.stored += 1
+
+    def run(self, strategy, start_date_str, end_date_str, initial_capital=10000, progress_callback=None):
+        """
+        run_backtest, answered from the cache when the same backtest already ran on the same candles
+
+        Args:
+            strategy (TradingStrategy): Trading strategy to backtest
+            start_date_str (str): Start date in format 'YYYY-MM-DD'
+            end_date_str (str): End date in format 'YYYY-MM-DD'
+            initial_capital (float): Initial capital in USD
+            progress_callback (callable): Optional fn(fraction, stage) passed to run_backtest
+
+        Returns:
+            dict: Backtest results
+        """
+        try:
+            symbol = json.loads(strategy.parameters).get('symbol', DEFAULT_SYMBOL)
+        except Exception:
+            symbol = DEFAULT_SYMBOL
+        data_version = backtest_data_version(symbol, start_date_str, end_date_str)
+        cache_key = backtest_cache_key(strategy.parameters, start_date_str, end_date_str, initial_capital,
+                                       data_version)
+
+        result = self.get(cache_key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            if progress_callback is not None:
+                progress_callback(1.0, 'cached')
+            return result
+
+        with self._lock:
+            self.misses += 1
+        result = run_backtest(strategy, start_date_str, end_date_str, initial_capital,
+                              progress_callback=progress_callback)
+        # Only cache the result if the candles did not change while it ran
+        if backtest_data_version(symbol, start_date_str, end_date_str, sync=False) == data_version:
+            self.put(cache_key, result)
+        return result
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Shared cache used by the backtest route and job queue
+backtest_cache = BacktestCache()
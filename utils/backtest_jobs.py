@@ -0,0 +1,287 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from concurrent.futures import ThreadPoolExecutor
+from database import db
+from models import BacktestJob, BacktestResult, TradingStrategy
+from utils.backtest_cache import backtest_cache
+from utils.backtest_storage import encode_backtest_result
+
+# Worker pool and queue limits
+BACKTEST_JOB_WORKERS = int(os.environ.get('BACKTEST_JOB_WORKERS', 2))
+BACKTEST_JOB_MAX_PENDING = int(os.environ.get('BACKTEST_JOB_MAX_PENDING', 50))
+
+# A QUEUED/RUNNING job not updated for this long is assumed lost (e.g. the process restarted)
+BACKTEST_JOB_STALE_SECONDS = int(os.environ.get('BACKTEST_JOB_STALE_SECONDS', 900))
+
+ACTIVE_STATUSES = ('QUEUED', 'RUNNING')
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a backtest is submitted while the queue is at capacity."""
+
+
+def backtest_job_key(parameters, start_date_str, end_date_str, initial_capital):
+    """
+    Hash identifying a backtest by what it computes, used to deduplicate submissions
+
+    Args:
+        parameters (str): JSON string of strategy parameters
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        initial_capital (float): Initial capital in USD
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    try:
+        params = json.loads(parameters)
+    except Exception:
+        params = parameters
+    canonical = json.dumps([params, start_date_str, end_date_str, float(initial_capital)],
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def save_backtest_result(user_id, strategy_id, start_date_str, end_date_str, result):
+    """
+    Persist a finished backtest as a BacktestResult row (the caller commits)
+
+    Returns:
+        BacktestResult: The new, flushed row
+    """
+    backtest_result = BacktestResult(
+        user_id=user_id,
+        strategy_id=strategy_id,
+        start_date=datetime.strptime(start_date_str, '%Y-%m-%d'),
+        end_date=datetime.strptime(end_date_str, '%Y-%m-%d'),
+        profit_loss=result['profit_loss'],
+        win_rate=result['win_rate'],
+        total_trades=result['total_trades'],
+        max_drawdown_pct=result['metrics'].get('max_drawdown_pct'),
+        profit_factor=result['metrics'].get('profit_factor'),
+        result_blob=encode_backtest_result(result)
+    )
+    db.session.add(backtest_result)
+    db.session.flush()
+    return backtest_result
+
+
+class BacktestJobQueue:
+    """
+    Runs backtests in the background on a bounded thread pool.
+
+    Jobs are rows in the backtest_jobs table, so status and progress can be
+    polled from any process. Submitting a backtest that is already queued or
+    running for the same user, parameters, date range and capital returns the
+    existing job instead of starting another one. When a job completes its
+    BacktestResult row is written and linked to the job.
+    """
+
+    def __init__(self, max_workers=BACKTEST_JOB_WORKERS, max_pending=BACKTEST_JOB_MAX_PENDING):
+        """
+        Args:
+            max_workers (int): Number of backtests run concurrently
+            max_pending (int): Maximum number of queued or running jobs in this process
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.app = None
+        self._executor = None
+        self._pending = {}  # (user_id, job_key) -> job id, for jobs submitted by this process
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the queue to the Flask app whose context the workers run in, failing jobs lost by a restart."""
+        self.app = app
+        with app.app_context():
+            try:
+                self.fail_stale_jobs()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error failing stale backtest jobs: {str(e)}")
+
+    def fail_stale_jobs(self):
+        """
+        Mark QUEUED/RUNNING jobs that stopped reporting as FAILED
+
+        Jobs still pending in this process are left alone, however long they wait.
+
+        Returns:
+            int: Number of jobs marked FAILED
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            pending_ids = list(self._pending.values())
+        failed = db.session.execute(
+            update(BacktestJob)
+            .where(BacktestJob.status.in_(ACTIVE_STATUSES),
+                   BacktestJob.updated_at < now - timedelta(seconds=BACKTEST_JOB_STALE_SECONDS),
+                   BacktestJob.id.not_in(pending_ids))
+            .values(status='FAILED', error='Job stopped reporting progress (worker restarted or lost)',
+                    finished_at=now)
+            .execution_options(synchronize_session='fetch')
+        ).rowcount
+        db.session.commit()
+        if failed:
+            logger.warning(f"Marked {failed} stale backtest jobs as FAILED")
+        return failed
+
+    def submit(self, user_id, strategy, start_date_str, end_date_str, initial_capital=10000):
+        """
+        Queue a backtest, or return the active job computing the same thing
+
+        Args:
+            user_id (int): Owner of the job and of the resulting BacktestResult
+            strategy: The TradingStrategy model instance
+            start_date_str (str): Start date in format 'YYYY-MM-DD'
+            end_date_str (str): End date in format 'YYYY-MM-DD'
+            initial_capital (float): Initial capital in USD
+
+        Returns:
+            tuple: (BacktestJob, created) where created is False for a deduplicated submission
+
+        Raises:
+            ValueError: If a date is not in 'YYYY-MM-DD' format
+            JobQueueFullError: If too many jobs are already pending
+        """
+        datetime.strptime(start_date_str, '%Y-%m-%d')
+        datetime.strptime(end_date_str, '%Y-%m-%d')
+        job_key = backtest_job_key(strategy.parameters, start_date_str, end_date_str, initial_capital)
+
+        with self._lock:
+            job = self._find_active(user_id, job_key)
+            if job is not None:
+                return job, False
+            if len(self._pending) >= self.max_pending:
+                raise JobQueueFullError(f"Backtest queue is full ({self.max_pending} pending jobs)")
+
+            job = BacktestJob(
+                user_id=user_id,
+                strategy_id=strategy.id,
+                job_key=job_key,
+                start_date=start_date_str,
+                end_date=end_date_str,
+                initial_capital=float(initial_capital),
+                status='QUEUED'
+            )
+            db.session.add(job)
+            db.session.commit()
+            self._pending[(user_id, job_key)] = job.id
+
+        self._get_executor().submit(self._run, job.id)
+        logger.info(f"Queued backtest job {job.id} for strategy {strategy.id}")
+        return job, True
+
+    def _find_active(self, user_id, job_key):
+        """Return a live QUEUED/RUNNING job for the key, ignoring jobs that stopped reporting."""
+        stale_before = datetime.utcnow() - timedelta(seconds=BACKTEST_JOB_STALE_SECONDS)
+        return BacktestJob.query.filter(
+            BacktestJob.user_id == user_id,
+            BacktestJob.job_key == job_key,
+            BacktestJob.status.in_(ACTIVE_STATUSES),
+            BacktestJob.updated_at >= stale_before
+        ).order_by(BacktestJob.id.desc()).first()
+
+    def _get_executor(self):
+        # Created lazily so importing the module does not start threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='backtest-job')
+            return self._executor
+
+    def _run(self, job_id):
+        """Worker: run one job inside an app context, recording progress and the result."""
+        with self.app.app_context():
+            job = db.session.get(BacktestJob, job_id)
+            pending_key = (job.user_id, job.job_key)
+            if job.status != 'QUEUED':
+                # Marked FAILED as stale by another process while it waited; do not resurrect it
+                with self._lock:
+                    if self._pending.get(pending_key) == job_id:
+                        del self._pending[pending_key]
+                db.session.remove()
+                return
+            try:
+                job.status = 'RUNNING'
+                job.started_at = datetime.utcnow()
+                db.session.commit()
+
+                def on_progress(fraction, stage):
+                    job.progress = fraction
+                    job.stage = stage
+                    db.session.commit()
+
+                strategy = db.session.get(TradingStrategy, job.strategy_id)
+                if strategy is None:
+                    raise ValueError("Strategy not found")
+                result = backtest_cache.run(strategy, job.start_date, job.end_date, job.initial_capital,
+                                            progress_callback=on_progress)
+
+                backtest_result = save_backtest_result(job.user_id, job.strategy_id, job.start_date,
+                                                       job.end_date, result)
+                job.backtest_result_id = backtest_result.id
+                job.status = 'COMPLETED'
+                job.progress = 1.0
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(f"Backtest job {job_id} completed")
+            except Exception as e:
+                logger.error(f"Backtest job {job_id} failed: {str(e)}")
+                db.session.rollback()
+                job = db.session.get(BacktestJob, job_id)
+                job.status = 'FAILED'
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            finally:
+                with self._lock:
+                    if self._pending.get(pending_key) == job_id:
+                        del self._pending[pending_key]
+                db.session.remove()
+
+    def get(self, job_id, user_id):
+        """Return a user's job by id, or None."""
+        return BacktestJob.query.filter_by(id=job_id, user_id=user_id).first()
+
+    def job_status(self, job, include_result=True):
+        """
+        Serialise a job for the API, with the backtest result once it has completed
+
+        Args:
+            job (BacktestJob): The job
+            include_result (bool): Include the full result of a completed job
+
+        Returns:
+            dict: Job fields plus 'result' for completed jobs
+        """
+        if job.status in ACTIVE_STATUSES and job.updated_at is not None and \
+                job.updated_at < datetime.utcnow() - timedelta(seconds=BACKTEST_JOB_STALE_SECONDS):
+            self.fail_stale_jobs()
+            db.session.refresh(job)
+        status = job.to_dict()
+        if include_result and job.status == 'COMPLETED' and job.backtest_result is not None:
+            status['result'] = job.backtest_result.result
+        return status
+
+    def stats(self):
+        """Return queue counters for monitoring."""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'pending': len(self._pending),
+                'max_pending': self.max_pending
+            }
+
+
+# Shared queue used by the API routes
+backtest_jobs = BacktestJobQueue()
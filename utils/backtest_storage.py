@@ -0,0 +1,135 @@
+import json
+import zlib
+import struct
+import logging
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Blob layout: magic, format version, codec id, then the compressed payload
+BLOB_MAGIC = b'NTXB'
+BLOB_VERSION = 1
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+_HEADER = struct.Struct('<4sBB')
+
+# Trade fields stored as columns, with their dtypes
+TRADE_COLUMNS = (
+    ('entry_date', '<i8'),  # ns since the epoch
+    ('exit_date', '<i8'),
+    ('entry_price', '<f8'),
+    ('exit_price', '<f8'),
+    ('position_size', '<f8'),
+    ('profit_loss', '<f8'),
+    ('profit_loss_pct', '<f8'),
+    ('direction', '<i1')  # 1 long, -1 short
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _timestamps_ns(values):
+    return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def encode_backtest_result(result, level=6):
+    """
+    Serialise a run_backtest result as a compressed columnar blob
+
+    The trade list and equity curve become typed arrays (dates as int64
+    timestamps, values as float64); everything else (metrics and summary
+    fields) is kept as a small JSON header. The payload is compressed with
+    zstd when the zstandard package is installed, else zlib.
+
+    Args:
+        result (dict): Backtest result as returned by run_backtest
+        level (int): Compression level
+
+    Returns:
+        bytes: The blob
+    """
+    trades = result.get('trades') or []
+    equity_curve = result.get('equity_curve') or {}
+
+    columns = {}
+    for name, dtype in TRADE_COLUMNS:
+        if name in ('entry_date', 'exit_date'):
+            columns[name] = _timestamps_ns([trade[name] for trade in trades]) if trades else np.array([], dtype)
+        elif name == 'direction':
+            columns[name] = np.array([1 if trade['direction'] == 'long' else -1 for trade in trades], dtype=dtype)
+        else:
+            columns[name] = np.array([trade[name] for trade in trades], dtype=dtype)
+    columns['equity_date'] = (pd.to_datetime(list(equity_curve)).to_numpy(dtype='datetime64[D]').astype('<i4')
+                              if equity_curve else np.array([], '<i4'))
+    columns['equity_value'] = np.fromiter(equity_curve.values(), dtype='<f8', count=len(equity_curve))
+
+    meta = {key: value for key, value in result.items() if key not in ('trades', 'equity_curve')}
+    meta['columns'] = [(name, array.dtype.str, len(array)) for name, array in columns.items()]
+    meta_bytes = json.dumps(meta, default=float).encode('utf-8')
+    payload = b''.join([struct.pack('<I', len(meta_bytes)), meta_bytes]
+                       + [np.ascontiguousarray(array).tobytes() for array in columns.values()])
+
+    if zstandard is not None:
+        codec, body = CODEC_ZSTD, zstandard.ZstdCompressor(level=level).compress(payload)
+    else:
+        codec, body = CODEC_ZLIB, zlib.compress(payload, level)
+    return _HEADER.pack(BLOB_MAGIC, BLOB_VERSION, codec) + body
+
+
+def decode_backtest_result(blob):
+    """
+    Decode a blob written by encode_backtest_result
+
+    Args:
+        blob (bytes): The blob
+
+    Returns:
+        dict: The result in run_backtest's shape, with dates as strings
+
+    Raises:
+        ValueError: If the blob is not a backtest result or needs zstandard
+    """
+    magic, version, codec = _HEADER.unpack_from(blob)
+    if magic != BLOB_MAGIC or version != BLOB_VERSION:
+        raise ValueError("Not a backtest result blob")
+    body = memoryview(blob)[_HEADER.size:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Backtest result is zstd-compressed but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(body)
+    else:
+        payload = zlib.decompress(body)
+
+    (meta_length,) = struct.unpack_from('<I', payload)
+    meta = json.loads(payload[4:4 + meta_length])
+    offset = 4 + meta_length
+    columns = {}
+    for name, dtype, length in meta.pop('columns'):
+        array = np.frombuffer(payload, dtype=dtype, count=length, offset=offset)
+        offset += array.nbytes
+        columns[name] = array
+
+    # Same text as str(pd.Timestamp), which the JSON results used
+    entry_dates = pd.to_datetime(columns['entry_date'], unit='ns').strftime('%Y-%m-%d %H:%M:%S').tolist()
+    exit_dates = pd.to_datetime(columns['exit_date'], unit='ns').strftime('%Y-%m-%d %H:%M:%S').tolist()
+    trades = [
+        {
+            'entry_date': entry_dates[i],
+            'entry_price': float(columns['entry_price'][i]),
+            'position_size': float(columns['position_size'][i]),
+            'direction': 'long' if columns['direction'][i] > 0 else 'short',
+            'exit_date': exit_dates[i],
+            'exit_price': float(columns['exit_price'][i]),
+            'profit_loss': float(columns['profit_loss'][i]),
+            'profit_loss_pct': float(columns['profit_loss_pct'][i])
+        }
+        for i in range(len(columns['entry_price']))
+    ]
+    equity_dates = columns['equity_date'].astype('datetime64[D]').astype(str)
+    equity_curve = dict(zip(equity_dates.tolist(), columns['equity_value'].tolist()))
+    return dict(meta, trades=trades, equity_curve=equity_curve)
@@ -1,16 +1,30 @@
 import pandas as pd
 import numpy as np
+import os
 import json
+import time
 import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from utils.technical_indicators import get_technical_indicators
-from utils.binance_api import get_bitcoin_data
+from utils.candle_store import get_candles
+from utils.binance_api import DEFAULT_SYMBOL
+from utils.rule_expressions import rule_set_for
+
+# Parameter sweep limits
+MAX_SWEEP_COMBINATIONS = int(os.environ.get('MAX_SWEEP_COMBINATIONS', 20000))
+SWEEP_INLINE_THRESHOLD = 64  # below this many combinations a process pool costs more than it saves
+
+# Candle interval backtests are simulated on
+BACKTEST_INTERVAL = '1d'
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def run_backtest(strategy, start_date_str, end_date_str, initial_capital=10000):
+def run_backtest(strategy, start_date_str, end_date_str, initial_capital=10000, progress_callback=None):
     """
     Run a backtest for a trading strategy
     
@@ -19,56 +33,39 @@ def run_backtest(strategy, start_date_str, end_date_str, initial_capital=10000):
         start_date_str (str): Start date in format 'YYYY-MM-DD'
         end_date_str (str): End date in format 'YYYY-MM-DD'
         initial_capital (float): Initial capital in USD
+        progress_callback (callable): Optional, called as progress_callback(fraction, stage)
+            as the backtest moves through its stages
         
     Returns:
         dict: Dictionary containing backtest results
     """
+    def report(fraction, stage):
+        if progress_callback is not None:
+            progress_callback(fraction, stage)
+    
     try:
-        # Parse dates
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-        
-        # Calculate the duration in days
-        days_diff = (end_date - start_date).days
-        
-        # Ensure we have enough historical data
-        # Get data in 1-day intervals
-        data = get_bitcoin_data('1d', min(1000, days_diff + 30))
-        
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-        
-        # Filter data for the backtest period
-        mask = (df.index >= start_date) & (df.index <= end_date)
-        backtest_data = df.loc[mask].copy()
-        
-        if backtest_data.empty:
-            raise ValueError("No data available for the specified date range")
-        
-        # Calculate technical indicators
-        indicators = get_technical_indicators(backtest_data.reset_index().to_dict('records'))
-        
-        # Add indicators to the DataFrame
-        for indicator_name, indicator_values in indicators.items():
-            backtest_data[indicator_name] = indicator_values[-len(backtest_data):]
-        
         # Parse strategy parameters
         try:
             params = json.loads(strategy.parameters)
         except:
             params = {}
-            
+        
+        report(0.0, 'loading_data')
+        backtest_data = load_backtest_data(params, start_date_str, end_date_str)
+        
         # Run the strategy
+        report(0.6, 'running_strategy')
         trades, equity_curve = apply_strategy(backtest_data, params, initial_capital)
         
         # Calculate performance metrics
+        report(0.9, 'calculating_metrics')
         metrics = calculate_performance_metrics(trades, equity_curve, initial_capital)
         
+        report(1.0, 'done')
         return {
             'trades': [t.to_dict() for t in trades],
-            'equity_curve': equity_curve.to_dict(),
+            # Date-string keys keep the result JSON-serialisable
+            'equity_curve': dict(zip(equity_curve.index.strftime('%Y-%m-%d'), equity_curve.tolist())),
             'metrics': metrics,
             'profit_loss': metrics['total_return_pct'],
             'win_rate': metrics['win_rate'],
@@ -79,172 +76,241 @@ def run_backtest(strategy, start_date_str, end_date_str, initial_capital=10000):
         logger.error(f"Error in run_backtest: {str(e)}")
         raise
 
-def apply_strategy(data, params, initial_capital):
+def backtest_range_ms(start_date_str, end_date_str):
     """
-    Apply a trading strategy to historical data
+    Open-time bounds in milliseconds of the candles a backtest period covers
+    
+    Args:
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        
+    Returns:
+        tuple: (start_ms, end_ms)
+    """
+    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+    end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+    return int(pd.Timestamp(start_date).timestamp() * 1000), int(pd.Timestamp(end_date).timestamp() * 1000)
+
+def load_backtest_data(params, start_date_str, end_date_str, sma_windows=()):
+    """
+    Load daily candles for a backtest period and add the indicator columns
+    
+    Args:
+        params (dict): Strategy parameters (uses 'symbol', 'fast_ma_window' and 'slow_ma_window')
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        sma_windows (iterable): Extra SMA windows to add as 'sma_<window>' columns
+        
+    Returns:
+        DataFrame: Candles indexed by date with one column per indicator
+    """
+    # Read the backtest period in 1-day intervals from the local candle store
+    start_ms, end_ms = backtest_range_ms(start_date_str, end_date_str)
+    data = get_candles(params.get('symbol', DEFAULT_SYMBOL), BACKTEST_INTERVAL, start_ms, end_ms)
+    
+    if data.empty:
+        raise ValueError("No data available for the specified date range")
+    
+    # Index a copy of the columnar candles by date
+    backtest_data = data.copy()
+    backtest_data['timestamp'] = pd.to_datetime(backtest_data['timestamp'], unit='ms')
+    backtest_data.set_index('timestamp', inplace=True)
+    
+    # Calculate technical indicators
+    indicators = get_technical_indicators(data)
+    
+    # Add indicators to the DataFrame, aligned on the most recent candles
+    # (RSI has one value fewer than there are candles)
+    for indicator_name, indicator_values in indicators.items():
+        values = indicator_values[-len(backtest_data):]
+        backtest_data[indicator_name] = pd.Series(values, index=backtest_data.index[len(backtest_data) - len(values):])
+    
+    # Moving averages for custom crossover windows
+    windows = set(sma_windows) | {params.get('fast_ma_window', 20), params.get('slow_ma_window', 50)}
+    for window in windows:
+        if f'sma_{window}' not in backtest_data:
+            backtest_data[f'sma_{window}'] = backtest_data['close'].rolling(window=int(window)).mean().fillna(0)
+    
+    return backtest_data
+
+class Trade:
+    """A single simulated trade"""
+    
+    def __init__(self, entry_date, entry_price, position_size, direction):
+        self.entry_date = entry_date
+        self.entry_price = entry_price
+        self.position_size = position_size
+        self.direction = direction  # 'long' or 'short'
+        self.exit_date = None
+        self.exit_price = None
+        self.profit_loss = None
+        self.profit_loss_pct = None
+        
+    def close(self, exit_date, exit_price):
+        self.exit_date = exit_date
+        self.exit_price = exit_price
+        
+        if self.direction == 'long':
+            self.profit_loss = (exit_price - self.entry_price) * self.position_size
+            self.profit_loss_pct = (exit_price / self.entry_price - 1) * 100
+        else:  # short
+            self.profit_loss = (self.entry_price - exit_price) * self.position_size
+            self.profit_loss_pct = (self.entry_price / exit_price - 1) * 100
+            
+    def to_dict(self):
+        return {
+            'entry_date': self.entry_date,
+            'entry_price': self.entry_price,
+            'position_size': self.position_size,
+            'direction': self.direction,
+            'exit_date': self.exit_date,
+            'exit_price': self.exit_price,
+            'profit_loss': self.profit_loss,
+            'profit_loss_pct': self.profit_loss_pct
+        }
+
+def strategy_signals(data, params):
+    """
+    Derive entry and exit masks for a strategy from its indicator columns
     
     Args:
         data (DataFrame): Historical price data with indicators
         params (dict): Strategy parameters
-        initial_capital (float): Initial capital
         
     Returns:
-        tuple: (trades, equity_curve)
+        tuple: (entry, exit) boolean NumPy arrays, one value per row
     """
-    # Initialize variables
-    in_position = False
-    entry_price = 0
-    trades = []
-    equity = initial_capital
-    equity_curve = pd.Series(index=data.index)
-    
-    # Default strategy parameters
     strategy_type = params.get('strategy_type', 'ma_crossover')
-    risk_per_trade = params.get('risk_per_trade', 0.02)  # 2% risk per trade
+    no_signal = np.zeros(len(data), dtype=bool)
     
-    # Create a Trade class to store trade information
-    class Trade:
-        def __init__(self, entry_date, entry_price, position_size, direction):
-            self.entry_date = entry_date
-            self.entry_price = entry_price
-            self.position_size = position_size
-            self.direction = direction  # 'long' or 'short'
-            self.exit_date = None
-            self.exit_price = None
-            self.profit_loss = None
-            self.profit_loss_pct = None
-            
-        def close(self, exit_date, exit_price):
-            self.exit_date = exit_date
-            self.exit_price = exit_price
-            
-            if self.direction == 'long':
-                self.profit_loss = (exit_price - self.entry_price) * self.position_size
-                self.profit_loss_pct = (exit_price / self.entry_price - 1) * 100
-            else:  # short
-                self.profit_loss = (self.entry_price - exit_price) * self.position_size
-                self.profit_loss_pct = (self.entry_price / exit_price - 1) * 100
-                
-        def to_dict(self):
-            return {
-                'entry_date': self.entry_date,
-                'entry_price': self.entry_price,
-                'position_size': self.position_size,
-                'direction': self.direction,
-                'exit_date': self.exit_date,
-                'exit_price': self.exit_price,
-                'profit_loss': self.profit_loss,
-                'profit_loss_pct': self.profit_loss_pct
-            }
-    
-    # Apply the strategy based on strategy_type
-    for date, row in data.iterrows():
-        # Calculate equity for equity curve
-        equity_curve[date] = equity
+    def column(name):
+        return data[name].to_numpy(dtype=np.float64)
+    
+    if strategy_type == 'ma_crossover':
+        # Moving Average Crossover Strategy: fast MA above/below slow MA
+        fast_ma = column(f"sma_{params.get('fast_ma_window', 20)}")
+        slow_ma = column(f"sma_{params.get('slow_ma_window', 50)}")
+        # Skip dates where we don't have both MAs
+        valid = (fast_ma != 0) & (slow_ma != 0)
+        return valid & (fast_ma > slow_ma), valid & (fast_ma < slow_ma)
         
-        # Apply the strategy based on strategy_type
-        if strategy_type == 'ma_crossover':
-            # Moving Average Crossover Strategy
-            fast_ma = 'sma_20'
-            slow_ma = 'sma_50'
-            
-            # Skip dates where we don't have both MAs
-            if row[fast_ma] == 0 or row[slow_ma] == 0:
-                continue
-                
-            # Check for buy signal: fast MA crosses above slow MA
-            if not in_position and row[fast_ma] > row[slow_ma]:
-                # Calculate position size based on risk
-                price = float(row['close'])
-                position_size = (equity * risk_per_trade) / price
-                
-                # Enter long position
-                entry_price = price
-                trade = Trade(date, entry_price, position_size, 'long')
-                in_position = True
-                
-            # Check for sell signal: fast MA crosses below slow MA
-            elif in_position and row[fast_ma] < row[slow_ma]:
-                # Exit position
-                exit_price = float(row['close'])
-                trade.close(date, exit_price)
-                trades.append(trade)
-                
-                # Update equity
-                equity += trade.profit_loss
-                in_position = False
-                
-        elif strategy_type == 'rsi':
-            # RSI Strategy
-            rsi_overbought = params.get('rsi_overbought', 70)
-            rsi_oversold = params.get('rsi_oversold', 30)
-            
-            # Skip dates where RSI is not available
-            if 'rsi' not in row:
-                continue
-                
-            # Buy signal: RSI crosses below oversold threshold
-            if not in_position and row['rsi'] < rsi_oversold:
-                # Calculate position size based on risk
-                price = float(row['close'])
-                position_size = (equity * risk_per_trade) / price
-                
-                # Enter long position
-                entry_price = price
-                trade = Trade(date, entry_price, position_size, 'long')
-                in_position = True
-                
-            # Sell signal: RSI crosses above overbought threshold
-            elif in_position and row['rsi'] > rsi_overbought:
-                # Exit position
-                exit_price = float(row['close'])
-                trade.close(date, exit_price)
-                trades.append(trade)
-                
-                # Update equity
-                equity += trade.profit_loss
-                in_position = False
-                
-        elif strategy_type == 'macd':
-            # MACD Strategy
-            
-            # Skip dates where MACD is not available
-            if 'macd' not in row or 'macd_signal' not in row:
-                continue
-                
-            # Buy signal: MACD crosses above signal line
-            if not in_position and row['macd'] > row['macd_signal'] and row['macd'] > 0:
-                # Calculate position size based on risk
-                price = float(row['close'])
-                position_size = (equity * risk_per_trade) / price
-                
-                # Enter long position
-                entry_price = price
-                trade = Trade(date, entry_price, position_size, 'long')
+    elif strategy_type == 'rsi':
+        # RSI Strategy: buy below oversold, sell above overbought
+        if 'rsi' not in data:
+            return no_signal, no_signal
+        rsi_overbought = params.get('rsi_overbought', 70)
+        rsi_oversold = params.get('rsi_oversold', 30)
+        rsi = column('rsi')
+        return rsi < rsi_oversold, rsi > rsi_overbought
+        
+    elif strategy_type == 'macd':
+        # MACD Strategy: MACD crosses the signal line on the same side of zero
+        if 'macd' not in data or 'macd_signal' not in data:
+            return no_signal, no_signal
+        macd = column('macd')
+        macd_signal = column('macd_signal')
+        return (macd > macd_signal) & (macd > 0), (macd < macd_signal) & (macd < 0)
+        
+    elif strategy_type == 'rules':
+        # Rule-combination strategy: the live signal rules, evaluated over every row at once
+        rule_set = rule_set_for(params.get('signal_combination_rules', []))
+        values = {name: column(name) for name in rule_set.names if name in data}
+        signal_type, _ = rule_set.combine_many(values, len(data))
+        return signal_type == 'BUY', signal_type == 'SELL'
+        
+    return no_signal, no_signal
+
+def position_transitions(entry, exit):
+    """
+    Find entry and exit row indices of a long-only, one-position-at-a-time strategy
+    
+    While flat, a row with an entry signal opens a position; while in a position,
+    a row with an exit signal closes it. A position still open at the end is
+    closed on the last row.
+    
+    Args:
+        entry (ndarray): Boolean entry mask
+        exit (ndarray): Boolean exit mask
+        
+    Returns:
+        tuple: (entry_indices, exit_indices) integer arrays of equal length
+    """
+    n = len(entry)
+    if n == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    
+    if not np.any(entry & exit):
+        # Disjoint signals: the position after each row is the last signal seen (forward fill)
+        events = np.where(entry, 1, np.where(exit, 0, -1))
+        last_event = np.maximum.accumulate(np.where(events >= 0, np.arange(n), -1))
+        in_position = np.where(last_event >= 0, events[np.maximum(last_event, 0)], 0).astype(bool)
+        was_in_position = np.concatenate(([False], in_position[:-1]))
+        entries = np.flatnonzero(in_position & ~was_in_position)
+        exits = np.flatnonzero(~in_position & was_in_position)
+    else:
+        # Rows with both signals flip the position, so walk the signal rows only
+        entries, exits = [], []
+        in_position = False
+        for i in np.flatnonzero(entry | exit):
+            if not in_position and entry[i]:
+                entries.append(i)
                 in_position = True
-                
-            # Sell signal: MACD crosses below signal line
-            elif in_position and row['macd'] < row['macd_signal'] and row['macd'] < 0:
-                # Exit position
-                exit_price = float(row['close'])
-                trade.close(date, exit_price)
-                trades.append(trade)
-                
-                # Update equity
-                equity += trade.profit_loss
+            elif in_position and exit[i]:
+                exits.append(i)
                 in_position = False
+        entries = np.array(entries, dtype=np.int64)
+        exits = np.array(exits, dtype=np.int64)
     
     # Close any open position at the end of the backtest period
-    if in_position:
-        last_date = data.index[-1]
-        last_price = float(data.iloc[-1]['close'])
-        trade.close(last_date, last_price)
-        trades.append(trade)
-        equity += trade.profit_loss
+    if len(exits) < len(entries):
+        exits = np.append(exits, n - 1)
+    return entries, exits
+
+def apply_strategy(data, params, initial_capital):
+    """
+    Apply a trading strategy to historical data
+    
+    Entries and exits are derived from whole indicator arrays, the equity
+    after each trade from a cumulative product of per-trade returns, and the
+    equity curve by mapping each row to the number of trades closed before it.
+    
+    Args:
+        data (DataFrame): Historical price data with indicators
+        params (dict): Strategy parameters
+        initial_capital (float): Initial capital
         
+    Returns:
+        tuple: (trades, equity_curve)
+    """
+    risk_per_trade = params.get('risk_per_trade', 0.02)  # 2% risk per trade
+    
+    entry, exit = strategy_signals(data, params)
+    entries, exits = position_transitions(entry, exit)
+    
+    close = data['close'].to_numpy(dtype=np.float64)
+    entry_prices = close[entries]
+    exit_prices = close[exits]
+    
+    # Each trade risks a fixed fraction of the equity available when it opens
+    trade_growth = 1 + risk_per_trade * (exit_prices - entry_prices) / entry_prices
+    equity_before = initial_capital * np.concatenate(([1.0], np.cumprod(trade_growth)[:-1])) if len(entries) else np.array([])
+    position_sizes = (equity_before * risk_per_trade) / entry_prices
+    
+    trades = []
+    for i in range(len(entries)):
+        trade = Trade(data.index[entries[i]], float(entry_prices[i]), float(position_sizes[i]), 'long')
+        trade.close(data.index[exits[i]], float(exit_prices[i]))
+        trades.append(trade)
+    
+    # Equity at the start of each row reflects the trades closed on earlier rows
+    profit_loss = (exit_prices - entry_prices) * position_sizes
+    equity_after = initial_capital + np.concatenate(([0.0], np.cumsum(profit_loss)))
+    closed_before = np.searchsorted(exits, np.arange(len(data)), side='left')
+    equity_curve = pd.Series(equity_after[closed_before], index=data.index, dtype=np.float64)
+    
     # Update the last equity value
     if not data.empty:
-        equity_curve[data.index[-1]] = equity
+        equity_curve.iloc[-1] = equity_after[-1]
         
     return trades, equity_curve
 
@@ -320,3 +386,105 @@ def calculate_performance_metrics(trades, equity_curve, initial_capital):
         'max_drawdown': max_drawdown,
         'max_drawdown_pct': max_drawdown_pct
     }
+
+# Backtest data shared with sweep worker processes (set once per worker by the pool initializer;
+# only ever set inside pool workers, so concurrent sweeps in the app process cannot clobber each other)
+_sweep_data = None
+_sweep_capital = None
+
+# Start method for sweep workers: a forked copy of a multi-threaded web worker can inherit held locks
+SWEEP_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+def _init_sweep_worker(data, initial_capital):
+    global _sweep_data, _sweep_capital
+    _sweep_data = data
+    _sweep_capital = initial_capital
+
+def _backtest_combination(data, params, initial_capital):
+    """Backtest one parameter combination and return its performance metrics."""
+    trades, equity_curve = apply_strategy(data, params, initial_capital)
+    return calculate_performance_metrics(trades, equity_curve, initial_capital)
+
+def _run_sweep_combination(params):
+    """Backtest one parameter combination against the worker's shared data."""
+    return _backtest_combination(_sweep_data, params, _sweep_capital)
+
+def expand_param_grid(base_params, param_grid):
+    """
+    Expand a parameter grid into one parameter dict per combination
+    
+    Args:
+        base_params (dict): Parameters shared by every combination
+        param_grid (dict): Parameter name to list of candidate values
+        
+    Returns:
+        list: Parameter dicts, base parameters overridden by each combination
+    """
+    names = list(param_grid)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in param_grid.values()]
+    return [dict(base_params, **dict(zip(names, combo))) for combo in itertools.product(*values)]
+
+def run_parameter_sweep(strategy, param_grid, start_date_str, end_date_str, initial_capital=10000,
+                        sort_by='total_return_pct', top=None, max_workers=None):
+    """
+    Backtest every combination of a parameter grid for a trading strategy
+    
+    Price history and indicators are loaded once; the combinations are then
+    fanned out over a process pool that receives the data once per worker.
+    
+    Args:
+        strategy: The TradingStrategy model instance
+        param_grid (dict): Parameter name to list of values, e.g.
+            {'rsi_oversold': [20, 25, 30], 'rsi_overbought': [70, 75, 80]}
+        start_date_str (str): Start date in format 'YYYY-MM-DD'
+        end_date_str (str): End date in format 'YYYY-MM-DD'
+        initial_capital (float): Initial capital in USD
+        sort_by (str): Metric used to rank the combinations (highest first)
+        top (int): Optional number of best combinations to return
+        max_workers (int): Optional number of worker processes (defaults to the CPU count)
+        
+    Returns:
+        dict: Ranked results with the parameters and metrics of each combination
+    """
+    try:
+        started = time.perf_counter()
+        try:
+            base_params = json.loads(strategy.parameters)
+        except:
+            base_params = {}
+        
+        combinations = expand_param_grid(base_params, param_grid)
+        if len(combinations) > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(f"Parameter grid has {len(combinations)} combinations (max {MAX_SWEEP_COMBINATIONS})")
+        
+        # Load prices once, with every moving-average window the grid needs
+        sma_windows = {p.get('fast_ma_window', 20) for p in combinations} | {p.get('slow_ma_window', 50) for p in combinations}
+        data = load_backtest_data(base_params, start_date_str, end_date_str, sma_windows)
+        
+        if len(combinations) < SWEEP_INLINE_THRESHOLD:
+            metrics = [_backtest_combination(data, p, initial_capital) for p in combinations]
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            chunksize = max(1, len(combinations) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(SWEEP_START_METHOD),
+                                     initializer=_init_sweep_worker, initargs=(data, initial_capital)) as executor:
+                metrics = list(executor.map(_run_sweep_combination, combinations, chunksize=chunksize))
+        
+        results = [
+            {'params': {k: p[k] for k in param_grid}, 'metrics': m}
+            for p, m in zip(combinations, metrics)
+        ]
+        results.sort(key=lambda r: r['metrics'].get(sort_by, 0), reverse=True)
+        if top:
+            results = results[:top]
+        
+        return {
+            'combinations': len(combinations),
+            'sort_by': sort_by,
+            'elapsed_seconds': time.perf_counter() - started,
+            'results': results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in run_parameter_sweep: {str(e)}")
+        raise
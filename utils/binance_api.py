@@ -1,8 +1,14 @@
 import os
+import re
 import time
 import logging
-import requests
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from utils.kline_cache import kline_cache
+from utils.market_data_client import market_data_client, binance_weight_limiter
+from utils.kline_ring import ring_reader
 
 # Default API endpoints
 BASE_URL = "https://api.binance.com"
@@ -13,12 +19,216 @@ ACCOUNT_ENDPOINT = "/api/v3/account"
 # CoinGecko API for backup
 COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
 COINGECKO_PRICE_ENDPOINT = "/simple/price"
-COINGECKO_MARKET_CHART_ENDPOINT = "/coins/bitcoin/market_chart"
+COINGECKO_MARKET_CHART_ENDPOINT = "/coins/{coin_id}/market_chart"
+
+# Default trading pair
+DEFAULT_SYMBOL = "BTCUSDT"
+
+# Shape of a Binance trading pair, e.g. 'BTCUSDT' (upper-case letters and digits)
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9]{2,20}$')
+
+# Quote assets stripped from a Binance symbol to find its base asset
+QUOTE_ASSETS = ("USDT", "USDC", "FDUSD", "BUSD", "TUSD", "USD")
+
+# CoinGecko coin ids for the base assets we can fall back on
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'BNB': 'binancecoin',
+    'SOL': 'solana',
+    'XRP': 'ripple',
+    'ADA': 'cardano',
+    'DOGE': 'dogecoin',
+    'TRX': 'tron',
+    'DOT': 'polkadot',
+    'MATIC': 'matic-network',
+    'LTC': 'litecoin',
+    'AVAX': 'avalanche-2',
+    'LINK': 'chainlink',
+    'ATOM': 'cosmos',
+    'XLM': 'stellar',
+    'BCH': 'bitcoin-cash',
+    'ETC': 'ethereum-classic',
+    'NEAR': 'near',
+    'UNI': 'uniswap',
+    'FIL': 'filecoin'
+}
+
+# Concurrent requests used by the batch klines API
+BATCH_MAX_WORKERS = int(os.environ.get('MARKET_DATA_BATCH_WORKERS', 8))
+
+# Kline interval lengths in milliseconds ('1M' approximated as 30 days)
+INTERVAL_MS = {
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '2h': 2 * 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '6h': 6 * 60 * 60 * 1000,
+    '8h': 8 * 60 * 60 * 1000,
+    '12h': 12 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+    '3d': 3 * 24 * 60 * 60 * 1000,
+    '1w': 7 * 24 * 60 * 60 * 1000,
+    '1M': 30 * 24 * 60 * 60 * 1000
+}
+
+# Kline fields in the order returned by the klines endpoint
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+    'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume'
+]
+KLINE_INT_COLUMNS = {'timestamp', 'close_time', 'number_of_trades'}
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+def interval_to_ms(interval):
+    """
+    Convert a Binance kline interval to its length in milliseconds
+    
+    Args:
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        
+    Returns:
+        int: Interval length in milliseconds
+    """
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return INTERVAL_MS[interval]
+
+def is_valid_symbol(symbol):
+    """Return True if `symbol` has the shape of a Binance trading pair."""
+    return isinstance(symbol, str) and SYMBOL_PATTERN.match(symbol) is not None
+
+def coingecko_id(symbol):
+    """
+    Map a Binance symbol (e.g. 'ETHUSDT') to its CoinGecko coin id
+    
+    Args:
+        symbol (str): Trading pair
+        
+    Returns:
+        str: CoinGecko coin id
+    """
+    base = symbol.upper()
+    for quote in QUOTE_ASSETS:
+        if base.endswith(quote) and len(base) > len(quote):
+            base = base[:-len(quote)]
+            break
+    if base not in COINGECKO_IDS:
+        raise ValueError(f"No CoinGecko fallback available for {symbol}")
+    return COINGECKO_IDS[base]
+
+def klines_weight(limit):
+    """
+    Request weight Binance charges for a klines call
+    
+    Args:
+        limit (int): Number of candles requested
+        
+    Returns:
+        int: Request weight
+    """
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit < 1000:
+        return 5
+    return 10
+
+def _binance_get(url, params, weight=1):
+    """Call Binance within the shared request-weight budget."""
+    binance_weight_limiter.acquire(weight)
+    response = market_data_client.get('binance', url, params=params)
+    used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used_weight:
+        binance_weight_limiter.observe_used(used_weight)
+    return response
+
+def parse_klines(klines):
+    """
+    Parse raw Binance klines straight into a typed columnar DataFrame
+    
+    The kline arrays are converted in one NumPy pass (no per-candle dicts or
+    datetime objects). Prices and volumes are float64, times are int64 ms.
+    
+    Args:
+        klines (list): Raw kline arrays as returned by the klines endpoint
+        
+    Returns:
+        pd.DataFrame: OHLCV data with one column per kline field
+    """
+    if not klines:
+        return empty_klines_frame()
+    raw = np.array(klines, dtype=object)[:, :len(KLINE_COLUMNS)]
+    return pd.DataFrame({
+        name: raw[:, i].astype(np.int64 if name in KLINE_INT_COLUMNS else np.float64)
+        for i, name in enumerate(KLINE_COLUMNS)
+    })
+
+def empty_klines_frame():
+    """Return an empty OHLCV DataFrame with the kline column dtypes."""
+    return pd.DataFrame({
+        name: np.array([], dtype=np.int64 if name in KLINE_INT_COLUMNS else np.float64)
+        for name in KLINE_COLUMNS
+    })
+
+def klines_to_records(df):
+    """
+    Convert columnar OHLCV data to the list-of-dicts format used in JSON responses
+    
+    Args:
+        df (pd.DataFrame): OHLCV data as returned by parse_klines
+        
+    Returns:
+        list: List of OHLCV data
+    """
+    records = df[KLINE_COLUMNS].copy()
+    local_tz = datetime.now().astimezone().tzinfo
+    records.insert(1, 'datetime', pd.to_datetime(records['timestamp'], unit='ms', utc=True)
+                   .dt.tz_convert(local_tz).dt.strftime('%Y-%m-%d %H:%M:%S'))
+    return records.to_dict('records')
+
+def get_klines(symbol, interval, limit=1000, start_time=None, end_time=None):
+    """
+    Get raw klines from Binance for a time window (no fallback)
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'BTCUSDT'
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+        start_time (int): Optional open time in milliseconds of the first candle
+        end_time (int): Optional open time in milliseconds of the last candle
+        
+    Returns:
+        list: Raw kline arrays, oldest first
+    """
+    url = f"{BASE_URL}{KLINES_ENDPOINT}"
+    params = {
+        'symbol': symbol,
+        'interval': interval,
+        'limit': min(limit, 1000)
+    }
+    if start_time is not None:
+        params['startTime'] = int(start_time)
+    if end_time is not None:
+        params['endTime'] = int(end_time)
+    
+    response = _binance_get(url, params, klines_weight(params['limit']))
+    
+    if response.status_code != 200:
+        logger.error(f"Binance API error: {response.text}")
+        raise Exception(f"Failed to fetch {symbol} klines from Binance: {response.text}")
+    
+    return response.json()
+
 def get_bitcoin_data_from_coingecko(interval='1h', limit=100):
     """
     Get Bitcoin price data from CoinGecko API
@@ -28,7 +238,21 @@ def get_bitcoin_data_from_coingecko(interval='1h', limit=100):
         limit (int): Number of candles to retrieve (max 1000)
         
     Returns:
-        list: List of OHLCV data
+        pd.DataFrame: Columnar OHLCV data
+    """
+    return get_market_data_from_coingecko(DEFAULT_SYMBOL, interval, limit)
+
+def get_market_data_from_coingecko(symbol, interval='1h', limit=100):
+    """
+    Get price data for a symbol from CoinGecko API
+    
+    Args:
+        symbol (str): Binance trading pair, e.g. 'ETHUSDT'
+        interval (str): Time interval (1h, 4h, 1d, 7d, 14d, 30d, 90d, 365d)
+        limit (int): Number of candles to retrieve (max 1000)
+        
+    Returns:
+        pd.DataFrame: Columnar OHLCV data
     """
     try:
         # Mapear intervalo para parâmetros do CoinGecko
@@ -45,120 +269,197 @@ def get_bitcoin_data_from_coingecko(interval='1h', limit=100):
             days = 30  # Padrão para 30 dias
             
         # Não use o parâmetro interval pois requer plano Enterprise (por padrão a API vai retornar dados horários para 1-90 dias)
-        url = f"{COINGECKO_BASE_URL}{COINGECKO_MARKET_CHART_ENDPOINT}"
+        url = f"{COINGECKO_BASE_URL}{COINGECKO_MARKET_CHART_ENDPOINT.format(coin_id=coingecko_id(symbol))}"
         params = {
             'vs_currency': 'usd',
             'days': days
         }
         
-        response = requests.get(url, params=params)
+        response = market_data_client.get('coingecko', url, params=params)
         
         if response.status_code != 200:
             logger.error(f"CoinGecko API error: {response.text}")
-            raise Exception(f"Failed to fetch BTC data from CoinGecko: {response.text}")
+            raise Exception(f"Failed to fetch {symbol} data from CoinGecko: {response.text}")
             
         data = response.json()
         
-        # Format the response into a more usable structure
-        formatted_data = []
-        prices = data.get('prices', [])
-        volumes = data.get('total_volumes', [])
-        market_caps = data.get('market_caps', [])
-        
         # Limite o número de pontos de dados para o número solicitado
-        prices = prices[-limit:]
+        prices = np.asarray(data.get('prices', []), dtype=np.float64).reshape(-1, 2)[-limit:]
+        volumes = np.asarray(data.get('total_volumes', []), dtype=np.float64).reshape(-1, 2)[-limit:]
         
-        # Combinar os dados
-        for i, price_data in enumerate(prices):
-            timestamp = price_data[0]  # timestamp em milissegundos
-            price = price_data[1]
-            
-            # Obter volume correspondente se disponível
-            volume = 0
-            if i < len(volumes):
-                volume = volumes[i][1]
-            
-            # Simular dados OHLCV usando apenas o preço de fechamento
-            # Isso é uma simplificação, já que o CoinGecko não fornece OHLC para intervalos menores
-            formatted_data.append({
-                'timestamp': timestamp,
-                'datetime': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S'),
-                'open': price,  # Usar o mesmo preço como abertura (simplificação)
-                'high': price * 1.005,  # Simular high com um pequeno incremento
-                'low': price * 0.995,   # Simular low com um pequeno decremento
-                'close': price,
-                'volume': volume,
-                'close_time': timestamp + (60 * 60 * 1000),  # timestamp + 1 hora em milissegundos
-                'quote_asset_volume': volume,
-                'number_of_trades': 0,  # Não disponível no CoinGecko
-                'taker_buy_base_asset_volume': 0,  # Não disponível no CoinGecko
-                'taker_buy_quote_asset_volume': 0   # Não disponível no CoinGecko
-            })
-            
-        return formatted_data
+        timestamps = prices[:, 0].astype(np.int64)  # timestamp em milissegundos
+        price = prices[:, 1]
+        
+        # Obter volume correspondente se disponível
+        volume = np.zeros(len(price))
+        if len(volumes) == len(price):
+            volume = volumes[:, 1]
+        
+        # Simular dados OHLCV usando apenas o preço de fechamento
+        # Isso é uma simplificação, já que o CoinGecko não fornece OHLC para intervalos menores
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'open': price,  # Usar o mesmo preço como abertura (simplificação)
+            'high': price * 1.005,  # Simular high com um pequeno incremento
+            'low': price * 0.995,   # Simular low com um pequeno decremento
+            'close': price,
+            'volume': volume,
+            'close_time': timestamps + (60 * 60 * 1000),  # timestamp + 1 hora em milissegundos
+            'quote_asset_volume': volume,
+            'number_of_trades': np.zeros(len(price), dtype=np.int64),  # Não disponível no CoinGecko
+            'taker_buy_base_asset_volume': np.zeros(len(price)),  # Não disponível no CoinGecko
+            'taker_buy_quote_asset_volume': np.zeros(len(price))   # Não disponível no CoinGecko
+        })
     
     except Exception as e:
-        logger.error(f"Error in get_bitcoin_data_from_coingecko: {str(e)}")
+        logger.error(f"Error in get_market_data_from_coingecko for {symbol}: {str(e)}")
         raise
 
 def get_bitcoin_data(interval='1h', limit=100):
     """
-    Get Bitcoin price data from Binance with fallback to CoinGecko
+    Get Bitcoin price data in the list-of-dicts format used by the JSON API
+    
+    Args:
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+        
+    Returns:
+        list: List of OHLCV data
+    """
+    return get_market_data(DEFAULT_SYMBOL, interval, limit)
+
+def get_bitcoin_frame(interval='1h', limit=100):
+    """
+    Get Bitcoin price data as a columnar DataFrame (see get_market_frame)
     
     Args:
         interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
         limit (int): Number of candles to retrieve (max 1000)
         
+    Returns:
+        pd.DataFrame: Columnar OHLCV data
+    """
+    return get_market_frame(DEFAULT_SYMBOL, interval, limit)
+
+def get_market_data(symbol=DEFAULT_SYMBOL, interval='1h', limit=100):
+    """
+    Get price data for a symbol in the list-of-dicts format used by the JSON API
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+        
     Returns:
         list: List of OHLCV data
     """
+    return klines_to_records(get_market_frame(symbol, interval, limit))
+
+def get_market_frame(symbol=DEFAULT_SYMBOL, interval='1h', limit=100):
+    """
+    Get price data for a symbol as a columnar DataFrame without a request when possible
+    
+    Candles come from the kline ingester's shared-memory ring when it is live
+    and holds enough of them, otherwise from the shared kline cache. The
+    returned frame may be shared with other callers through the cache and
+    must be treated as read-only.
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+        
+    Returns:
+        pd.DataFrame: Columnar OHLCV data
+    """
+    data = get_ring_frame(symbol, interval, limit)
+    if data is not None:
+        return data
+    return kline_cache.get_or_fetch(symbol.upper(), interval, limit, _fetch_market_data)
+
+def get_ring_frame(symbol, interval, limit):
+    """
+    Get the latest candles from the kline ingester's shared-memory ring
+    
+    Returns:
+        pd.DataFrame: Columnar OHLCV data, or None if no live ring holds `limit` candles
+    """
+    rows = ring_reader.read(symbol, interval, limit)
+    if rows is None:
+        return None
+    return pd.DataFrame({
+        name: rows[:, i].astype(np.int64) if name in KLINE_INT_COLUMNS else rows[:, i]
+        for i, name in enumerate(KLINE_COLUMNS)
+    })
+
+def get_market_frames(symbols, interval='1h', limit=100, max_workers=BATCH_MAX_WORKERS):
+    """
+    Fetch klines for many symbols concurrently within the Binance weight budget
+    
+    Each request goes through the shared kline cache and weight limiter, so a
+    large universe is spread over time instead of exceeding the rate limit.
+    Symbols that fail on every source are logged and left out of the result.
+    
+    Args:
+        symbols (list): Trading pairs, e.g. ['BTCUSDT', 'ETHUSDT']
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve per symbol (max 1000)
+        max_workers (int): Maximum concurrent requests
+        
+    Returns:
+        dict: Symbol to columnar OHLCV DataFrame
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    frames = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols) or 1))) as executor:
+        futures = {symbol: executor.submit(get_market_frame, symbol, interval, limit) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                frames[symbol] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching {symbol} klines in batch: {str(e)}")
+    return frames
+
+def _fetch_market_data(symbol, interval='1h', limit=100):
+    """
+    Fetch price data for a symbol from Binance with fallback to CoinGecko
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        interval (str): Time interval (1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M)
+        limit (int): Number of candles to retrieve (max 1000)
+        
+    Returns:
+        pd.DataFrame: Columnar OHLCV data
+    """
     try:
         # Primeiro, tente obter dados da Binance
         url = f"{BASE_URL}{KLINES_ENDPOINT}"
         params = {
-            'symbol': 'BTCUSDT',
+            'symbol': symbol,
             'interval': interval,
             'limit': min(limit, 1000)  # Ensure limit is within bounds
         }
         
-        response = requests.get(url, params=params)
+        response = _binance_get(url, params, klines_weight(params['limit']))
         
         if response.status_code != 200:
             logger.warning(f"Binance API error: {response.text}")
             logger.info("Falling back to CoinGecko API")
-            return get_bitcoin_data_from_coingecko(interval, limit)
-            
-        data = response.json()
-        
-        # Format the response into a more usable structure
-        formatted_data = []
-        for candle in data:
-            formatted_data.append({
-                'timestamp': candle[0],
-                'datetime': datetime.fromtimestamp(candle[0] / 1000).strftime('%Y-%m-%d %H:%M:%S'),
-                'open': candle[1],
-                'high': candle[2],
-                'low': candle[3],
-                'close': candle[4],
-                'volume': candle[5],
-                'close_time': candle[6],
-                'quote_asset_volume': candle[7],
-                'number_of_trades': candle[8],
-                'taker_buy_base_asset_volume': candle[9],
-                'taker_buy_quote_asset_volume': candle[10]
-            })
+            return get_market_data_from_coingecko(symbol, interval, limit)
             
-        return formatted_data
+        # Parse the response straight into typed columns
+        return parse_klines(response.json())
     
     except Exception as e:
-        logger.error(f"Error in get_bitcoin_data from Binance: {str(e)}")
+        logger.error(f"Error in get_market_data from Binance for {symbol}: {str(e)}")
         # Tentar CoinGecko como backup
         try:
             logger.info("Attempting to use CoinGecko API as backup")
-            return get_bitcoin_data_from_coingecko(interval, limit)
+            return get_market_data_from_coingecko(symbol, interval, limit)
         except Exception as e2:
             logger.error(f"Error in CoinGecko backup: {str(e2)}")
-            raise Exception(f"Failed to fetch Bitcoin data from all sources: {str(e)} | {str(e2)}")
+            raise Exception(f"Failed to fetch {symbol} data from all sources: {str(e)} | {str(e2)}")
 
 def get_account_info(api_key=None, api_secret=None):
     """
@@ -209,62 +510,120 @@ def get_current_bitcoin_price_from_coingecko():
     Returns:
         float: Current Bitcoin price in USD
     """
+    return get_current_price_from_coingecko(DEFAULT_SYMBOL)
+
+def get_ticker_from_coingecko(symbol):
+    """
+    Get the current price and 24h change for a symbol from CoinGecko
+    
+    Args:
+        symbol (str): Binance trading pair, e.g. 'ETHUSDT'
+        
+    Returns:
+        dict: 'price' in USD and 'change_pct' over the last 24 hours
+    """
     try:
+        coin_id = coingecko_id(symbol)
         url = f"{COINGECKO_BASE_URL}{COINGECKO_PRICE_ENDPOINT}"
         params = {
-            'ids': 'bitcoin',
+            'ids': coin_id,
             'vs_currencies': 'usd',
             'include_24hr_change': 'true'
         }
         
-        response = requests.get(url, params=params)
+        response = market_data_client.get('coingecko', url, params=params)
         
         if response.status_code != 200:
             logger.error(f"CoinGecko API error: {response.text}")
-            raise Exception(f"Failed to fetch BTC price from CoinGecko: {response.text}")
+            raise Exception(f"Failed to fetch {symbol} price from CoinGecko: {response.text}")
             
-        data = response.json()
-        return float(data['bitcoin']['usd'])
+        data = response.json()[coin_id]
+        return {
+            'price': float(data['usd']),
+            'change_pct': float(data.get('usd_24h_change') or 0.0)
+        }
     
     except Exception as e:
-        logger.error(f"Error in get_current_bitcoin_price_from_coingecko: {str(e)}")
+        logger.error(f"Error in get_ticker_from_coingecko for {symbol}: {str(e)}")
         raise
 
-def get_current_bitcoin_price():
+def get_current_price_from_coingecko(symbol):
     """
-    Get current Bitcoin price from Binance with fallback to CoinGecko
+    Get current price for a symbol from CoinGecko
     
+    Args:
+        symbol (str): Binance trading pair, e.g. 'ETHUSDT'
+        
     Returns:
-        float: Current Bitcoin price in USD/USDT
+        float: Current price in USD
+    """
+    return get_ticker_from_coingecko(symbol)['price']
+
+def get_ticker(symbol=DEFAULT_SYMBOL):
+    """
+    Get the current price and 24h change for a symbol from Binance with fallback to CoinGecko
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        
+    Returns:
+        dict: 'price' in USD/USDT and 'change_pct' over the last 24 hours
     """
     try:
         url = f"{BASE_URL}{TICKER_ENDPOINT}"
         params = {
-            'symbol': 'BTCUSDT'
+            'symbol': symbol.upper()
         }
         
-        response = requests.get(url, params=params)
+        response = _binance_get(url, params, 2)
         
         if response.status_code != 200:
             logger.warning(f"Binance API error: {response.text}")
             logger.info("Falling back to CoinGecko API for current price")
-            return get_current_bitcoin_price_from_coingecko()
+            return get_ticker_from_coingecko(symbol)
             
         data = response.json()
-        return float(data['lastPrice'])
+        return {
+            'price': float(data['lastPrice']),
+            'change_pct': float(data['priceChangePercent'])
+        }
     
     except Exception as e:
-        logger.error(f"Error in get_current_bitcoin_price from Binance: {str(e)}")
+        logger.error(f"Error in get_ticker from Binance for {symbol}: {str(e)}")
         # Tentar CoinGecko como backup
-        try:
-            logger.info("Attempting to use CoinGecko API as backup for current price")
-            return get_current_bitcoin_price_from_coingecko()
-        except Exception as e2:
-            logger.error(f"Error in CoinGecko backup for price: {str(e2)}")
-            # Em último caso, retorne um preço padrão para evitar que a UI quebre
-            # mas registre o erro para que seja claro que isso é um fallback
-            logger.error("CRITICAL: Failed to fetch Bitcoin price from all sources. Using default value.")
-            return 48000.00  # Valor simulado para evitar que a UI quebre
+        logger.info("Attempting to use CoinGecko API as backup for current price")
+        return get_ticker_from_coingecko(symbol)
+
+def get_current_price(symbol=DEFAULT_SYMBOL):
+    """
+    Get current price for a symbol from the kline ingester, or from Binance with fallback to CoinGecko
+    
+    Args:
+        symbol (str): Trading pair, e.g. 'ETHUSDT'
+        
+    Returns:
+        float: Current price in USD/USDT
+    """
+    price = ring_reader.latest_price(symbol)
+    if price is not None:
+        return price
+    return get_ticker(symbol)['price']
+
+def get_current_bitcoin_price():
+    """
+    Get current Bitcoin price from the kline ingester, or from Binance with fallback to CoinGecko
+    
+    Returns:
+        float: Current Bitcoin price in USD/USDT
+    """
+    try:
+        return get_current_price(DEFAULT_SYMBOL)
+    except Exception as e:
+        logger.error(f"Error in CoinGecko backup for price: {str(e)}")
+        # Em último caso, retorne um preço padrão para evitar que a UI quebre
+        # mas registre o erro para que seja claro que isso é um fallback
+        logger.error("CRITICAL: Failed to fetch Bitcoin price from all sources. Using default value.")
+        return 48000.00  # Valor simulado para evitar que a UI quebre
 
 def execute_paper_trade(user_id, trade_type, quantity, price=None):
     """
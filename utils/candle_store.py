@@ -0,0 +1,256 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from utils.binance_api import get_klines, interval_to_ms, empty_klines_frame, KLINE_COLUMNS, KLINE_INT_COLUMNS
+
+# Default location of the local candle database (next to the Flask instance database)
+CANDLE_STORE_PATH = os.environ.get(
+    'CANDLE_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'candles.db')
+)
+
+# Maximum candles per klines request allowed by Binance
+PAGE_SIZE = 1000
+
+# Candles backfilled by the first sync of a series when no start time is given
+DEFAULT_BACKFILL_CANDLES = int(os.environ.get('CANDLE_STORE_DEFAULT_BACKFILL', PAGE_SIZE))
+
+COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+    'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume'
+]
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CandleStore:
+    """
+    Persistent OHLCV store backed by a local SQLite database.
+
+    Candles are kept per (symbol, interval). The first sync backfills history
+    by paging through the Binance klines endpoint; later syncs only request
+    candles that closed after the last stored close_time. Only closed candles
+    are stored, so stored rows never need to be revised by the live feed.
+    """
+
+    def __init__(self, path=CANDLE_STORE_PATH):
+        """
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._sync_locks = {}
+        self._sync_locks_guard = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def _connection(self):
+        """Return the SQLite connection for the current thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS candles (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                open_time INTEGER NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume REAL NOT NULL,
+                close_time INTEGER NOT NULL,
+                quote_asset_volume REAL,
+                number_of_trades INTEGER,
+                taker_buy_base_asset_volume REAL,
+                taker_buy_quote_asset_volume REAL,
+                PRIMARY KEY (symbol, interval, open_time)
+            ) WITHOUT ROWID
+        ''')
+        conn.commit()
+
+    def _sync_lock(self, symbol, interval):
+        with self._sync_locks_guard:
+            return self._sync_locks.setdefault((symbol, interval), threading.Lock())
+
+    def bounds(self, symbol, interval):
+        """
+        Return the first open_time and last close_time stored for a series
+
+        Returns:
+            tuple: (first_open_time, last_close_time), both None if the series is empty
+        """
+        row = self._connection().execute(
+            'SELECT MIN(open_time), MAX(close_time) FROM candles WHERE symbol = ? AND interval = ?',
+            (symbol, interval)
+        ).fetchone()
+        return row[0], row[1]
+
+    def sync(self, symbol, interval, start_time=None, end_time=None):
+        """
+        Bring the local series up to date with Binance
+
+        Backfills history back to `start_time` when the store does not reach that far,
+        then appends every candle that closed after the last stored close_time.
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1d'
+            start_time (int): Optional earliest open time in milliseconds to backfill from.
+                Without one, the first sync backfills DEFAULT_BACKFILL_CANDLES candles
+                before `end_time` (or now) rather than the whole exchange history.
+            end_time (int): Optional last open time in milliseconds the caller will read
+
+        Returns:
+            int: Number of candles written
+        """
+        with self._sync_lock(symbol, interval):
+            now_ms = int(time.time() * 1000)
+            first_open, last_close = self.bounds(symbol, interval)
+            written = 0
+
+            if first_open is None:
+                if start_time is None:
+                    start_time = (min(end_time, now_ms) if end_time is not None else now_ms) \
+                        - DEFAULT_BACKFILL_CANDLES * interval_to_ms(interval)
+                return self._backfill(symbol, interval, max(start_time, 0), None, now_ms)
+
+            if start_time is not None and start_time <= first_open - interval_to_ms(interval):
+                written += self._backfill(symbol, interval, start_time, first_open - 1, now_ms)
+
+            # No new candle can have closed before the one after the last stored candle
+            if now_ms > last_close + interval_to_ms(interval):
+                written += self._backfill(symbol, interval, last_close + 1, None, now_ms)
+
+            return written
+
+    def _backfill(self, symbol, interval, start_time, end_time, now_ms):
+        """Page through the klines endpoint from start_time, storing closed candles."""
+        written = 0
+        cursor = start_time
+        while True:
+            klines = get_klines(symbol, interval, PAGE_SIZE, start_time=cursor, end_time=end_time)
+            closed = [k for k in klines if int(k[6]) < now_ms]
+            if closed:
+                self._insert(symbol, interval, closed)
+                written += len(closed)
+            if len(klines) < PAGE_SIZE or len(closed) < len(klines):
+                break
+            cursor = int(klines[-1][6]) + 1
+            if end_time is not None and cursor > end_time:
+                break
+        if written:
+            logger.info(f"Stored {written} {symbol} {interval} candles")
+        return written
+
+    def _insert(self, symbol, interval, klines):
+        conn = self._connection()
+        conn.executemany(
+            f'INSERT OR REPLACE INTO candles (symbol, interval, {", ".join(COLUMNS)}) '
+            f'VALUES (?, ?, {", ".join("?" * len(COLUMNS))})',
+            [
+                (symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]),
+                 float(k[5]), int(k[6]), float(k[7]), int(k[8]), float(k[9]), float(k[10]))
+                for k in klines
+            ]
+        )
+        conn.commit()
+
+    def range_version(self, symbol, interval, start_time=None, end_time=None):
+        """
+        Fingerprint of the stored candles whose open time falls in [start_time, end_time]
+
+        The fingerprint changes when a candle in the range is added or revised,
+        so it can version anything computed from the range.
+
+        Returns:
+            str: Candle count, last close time and column totals of the range
+        """
+        row = self._connection().execute(
+            'SELECT COUNT(*), MAX(close_time), TOTAL(open), TOTAL(high), TOTAL(low), TOTAL(close), TOTAL(volume) '
+            'FROM candles WHERE symbol = ? AND interval = ? AND open_time >= ? AND open_time <= ?',
+            (symbol, interval,
+             start_time if start_time is not None else 0,
+             end_time if end_time is not None else 2 ** 62)
+        ).fetchone()
+        return ':'.join(repr(value) for value in row)
+
+    def get_range(self, symbol, interval, start_time=None, end_time=None):
+        """
+        Read stored candles whose open time falls in [start_time, end_time]
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1d'
+            start_time (int): Optional first open time in milliseconds
+            end_time (int): Optional last open time in milliseconds
+
+        Returns:
+            pd.DataFrame: Columnar OHLCV data in the same format as get_market_frame
+        """
+        rows = self._connection().execute(
+            f'SELECT {", ".join(COLUMNS)} FROM candles '
+            'WHERE symbol = ? AND interval = ? AND open_time >= ? AND open_time <= ? '
+            'ORDER BY open_time',
+            (symbol, interval,
+             start_time if start_time is not None else 0,
+             end_time if end_time is not None else 2 ** 62)
+        ).fetchall()
+        if not rows:
+            return empty_klines_frame()
+        raw = np.array(rows, dtype=np.float64)
+        return pd.DataFrame({
+            name: raw[:, i].astype(np.int64) if name in KLINE_INT_COLUMNS else raw[:, i]
+            for i, name in enumerate(KLINE_COLUMNS)
+        })
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_candle_store():
+    """Return the process-wide CandleStore, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandleStore()
+        return _store
+
+def get_candles(symbol, interval, start_time=None, end_time=None, sync=True):
+    """
+    Read a date range of candles from the local store, syncing it first
+
+    Args:
+        symbol (str): Trading pair, e.g. 'BTCUSDT'
+        interval (str): Kline interval, e.g. '1d'
+        start_time (int): Optional first open time in milliseconds
+        end_time (int): Optional last open time in milliseconds
+        sync (bool): Fetch missing candles from Binance before reading
+
+    Returns:
+        pd.DataFrame: Columnar OHLCV data
+    """
+    store = get_candle_store()
+    if sync:
+        try:
+            store.sync(symbol, interval, start_time, end_time)
+        except Exception as e:
+            # Serve whatever is already stored rather than failing the caller
+            logger.error(f"Error syncing candle store for {symbol} {interval}: {str(e)}")
+    return store.get_range(symbol, interval, start_time, end_time)
@@ -0,0 +1,98 @@
+import json
+import time
+import random
+import asyncio
+import logging
+from urllib.parse import urlparse, parse_qs
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+from utils.binance_api import interval_to_ms
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class FakeKlineStream:
+    """
+    Random-walk candles for one stream, in the Binance kline event format.
+
+    Stand-in for the Binance combined-stream endpoint so the kline ingester
+    can be run and tested without network access.
+    """
+
+    def __init__(self, symbol, interval, price=50000.0, volatility=0.0005):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.step = interval_to_ms(interval)
+        self.price = price
+        self.volatility = volatility
+        self.candle = None
+
+    def next_event(self, now_ms):
+        """Advance the walk and return the event for the candle open at `now_ms`."""
+        self.price *= 1 + random.gauss(0, self.volatility)
+        open_time = now_ms - now_ms % self.step
+        candle = self.candle
+        if candle is None or candle['t'] != open_time:
+            candle = self.candle = {
+                't': open_time, 'T': open_time + self.step - 1, 's': self.symbol, 'i': self.interval,
+                'o': self.price, 'h': self.price, 'l': self.price, 'c': self.price,
+                'v': 0.0, 'q': 0.0, 'n': 0, 'V': 0.0, 'Q': 0.0
+            }
+        volume = random.uniform(0.01, 1.0)
+        candle['h'] = max(candle['h'], self.price)
+        candle['l'] = min(candle['l'], self.price)
+        candle['c'] = self.price
+        candle['v'] += volume
+        candle['q'] += volume * self.price
+        candle['n'] += 1
+        candle['V'] += volume / 2
+        candle['Q'] += volume * self.price / 2
+        k = {key: f"{value:.8f}" if isinstance(value, float) else value for key, value in candle.items()}
+        k['x'] = now_ms >= candle['T']
+        return {
+            'stream': f"{self.symbol.lower()}@kline_{self.interval}",
+            'data': {'e': 'kline', 'E': now_ms, 's': self.symbol, 'k': k}
+        }
+
+
+async def handle_connection(connection, tick=1.0):
+    """Send events for the streams named in the '?streams=' query until the client disconnects."""
+    query = parse_qs(urlparse(connection.request.path).query)
+    streams = []
+    for name in query.get('streams', [''])[0].split('/'):
+        if '@kline_' in name:
+            symbol, interval = name.split('@kline_')
+            streams.append(FakeKlineStream(symbol, interval))
+    logger.info(f"Client subscribed to {len(streams)} fake kline streams")
+    try:
+        while True:
+            now_ms = int(time.time() * 1000)
+            for stream in streams:
+                await connection.send(json.dumps(stream.next_event(now_ms)))
+            await asyncio.sleep(tick)
+    except ConnectionClosed:
+        logger.info("Client disconnected from fake kline streams")
+
+
+async def run_server(host='127.0.0.1', port=8765, tick=1.0):
+    """Serve fake kline streams at ws://host:port/stream?streams=... until cancelled."""
+    async with serve(lambda connection: handle_connection(connection, tick), host, port):
+        logger.info(f"Fake kline server listening on ws://{host}:{port}")
+        await asyncio.get_running_loop().create_future()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for the Binance kline streams')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tick', type=float, default=1.0, help='Seconds between events per stream')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_server(args.host, args.port, args.tick))
+    except KeyboardInterrupt:
+        pass
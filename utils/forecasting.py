@@ -0,0 +1,511 @@
+import abc
+import time
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter, lfiltic
+from sklearn.linear_model import Ridge
+from sklearn.ensemble import HistGradientBoostingRegressor
+from utils.candle_store import get_candles
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def ar_forecast(coef, intercept, history, periods):
+    """
+    Recursively forecast a linear autoregressive model
+
+    Feeding each forecast back as the newest lag is a linear recursion,
+    y[t] = intercept + sum(coef[k] * y[t - lookback + k]), so the whole
+    rollout runs as one IIR filter seeded with the last observed values.
+
+    Args:
+        coef (np.ndarray): Lag coefficients, oldest lag first
+        intercept (float): Model intercept
+        history (np.ndarray): The last len(coef) observed values, oldest first
+        periods (int): Number of future steps
+
+    Returns:
+        np.ndarray: Forecast values
+    """
+    if periods <= 0:
+        return np.empty(0)
+    a = np.concatenate(([1.0], -np.asarray(coef, dtype=np.float64)[::-1]))
+    zi = lfiltic([1.0], a, np.asarray(history, dtype=np.float64)[::-1])
+    forecast, _ = lfilter([1.0], a, np.full(periods, float(intercept)), zi=zi)
+    return forecast
+
+
+class ForecastModel(abc.ABC):
+    """
+    Base class for forecasting models served through the model registry.
+
+    A model is fitted on a window of closes and forecasts the closes that
+    follow it. By default it is refitted only when a candle with a new
+    timestamp arrives; a revision of the last (still open) candle just
+    replaces the history the forecast starts from.
+    """
+
+    name = None
+
+    def __init__(self, lookback=30):
+        """
+        Args:
+            lookback (int): Number of previous closes the model looks at
+        """
+        self.lookback = lookback
+        self.timestamps = None
+        self.close = None
+
+    @property
+    def window(self):
+        return 0 if self.close is None else len(self.close)
+
+    def fit(self, timestamps, close):
+        """
+        Fit the model from scratch on a window of candles
+
+        Args:
+            timestamps (np.ndarray): Candle open times in milliseconds, ascending
+            close (np.ndarray): Close prices
+        """
+        close = np.asarray(close, dtype=np.float64)
+        if len(close) <= self.lookback:
+            raise ValueError(f"Need more than {self.lookback} candles to fit the model, got {len(close)}")
+        self.timestamps = np.asarray(timestamps, dtype=np.int64).copy()
+        self.close = close.copy()
+        self._fit(self.close)
+
+    def update(self, timestamps, close):
+        """
+        Bring the model up to date with a newer window of candles
+
+        Returns:
+            bool: True if the model changed
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+        if len(close) != self.window or timestamps[-1] != self.timestamps[-1] or timestamps[0] != self.timestamps[0]:
+            self.fit(timestamps, close)
+            return True
+        if np.array_equal(close, self.close):
+            return False
+        self.close = close.copy()
+        return True
+
+    def forecast(self, periods):
+        """
+        Forecast the closes after the current window
+
+        Args:
+            periods (int): Number of future candles
+
+        Returns:
+            np.ndarray: Forecast closes in price units
+        """
+        return self._forecast(self.close, periods)
+
+    @abc.abstractmethod
+    def _fit(self, close):
+        """Fit the model's parameters on a window of closes."""
+
+    @abc.abstractmethod
+    def _forecast(self, close, periods):
+        """Forecast `periods` closes following `close` with the fitted parameters."""
+
+    def state(self):
+        """Arrays needed to restore the fitted window."""
+        return {'timestamps': self.timestamps, 'close': self.close, 'lookback': np.array(self.lookback)}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(int(state['lookback']))
+        model.fit(state['timestamps'], state['close'])
+        return model
+
+
+class IncrementalLinearAR(ForecastModel):
+    """
+    Autoregressive linear model fitted by least squares over a sliding window.
+
+    Each row regresses a close on the `lookback` closes before it, like the
+    LinearRegression in predict_price. Instead of refitting, the model keeps
+    the least-squares sufficient statistics (sums, X'X and X'y) and updates
+    them when the window slides: rows for new candles are added, rows that
+    left the window are removed and the row of a revised (still open)
+    candle is replaced. Solving the centred normal equations then costs
+    O(lookback^3), independent of the window length.
+
+    Closes are divided by a reference price so the statistics stay well
+    scaled; ordinary least squares is invariant to that rescaling (and to the
+    MinMaxScaler used before), so forecasts match a full refit.
+    """
+
+    name = 'linear'
+
+    def __init__(self, lookback=30):
+        """
+        Args:
+            lookback (int): Number of previous closes used to predict the next one
+        """
+        super().__init__(lookback)
+        self.coef = None
+        self.intercept = None
+        self._updates = 0
+
+    def _fit(self, close):
+        self.reference = float(close[0]) or 1.0
+        p = self.lookback
+        self.n = 0
+        self.sx = np.zeros(p)
+        self.sy = 0.0
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros(p)
+        self._accumulate(close, np.arange(p, len(close)), 1.0)
+        self._updates = 0
+        self._solve()
+
+    def update(self, timestamps, close):
+        """
+        Slide the fitted window to a newer window of candles
+
+        Falls back to a full fit when the new window does not overlap the
+        fitted one, has a different length, or enough updates have
+        accumulated that the statistics are resynchronised.
+
+        Args:
+            timestamps (np.ndarray): Candle open times in milliseconds, ascending
+            close (np.ndarray): Close prices
+
+        Returns:
+            bool: True if the model changed
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+        last_ts = self.timestamps[-1]
+        pos = int(np.searchsorted(timestamps, last_ts))
+        overlaps = (
+            len(close) == self.window and pos < len(timestamps) and timestamps[pos] == last_ts
+            and timestamps[0] >= self.timestamps[0]
+        )
+        if not overlaps:
+            self.fit(timestamps, close)
+            return True
+
+        new_rows = len(timestamps) - 1 - pos
+        revised = close[pos] != self.close[-1]
+        if new_rows == 0 and not revised:
+            return False
+
+        # Re-sum from scratch once per window turnover so rounding drift stays bounded
+        self._updates += new_rows + int(revised)
+        if self._updates >= self.window:
+            self.fit(timestamps, close)
+            return True
+
+        old_window, old_close = self.window, self.close
+        dropped = len(timestamps) - 1 - pos  # rows that slid out at the start of the window
+        p = self.lookback
+        # Remove rows whose target left the window, and the row of the revised candle
+        remove = list(range(p, min(p + dropped, old_window)))
+        if revised and old_window - 1 not in remove:
+            remove.append(old_window - 1)
+        self._accumulate(old_close, np.array(remove, dtype=np.int64), -1.0)
+        # Add the revised candle's row and the rows of the new candles
+        first_new = pos if revised else pos + 1
+        self._accumulate(close, np.arange(max(first_new, p), len(close)), 1.0)
+
+        self.timestamps = timestamps.copy()
+        self.close = close.copy()
+        self._solve()
+        return True
+
+    def _accumulate(self, close, targets, sign):
+        """Add (sign=1) or remove (sign=-1) the regression rows ending at the given target indices."""
+        if len(targets) == 0:
+            return
+        z = close / self.reference
+        X = sliding_window_view(z, self.lookback)[targets - self.lookback]
+        y = z[targets]
+        self.n += sign * len(targets)
+        self.sx += sign * X.sum(axis=0)
+        self.sy += sign * y.sum()
+        self.sxx += sign * (X.T @ X)
+        self.sxy += sign * (X.T @ y)
+
+    def _solve(self):
+        # Centred normal equations (the intercept is recovered from the means)
+        sxx = self.sxx - np.outer(self.sx, self.sx) / self.n
+        sxy = self.sxy - self.sx * self.sy / self.n
+        try:
+            coef = np.linalg.solve(sxx, sxy)
+        except np.linalg.LinAlgError:
+            coef = np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+        self.coef = coef
+        self.intercept = (self.sy - self.sx @ coef) / self.n
+
+    def _forecast(self, close, periods):
+        history = close[-self.lookback:] / self.reference
+        return ar_forecast(self.coef, self.intercept, history, periods) * self.reference
+
+
+class RidgeAR(ForecastModel):
+    """
+    Autoregressive model on the last `lookback` closes with an L2 penalty.
+
+    Closes are divided by the mean of the window so the penalty does not
+    depend on the price level. The penalty keeps the nearly collinear lag
+    coefficients small, which makes long recursive forecasts less explosive
+    than plain least squares.
+    """
+
+    name = 'ridge'
+
+    def __init__(self, lookback=30, alpha=1e-3):
+        """
+        Args:
+            lookback (int): Number of previous closes used to predict the next one
+            alpha (float): L2 penalty strength
+        """
+        super().__init__(lookback)
+        self.alpha = alpha
+
+    def _fit(self, close):
+        self.reference = float(close.mean()) or 1.0
+        z = close / self.reference
+        self.model = Ridge(alpha=self.alpha)
+        self.model.fit(sliding_window_view(z[:-1], self.lookback), z[self.lookback:])
+
+    def _forecast(self, close, periods):
+        history = close[-self.lookback:] / self.reference
+        return ar_forecast(self.model.coef_, self.model.intercept_, history, periods) * self.reference
+
+
+class GradientBoostingForecaster(ForecastModel):
+    """
+    Gradient-boosted trees predicting the next log return.
+
+    Features are the last `lookback` log returns plus indicator features
+    (distance from the 20 and 50 period SMAs, 14 period RSI and 20 period
+    return volatility). Forecasts are recursive: each predicted return is
+    appended to the history before the next step's features are computed.
+    """
+
+    name = 'gbm'
+
+    # Closes needed to compute the features of one row
+    FEATURE_HISTORY = 51
+
+    def __init__(self, lookback=10):
+        """
+        Args:
+            lookback (int): Number of previous log returns used as features
+        """
+        super().__init__(lookback)
+
+    @staticmethod
+    def _features(close, lookback):
+        """Feature matrix for every row of `close` that has enough history (one row per candle)."""
+        log_close = np.log(close)
+        returns = np.diff(log_close)
+        n = len(close)
+        start = max(GradientBoostingForecaster.FEATURE_HISTORY - 1, lookback)
+        rows = np.arange(start, n)  # index of the last close each row can see
+
+        lags = sliding_window_view(returns, lookback)[rows - lookback]
+        sma_20 = sliding_window_view(close, 20).mean(axis=1)[rows - 19]
+        sma_50 = sliding_window_view(close, 50).mean(axis=1)[rows - 49]
+        deltas = sliding_window_view(returns, 14)[rows - 14]
+        gains = np.where(deltas > 0, deltas, 0.0).sum(axis=1)
+        losses = np.where(deltas < 0, -deltas, 0.0).sum(axis=1)
+        rsi = gains / np.maximum(gains + losses, 1e-12)
+        volatility = sliding_window_view(returns, 20)[rows - 20].std(axis=1)
+        indicators = np.column_stack((close[rows] / sma_20 - 1, close[rows] / sma_50 - 1, rsi, volatility))
+        return np.hstack((lags, indicators)), rows
+
+    def _fit(self, close):
+        if len(close) < max(self.FEATURE_HISTORY, self.lookback + 1) + 10:
+            raise ValueError(f"Not enough candles to fit the {self.name} model, got {len(close)}")
+        X, rows = self._features(close, self.lookback)
+        # Each row predicts the return into the next candle
+        X, rows = X[:-1], rows[:-1]
+        y = np.log(close[rows + 1]) - np.log(close[rows])
+        self.model = HistGradientBoostingRegressor(max_iter=100, learning_rate=0.05, max_leaf_nodes=15,
+                                                   early_stopping=False)
+        self.model.fit(X, y)
+
+    def _forecast(self, close, periods):
+        history = max(self.FEATURE_HISTORY, self.lookback + 1)
+        buffer = np.empty(history + periods)
+        buffer[:history] = close[-history:]
+        for i in range(periods):
+            window = buffer[i:i + history]
+            features, _ = self._features(window, self.lookback)
+            buffer[history + i] = window[-1] * np.exp(self.model.predict(features[-1:])[0])
+        return buffer[history:].copy()
+
+
+class ExponentialSmoothing(ForecastModel):
+    """
+    Damped-trend (Holt) exponential smoothing.
+
+    The level, trend and damping parameters are chosen by a grid search on
+    the one-step-ahead squared error, with every parameter combination
+    filtered through the window at once.
+    """
+
+    name = 'ets'
+
+    ALPHAS = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+    BETAS = np.array([0.01, 0.05, 0.1, 0.2])
+    PHIS = np.array([0.8, 0.9, 0.98])
+
+    def _fit(self, close):
+        alpha, beta, phi = (g.ravel() for g in np.meshgrid(self.ALPHAS, self.BETAS, self.PHIS, indexing='ij'))
+        _, _, sse = self._smooth(close, alpha, beta, phi)
+        best = int(np.argmin(sse))
+        self.alpha, self.beta, self.phi = float(alpha[best]), float(beta[best]), float(phi[best])
+
+    @staticmethod
+    def _smooth(close, alpha, beta, phi):
+        """Run the smoothing recursion for arrays of parameters; returns final level, trend and SSE."""
+        level = np.full(np.shape(alpha), close[0])
+        trend = np.full(np.shape(alpha), close[1] - close[0])
+        sse = np.zeros(np.shape(alpha))
+        for value in close[1:]:
+            predicted = level + phi * trend
+            sse += (value - predicted) ** 2
+            new_level = alpha * value + (1 - alpha) * predicted
+            trend = beta * (new_level - level) + (1 - beta) * phi * trend
+            level = new_level
+        return level, trend, sse
+
+    def _forecast(self, close, periods):
+        level, trend, _ = self._smooth(close, self.alpha, self.beta, self.phi)
+        damping = np.cumsum(self.phi ** np.arange(1, periods + 1))
+        return level + damping * trend
+
+
+MODEL_TYPES = {
+    model.name: model
+    for model in (IncrementalLinearAR, RidgeAR, GradientBoostingForecaster, ExponentialSmoothing)
+}
+
+
+def evaluate_models(close, model_names=None, window=500, horizon=24, step=None, lookback=30, max_folds=50):
+    """
+    Walk-forward evaluation of forecasting models on a series of closes
+
+    At each fold origin every model is fitted on the `window` closes before
+    it and forecasts the next `horizon` closes, which are compared with the
+    actual closes. Origins are `step` candles apart (the horizon by default)
+    and only the most recent `max_folds` are used.
+
+    Args:
+        close (np.ndarray): Close prices, oldest first
+        model_names (list): Models to evaluate (all registered models by default)
+        window (int): Closes each model is fitted on
+        horizon (int): Number of candles forecast at each origin
+        step (int): Candles between fold origins
+        lookback (int): Lookback passed to each model
+        max_folds (int): Maximum number of folds
+
+    Returns:
+        dict: 'folds', 'horizon', 'naive' baseline errors and per-model 'models' with
+            mae, rmse, mape_pct, direction_accuracy, fit_ms and predict_ms
+    """
+    close = np.asarray(close, dtype=np.float64)
+    model_names = list(model_names or MODEL_TYPES)
+    unknown = [name for name in model_names if name not in MODEL_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown model type: {', '.join(unknown)}")
+    step = step or horizon
+    origins = np.arange(window, len(close) - horizon + 1, step)[-max_folds:]
+    if len(origins) == 0:
+        raise ValueError(f"Need at least {window + horizon} candles to evaluate, got {len(close)}")
+
+    actual = np.stack([close[o:o + horizon] for o in origins])
+    last = close[origins - 1]
+    # Timestamps are only used to detect new candles, positions are enough here
+    positions = np.arange(len(close), dtype=np.int64)
+
+    def errors(forecast):
+        error = forecast - actual
+        return {
+            'mae': float(np.abs(error).mean()),
+            'rmse': float(np.sqrt((error ** 2).mean())),
+            'mape_pct': float((np.abs(error) / actual).mean() * 100),
+            'direction_accuracy': float((np.sign(forecast[:, -1] - last) == np.sign(actual[:, -1] - last)).mean())
+        }
+
+    results = {}
+    for name in model_names:
+        forecasts = np.empty_like(actual)
+        fit_seconds = predict_seconds = 0.0
+        try:
+            for i, origin in enumerate(origins):
+                model = MODEL_TYPES[name](lookback)
+                started = time.perf_counter()
+                model.fit(positions[origin - window:origin], close[origin - window:origin])
+                fitted = time.perf_counter()
+                forecasts[i] = model.forecast(horizon)
+                predict_seconds += time.perf_counter() - fitted
+                fit_seconds += fitted - started
+        except Exception as e:
+            logger.error(f"Error evaluating {name} model: {str(e)}")
+            results[name] = {'error': str(e)}
+            continue
+        results[name] = dict(
+            errors(forecasts),
+            fit_ms=fit_seconds / len(origins) * 1000,
+            predict_ms=predict_seconds / len(origins) * 1000
+        )
+
+    return {
+        'folds': len(origins),
+        'horizon': horizon,
+        'naive': errors(np.repeat(last[:, None], horizon, axis=1)),
+        'models': results
+    }
+
+
+def walk_forward_evaluate(symbol, interval, model_names=None, start_time=None, end_time=None, **kwargs):
+    """
+    Walk-forward evaluation of forecasting models on locally stored candles
+
+    Args:
+        symbol (str): Trading pair, e.g. 'BTCUSDT'
+        interval (str): Kline interval, e.g. '1h'
+        model_names (list): Models to evaluate (all registered models by default)
+        start_time (int): Optional first open time in milliseconds
+        end_time (int): Optional last open time in milliseconds
+        **kwargs: Passed to evaluate_models (window, horizon, step, lookback, max_folds)
+
+    Returns:
+        dict: Evaluation report from evaluate_models, with the symbol and interval
+    """
+    data = get_candles(symbol, interval, start_time, end_time)
+    report = evaluate_models(data['close'].to_numpy(dtype=np.float64), model_names, **kwargs)
+    return dict(report, symbol=symbol, interval=interval)
+
+
+if __name__ == '__main__':
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Walk-forward benchmark of the forecasting models')
+    parser.add_argument('symbol', nargs='?', default='BTCUSDT')
+    parser.add_argument('interval', nargs='?', default='1h')
+    parser.add_argument('--models', help='Comma-separated model names (default: all)')
+    parser.add_argument('--days', type=int, default=120, help='Days of history to evaluate on')
+    parser.add_argument('--window', type=int, default=500)
+    parser.add_argument('--horizon', type=int, default=24)
+    parser.add_argument('--folds', type=int, default=50)
+    args = parser.parse_args()
+
+    start = int((time.time() - args.days * 86400) * 1000)
+    report = walk_forward_evaluate(args.symbol.upper(), args.interval,
+                                   args.models.split(',') if args.models else None, start_time=start,
+                                   window=args.window, horizon=args.horizon, max_folds=args.folds)
+    print(json.dumps(report, indent=2))
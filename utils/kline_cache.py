@@ -0,0 +1,145 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of (symbol, interval, limit) entries kept in memory
+KLINE_CACHE_MAX_ENTRIES = int(os.environ.get('KLINE_CACHE_MAX_ENTRIES', 256))
+
+# Longest a response is served while its last candle is still open (its close, high, low and volume keep moving)
+KLINE_CACHE_OPEN_CANDLE_TTL_SECONDS = float(os.environ.get('KLINE_CACHE_OPEN_CANDLE_TTL_SECONDS', 5))
+
+
+class KlineCache:
+    """
+    In-process LRU cache for kline (candlestick) responses.
+
+    Entries are keyed by (symbol, interval, limit) and expire when the last
+    candle of the cached response closes, or after
+    KLINE_CACHE_OPEN_CANDLE_TTL_SECONDS if that is sooner. A request for a smaller limit is
+    served from any live entry of the same (symbol, interval) with a larger
+    limit, and concurrent misses for the same (symbol, interval) share a
+    single upstream fetch.
+    """
+
+    def __init__(self, max_entries=KLINE_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximum number of cached responses before the
+                least recently used entry is evicted
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (symbol, interval, limit) -> (expires_at, data)
+        self._in_flight = {}  # (symbol, interval) -> (limit, threading.Event)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, symbol, interval, limit, fetch):
+        """
+        Return cached candles for (symbol, interval, limit), calling fetch on a miss
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1h'
+            limit (int): Number of candles requested
+            fetch (callable): Called as fetch(symbol, interval, limit) to load candles
+
+        Returns:
+            pd.DataFrame: Columnar OHLCV data (at most `limit` candles)
+        """
+        while True:
+            with self._lock:
+                data = self._lookup(symbol, interval, limit)
+                if data is not None:
+                    self.hits += 1
+                    return data
+
+                in_flight = self._in_flight.get((symbol, interval))
+                if in_flight is None or in_flight[0] < limit:
+                    # Nobody is fetching enough candles for us: fetch ourselves
+                    done = threading.Event()
+                    self._in_flight[(symbol, interval)] = (limit, done)
+                    self.misses += 1
+                    break
+
+            # Another request is already fetching a superset: wait for it and retry
+            in_flight[1].wait()
+
+        try:
+            data = fetch(symbol, interval, limit)
+            self._store(symbol, interval, limit, data)
+            return data.iloc[-limit:]
+        finally:
+            with self._lock:
+                if self._in_flight.get((symbol, interval), (None, None))[1] is done:
+                    del self._in_flight[(symbol, interval)]
+            done.set()
+
+    def get(self, symbol, interval, limit):
+        """Return cached candles for (symbol, interval, limit) without fetching, or None."""
+        with self._lock:
+            data = self._lookup(symbol, interval, limit)
+            if data is not None:
+                self.hits += 1
+            return data
+
+    def put(self, symbol, interval, limit, data):
+        """Cache candles fetched outside get_or_fetch (e.g. by the async market-data path)."""
+        with self._lock:
+            self.misses += 1
+        self._store(symbol, interval, limit, data)
+
+    def invalidate(self, symbol=None, interval=None):
+        """Drop cached entries, optionally only those for a symbol and/or interval."""
+        with self._lock:
+            for key in list(self._entries):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == interval):
+                    del self._entries[key]
+
+    def stats(self):
+        """Return cache counters for monitoring."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _lookup(self, symbol, interval, limit):
+        """Find a live entry covering `limit` candles. Must be called with the lock held."""
+        now_ms = int(time.time() * 1000)
+        for key in list(self._entries):
+            expires_at, data = self._entries[key]
+            if expires_at <= now_ms:
+                del self._entries[key]
+                continue
+            if key[0] == symbol and key[1] == interval and key[2] >= limit:
+                self._entries.move_to_end(key)
+                return data.iloc[-limit:]
+        return None
+
+    def _store(self, symbol, interval, limit, data):
+        """Insert a fetched response, evicting subsumed and least recently used entries."""
+        if data.empty:
+            return
+        # The last candle is still open and changes with every trade, so the response is
+        # only served briefly, and never past that candle's close
+        expires_at = min(int(data['close_time'].iloc[-1]) + 1,
+                         int(time.time() * 1000 + KLINE_CACHE_OPEN_CANDLE_TTL_SECONDS * 1000))
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == symbol and key[1] == interval and key[2] <= limit:
+                    del self._entries[key]
+            self._entries[(symbol, interval, limit)] = (expires_at, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared cache used by utils.binance_api
+kline_cache = KlineCache()
@@ -0,0 +1,180 @@
+import os
+import json
+import asyncio
+import logging
+import numpy as np
+import websockets
+from utils.binance_api import get_klines, interval_to_ms, DEFAULT_SYMBOL, KLINE_COLUMNS
+from utils.kline_ring import KlineRingBuffer, RING_CAPACITY
+
+# Binance combined-stream endpoint (point it at utils.fake_kline_server for local runs)
+KLINE_STREAM_URL = os.environ.get('KLINE_STREAM_URL', 'wss://stream.binance.com:9443')
+
+# Streams ingested when none are given on the command line
+KLINE_INGEST_SYMBOLS = os.environ.get('KLINE_INGEST_SYMBOLS', DEFAULT_SYMBOL).split(',')
+KLINE_INGEST_INTERVALS = os.environ.get('KLINE_INGEST_INTERVALS', '1m,5m,15m,1h,4h,1d').split(',')
+
+# Reconnect backoff bounds in seconds
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def kline_event_row(k):
+    """
+    Convert the 'k' object of a kline stream event to a ring row
+
+    Args:
+        k (dict): Kline payload with Binance's one-letter keys
+
+    Returns:
+        np.ndarray: Candle in klines-endpoint field order
+    """
+    return np.array([k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'],
+                     k['q'], k['n'], k['V'], k['Q']], dtype=np.float64)
+
+
+class KlineIngester:
+    """
+    Keeps the shared-memory kline rings current from the Binance WebSocket streams.
+
+    One combined-stream connection carries every (symbol, interval) kline
+    stream. Each event revises or appends the newest candle of its ring.
+    REST is only used to repair gaps: the missing candles are fetched when
+    the connection is (re)established and whenever an event skips past the
+    candle after the newest one held.
+    """
+
+    def __init__(self, symbols, intervals, url=KLINE_STREAM_URL, capacity=RING_CAPACITY, backfill=True):
+        """
+        Args:
+            symbols (list): Trading pairs, e.g. ['BTCUSDT']
+            intervals (list): Kline intervals, e.g. ['1m', '1h']
+            url (str): Base URL of the combined-stream endpoint
+            capacity (int): Candles kept per ring
+            backfill (bool): Repair gaps over REST (disable for offline runs)
+        """
+        self.url = url.rstrip('/')
+        self.capacity = capacity
+        self.backfill = backfill
+        self.rings = {}
+        for symbol in symbols:
+            for interval in intervals:
+                interval_to_ms(interval)
+                self.rings[(symbol.upper(), interval)] = KlineRingBuffer(symbol, interval, capacity, create=True)
+        self.events = 0
+        self.repairs = 0
+
+    def stream_url(self):
+        streams = '/'.join(f"{symbol.lower()}@kline_{interval}" for symbol, interval in self.rings)
+        return f"{self.url}/stream?streams={streams}"
+
+    def repair(self, ring, until=None):
+        """
+        Fetch the candles missing after the newest one in a ring over REST
+
+        Args:
+            ring (KlineRingBuffer): Ring to repair
+            until (int): Optional open time (ms) of the first candle already received
+        """
+        if not self.backfill:
+            return
+        step = interval_to_ms(ring.interval)
+        last = ring.last_open_time()
+        start = None if last is None else last + step
+        try:
+            while True:
+                if start is None:
+                    klines = get_klines(ring.symbol, ring.interval, self.capacity)
+                else:
+                    klines = get_klines(ring.symbol, ring.interval, 1000, start_time=start, end_time=until)
+                if not klines:
+                    break
+                ring.write(np.array(klines, dtype=object)[:, :len(KLINE_COLUMNS)].astype(np.float64))
+                self.repairs += 1
+                if start is None or len(klines) < 1000:
+                    break
+                start = int(klines[-1][0]) + step
+            logger.info(f"Repaired {ring.symbol} {ring.interval} ring up to {ring.last_open_time()}")
+        except Exception as e:
+            logger.error(f"Error repairing {ring.symbol} {ring.interval} ring: {str(e)}")
+
+    async def handle(self, message):
+        """Apply one combined-stream message to its ring."""
+        payload = json.loads(message)
+        k = payload.get('data', payload).get('k')
+        if k is None:
+            return
+        ring = self.rings.get((k['s'], k['i']))
+        if ring is None:
+            return
+        last = ring.last_open_time()
+        if last is not None and k['t'] > last + interval_to_ms(ring.interval):
+            logger.warning(f"Gap in {ring.symbol} {ring.interval} stream after {last}")
+            await asyncio.to_thread(self.repair, ring, k['t'] - 1)
+        ring.write(kline_event_row(k))
+        self.events += 1
+
+    async def run(self):
+        """Consume the streams until cancelled, reconnecting with exponential backoff."""
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.stream_url(), max_queue=None) as connection:
+                    logger.info(f"Connected to {self.url} for {len(self.rings)} kline streams")
+                    delay = RECONNECT_MIN_DELAY
+                    # Events keep arriving on the connection while the gaps are filled
+                    for ring in self.rings.values():
+                        await asyncio.to_thread(self.repair, ring)
+                    async for message in connection:
+                        await self.handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Kline stream error: {str(e)}; reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def close(self):
+        """Remove the rings; readers fall back to REST once they are gone."""
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+
+
+def main():
+    import signal
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ingest Binance kline streams into shared-memory rings')
+    parser.add_argument('--symbols', default=','.join(KLINE_INGEST_SYMBOLS), help='Comma-separated trading pairs')
+    parser.add_argument('--intervals', default=','.join(KLINE_INGEST_INTERVALS), help='Comma-separated intervals')
+    parser.add_argument('--url', default=KLINE_STREAM_URL, help='Combined-stream base URL')
+    parser.add_argument('--capacity', type=int, default=RING_CAPACITY, help='Candles kept per ring')
+    parser.add_argument('--no-backfill', action='store_true', help='Do not repair gaps over REST')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ingester = KlineIngester(args.symbols.split(','), args.intervals.split(','), args.url, args.capacity,
+                             backfill=not args.no_backfill)
+
+    async def serve():
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task.cancel)
+        await ingester.run()
+
+    try:
+        asyncio.run(serve())
+    except asyncio.CancelledError:
+        pass
+    finally:
+        ingester.close()
+        logger.info(f"Kline ingester stopped after {ingester.events} events and {ingester.repairs} repairs")
+
+
+if __name__ == '__main__':
+    main()
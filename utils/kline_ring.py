@@ -0,0 +1,234 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Candles kept per (symbol, interval)
+RING_CAPACITY = int(os.environ.get('KLINE_RING_CAPACITY', 1000))
+
+# A ring not updated for this long is considered stale and readers fall back to REST
+RING_MAX_AGE_MS = int(os.environ.get('KLINE_RING_MAX_AGE_MS', 15000))
+
+# Fields per candle, in the order of the klines endpoint (see utils.binance_api.KLINE_COLUMNS)
+RING_FIELDS = 11
+
+# Header slots (int64): magic, capacity, count, head, sequence, updated_at
+_MAGIC = 0x4E54584B4C494E45  # 'NTXKLINE'
+_HEADER_SLOTS = 8
+_MAGIC_SLOT, _CAPACITY_SLOT, _COUNT_SLOT, _HEAD_SLOT, _SEQ_SLOT, _UPDATED_SLOT = range(6)
+
+# Seconds a failed attach is remembered before a reader looks for the segment again
+_MISSING_RETRY_SECONDS = 5
+
+# Attempts at a consistent copy before giving up (a writer that died mid-write leaves the sequence odd)
+_READ_ATTEMPTS = 100
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def ring_name(symbol, interval):
+    """Shared-memory segment name for a (symbol, interval) ring."""
+    return f"ntx_klines_{symbol.upper()}_{interval}"
+
+
+class KlineRingBuffer:
+    """
+    Fixed-size ring of the latest candles for one (symbol, interval) in shared memory.
+
+    One writer (the kline ingester) appends candles and revises the newest
+    one in place; any number of processes read it. The header holds a
+    sequence counter used as a seqlock: the writer makes it odd while it is
+    writing, and readers retry a copy that overlapped a write.
+    """
+
+    def __init__(self, symbol, interval, capacity=RING_CAPACITY, create=False):
+        """
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1m'
+            capacity (int): Number of candles kept (only used when creating)
+            create (bool): Create the segment (writer) instead of attaching to it (reader)
+
+        Raises:
+            FileNotFoundError: If attaching and no ingester has created the ring
+        """
+        self.symbol = symbol.upper()
+        self.interval = interval
+        name = ring_name(symbol, interval)
+        if create:
+            size = 8 * (_HEADER_SLOTS + capacity * RING_FIELDS)
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # Left behind by an ingester that did not shut down cleanly
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            # Readers must not unlink the writer's segment when they exit
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self._shm.buf)
+        if create:
+            self._header[:] = 0
+            self._header[_CAPACITY_SLOT] = capacity
+            self._header[_MAGIC_SLOT] = _MAGIC
+        elif self._header[_MAGIC_SLOT] != _MAGIC:
+            self._shm.close()
+            raise FileNotFoundError(f"Shared memory {name} is not a kline ring")
+        self.capacity = int(self._header[_CAPACITY_SLOT])
+        self._data = np.ndarray((self.capacity, RING_FIELDS), dtype=np.float64, buffer=self._shm.buf,
+                                offset=8 * _HEADER_SLOTS)
+        self.owner = create
+
+    @property
+    def count(self):
+        return int(self._header[_COUNT_SLOT])
+
+    @property
+    def updated_at(self):
+        """Wall-clock time (ms) of the last write."""
+        return int(self._header[_UPDATED_SLOT])
+
+    def last_open_time(self):
+        """Open time of the newest candle, or None if the ring is empty."""
+        if self.count == 0:
+            return None
+        return int(self._data[(self._header[_HEAD_SLOT] - 1) % self.capacity, 0])
+
+    def write(self, rows):
+        """
+        Append candles, revising the newest one when a row has its open time
+
+        Rows older than the newest stored candle are ignored.
+
+        Args:
+            rows (np.ndarray): (n, 11) array of candles in klines-endpoint field order, ascending
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        header = self._header
+        header[_SEQ_SLOT] += 1  # odd: write in progress
+        try:
+            for row in rows:
+                count = int(header[_COUNT_SLOT])
+                head = int(header[_HEAD_SLOT])
+                if count:
+                    last = (head - 1) % self.capacity
+                    last_open = self._data[last, 0]
+                    if row[0] == last_open:
+                        self._data[last] = row
+                        continue
+                    if row[0] < last_open:
+                        continue
+                self._data[head] = row
+                header[_HEAD_SLOT] = (head + 1) % self.capacity
+                header[_COUNT_SLOT] = min(count + 1, self.capacity)
+            header[_UPDATED_SLOT] = int(time.time() * 1000)
+        finally:
+            header[_SEQ_SLOT] += 1  # even: consistent
+
+    def read(self, limit=None):
+        """
+        Copy the newest candles, oldest first
+
+        Args:
+            limit (int): Maximum number of candles (all stored candles by default)
+
+        Returns:
+            np.ndarray: (n, 11) array in klines-endpoint field order, or None if no consistent
+                copy could be taken
+        """
+        header = self._header
+        for _ in range(_READ_ATTEMPTS):
+            sequence = int(header[_SEQ_SLOT])
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            count = int(header[_COUNT_SLOT])
+            head = int(header[_HEAD_SLOT])
+            n = count if limit is None else min(limit, count)
+            rows = self._data[(head - n + np.arange(n)) % self.capacity]
+            if int(header[_SEQ_SLOT]) == sequence:
+                return rows
+        return None
+
+    def close(self):
+        """Detach from the segment, removing it if this is the writer."""
+        self._header = None
+        self._data = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class RingReader:
+    """
+    Per-process cache of attached rings, used by the market-data functions.
+
+    A ring that goes stale is detached and looked up again, since a
+    restarted ingester writes to a new segment under the same name while
+    the old mapping stays frozen.
+    """
+
+    def __init__(self, max_age_ms=RING_MAX_AGE_MS):
+        self.max_age_ms = max_age_ms
+        self._rings = {}
+        self._missing = {}  # (symbol, interval) -> time of the failed attach
+        self._lock = threading.Lock()
+
+    def _ring(self, key):
+        """Attached ring for a key, attaching on first use (the caller holds the lock)."""
+        ring = self._rings.get(key)
+        if ring is not None:
+            return ring
+        missing_since = self._missing.get(key)
+        if missing_since is not None and time.monotonic() - missing_since < _MISSING_RETRY_SECONDS:
+            return None
+        try:
+            ring = KlineRingBuffer(key[0], key[1])
+        except (FileNotFoundError, ValueError):
+            self._missing[key] = time.monotonic()
+            return None
+        self._missing.pop(key, None)
+        self._rings[key] = ring
+        return ring
+
+    def read(self, symbol, interval, limit):
+        """
+        Return the newest `limit` candles if a live ring holds that many
+
+        Returns:
+            np.ndarray: (limit, 11) array, or None if the caller should use REST
+        """
+        key = (symbol.upper(), interval)
+        # Copies take microseconds; holding the lock lets a stale ring be closed safely
+        with self._lock:
+            ring = self._ring(key)
+            if ring is None:
+                return None
+            if int(time.time() * 1000) - ring.updated_at > self.max_age_ms:
+                # Detach and look the segment up again later
+                del self._rings[key]
+                self._missing[key] = time.monotonic()
+                ring.close()
+                return None
+            if ring.count < limit:
+                return None
+            return ring.read(limit)
+
+    def latest_price(self, symbol, intervals=('1m', '5m', '15m', '1h')):
+        """Close of the newest candle in the first live ring for the symbol, or None."""
+        for interval in intervals:
+            rows = self.read(symbol, interval, 1)
+            if rows is not None:
+                return float(rows[-1, 4])
+        return None
+
+
+# Shared reader used by utils.binance_api
+ring_reader = RingReader()
@@ -0,0 +1,339 @@
+import os
+import time
+import random
+import logging
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+# Connection pool and retry settings
+POOL_SIZE = int(os.environ.get('MARKET_DATA_POOL_SIZE', 20))
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_RETRIES = int(os.environ.get('MARKET_DATA_MAX_RETRIES', 2))
+BACKOFF_BASE = 0.25  # seconds
+BACKOFF_MAX = 2.0  # seconds
+
+# Circuit breaker settings
+FAILURE_THRESHOLD = int(os.environ.get('MARKET_DATA_FAILURE_THRESHOLD', 5))
+RESET_TIMEOUT = float(os.environ.get('MARKET_DATA_RESET_TIMEOUT', 30))
+
+# Binance request-weight budget per minute (the exchange limit is 6000, keep some headroom)
+BINANCE_WEIGHT_PER_MINUTE = int(os.environ.get('BINANCE_WEIGHT_PER_MINUTE', 4800))
+
+# Status codes worth retrying (upstream failures)
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# Rate-limit responses: never retried, the provider's circuit opens for the Retry-After period instead
+# (418 is Binance's IP ban for clients that keep sending after a 429)
+RATE_LIMIT_STATUS_CODES = {418, 429}
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def retry_after_seconds(headers):
+    """
+    Seconds a Retry-After header asks the client to wait
+
+    Args:
+        headers (Mapping): Response headers
+
+    Returns:
+        float: The delay (an HTTP-date is converted to a delay from now), or None if absent or invalid
+    """
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is open and the call is skipped."""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. The first call after that is let
+    through as a probe (half-open): success closes the circuit, failure opens
+    it again. A rate-limit response opens it at once, for as long as the
+    provider asked (open_for).
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.open_timeout = reset_timeout  # seconds the current opening lasts
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.open_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow_request(self):
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._probing or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.open_timeout = self.reset_timeout
+            self._probing = False
+
+    def open_for(self, seconds):
+        """Open the circuit now for at least `seconds` (e.g. a provider's Retry-After)."""
+        with self._lock:
+            now = time.monotonic()
+            if self.opened_at is not None:
+                # Never shorten an opening already in force
+                seconds = max(seconds, self.opened_at + self.open_timeout - now)
+            self.opened_at = now
+            self.open_timeout = seconds
+            self._probing = False
+
+
+class ProviderStats:
+    """Latency and error counters for one market-data provider."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, error=None):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error is not None:
+                self.errors += 1
+                self.last_error = error
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'avg_latency_ms': (self.total_latency / self.requests * 1000) if self.requests else 0,
+                'max_latency_ms': self.max_latency * 1000,
+                'last_error': self.last_error
+            }
+
+
+class WeightLimiter:
+    """
+    Token bucket for request weight (e.g. Binance's per-minute weight limit).
+
+    acquire() blocks until enough weight has been refilled, so a burst of
+    concurrent requests is spread out instead of tripping a 429/418 ban.
+    """
+
+    def __init__(self, weight_per_minute=BINANCE_WEIGHT_PER_MINUTE):
+        self.capacity = float(weight_per_minute)
+        self.refill_rate = weight_per_minute / 60.0  # weight per second
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def acquire(self, weight=1):
+        """Block until `weight` units are available, then consume them."""
+        while True:
+            wait = self.reserve(weight)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def reserve(self, weight=1):
+        """
+        Consume `weight` units if available, without blocking
+
+        Returns:
+            float: 0 if the weight was consumed, else seconds to wait before trying again
+        """
+        weight = min(weight, self.capacity)
+        with self._lock:
+            self._refill()
+            if self.available >= weight:
+                self.available -= weight
+                return 0
+            return (weight - self.available) / self.refill_rate
+
+    def observe_used(self, used_weight):
+        """Align the bucket with the weight the exchange reports as used this minute."""
+        with self._lock:
+            self._refill()
+            self.available = min(self.available, max(0.0, self.capacity - float(used_weight)))
+
+
+class MarketDataClient:
+    """
+    Shared HTTP client for market-data providers (Binance, CoinGecko).
+
+    Uses one keep-alive connection pool for all calls, applies a timeout to
+    every request, retries transient failures with jittered exponential
+    backoff and keeps a circuit breaker and counters per provider.
+    """
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.breakers = {}
+        self.provider_stats = {}
+        self._lock = threading.Lock()
+
+    def _provider(self, provider):
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker()
+                self.provider_stats[provider] = ProviderStats()
+            return self.breakers[provider], self.provider_stats[provider]
+
+    def is_available(self, provider):
+        """Return False while the provider's circuit is open."""
+        breaker, _ = self._provider(provider)
+        return breaker.state != 'open'
+
+    def get(self, provider, url, params=None, timeout=None):
+        """
+        Perform a GET request against a provider
+
+        Args:
+            provider (str): Provider name used for the circuit breaker and counters
+            url (str): Request URL
+            params (dict): Query parameters
+            timeout (float or tuple): Optional (connect, read) timeout override
+
+        Returns:
+            requests.Response: The final response (non-2xx responses are returned
+                to the caller once retries are exhausted)
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+            requests.RequestException: If the request keeps failing at the network level
+        """
+        breaker, stats = self._provider(provider)
+        if not breaker.allow_request():
+            stats.record_short_circuit()
+            raise CircuitOpenError(f"Circuit open for {provider}, skipping request")
+
+        attempt = 0
+        while True:
+            response = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                stats.record(time.perf_counter() - start, error=str(e))
+                if attempt >= self.max_retries:
+                    breaker.record_failure()
+                    raise
+            else:
+                latency = time.perf_counter() - start
+                if response.status_code in RATE_LIMIT_STATUS_CODES:
+                    self._rate_limited(provider, breaker, stats, response, latency)
+                    return response
+                if response.status_code in RETRY_STATUS_CODES:
+                    stats.record(latency, error=f"HTTP {response.status_code}")
+                    if attempt >= self.max_retries:
+                        breaker.record_failure()
+                        return response
+                else:
+                    # Client errors (bad symbol, bad params) say nothing about provider health
+                    stats.record(latency, error=None if response.ok else f"HTTP {response.status_code}")
+                    breaker.record_success()
+                    return response
+
+            attempt += 1
+            stats.record_retry()
+            time.sleep(self._backoff(attempt, response))
+
+    @staticmethod
+    def _rate_limited(provider, breaker, stats, response, latency):
+        """Stop calling a provider that rate-limited us for the whole Retry-After period."""
+        stats.record(latency, error=f"HTTP {response.status_code}")
+        retry_after = retry_after_seconds(response.headers)
+        breaker.open_for(retry_after if retry_after is not None else breaker.reset_timeout)
+        logger.warning(f"{provider} returned HTTP {response.status_code}; circuit open for "
+                       f"{breaker.open_timeout:.0f}s")
+
+    @staticmethod
+    def _backoff(attempt, response=None):
+        """Full-jitter exponential backoff, honouring a short Retry-After when the provider sends it."""
+        retry_after = retry_after_seconds(response.headers) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def stats(self):
+        """Return per-provider counters and circuit states."""
+        with self._lock:
+            providers = list(self.breakers)
+        return {
+            provider: dict(self.provider_stats[provider].to_dict(), circuit=self.breakers[provider].state)
+            for provider in providers
+        }
+
+
+# Shared client and Binance weight budget used by utils.binance_api
+market_data_client = MarketDataClient()
+binance_weight_limiter = WeightLimiter()
@@ -0,0 +1,114 @@
+import os
+import logging
+import threading
+import numpy as np
+from utils.forecasting import MODEL_TYPES
+
+# Directory for persisted models; persistence is disabled when unset
+PREDICTION_MODEL_DIR = os.environ.get('PREDICTION_MODEL_DIR')
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Keeps one fitted forecasting model per (symbol, interval, lookback, model type).
+
+    Requests for the same key share the model and only pay for an
+    incremental update when new candles have arrived, so the per-request
+    cost is the forecast step. With `directory` set, models are saved there
+    whenever a new candle is added and reloaded after a restart.
+    """
+
+    def __init__(self, directory=PREDICTION_MODEL_DIR):
+        """
+        Args:
+            directory (str): Optional directory for persisted models
+        """
+        self.directory = directory
+        self._models = {}
+        self._forecasts = {}  # key -> (periods, forecast) for the current model state
+        self._locks = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key):
+        symbol, interval, lookback, model_type = key
+        return os.path.join(self.directory, f'{model_type}_{symbol}_{interval}_{lookback}.npz')
+
+    def forecast(self, symbol, interval, df, periods, lookback=30, model_type='linear'):
+        """
+        Sync the model for a key with the latest candles and forecast from it
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1h'
+            df (pd.DataFrame): Columnar OHLCV window ending at the latest candle
+            periods (int): Number of future candles to forecast
+            lookback (int): Number of previous closes per regression row
+            model_type (str): Registered model type
+
+        Returns:
+            np.ndarray: Forecast closes in price units
+        """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}")
+        key = (symbol.upper(), interval, lookback, model_type)
+        timestamps = df['timestamp'].to_numpy(dtype=np.int64)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        with self._key_lock(key):
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(key)
+            if model is None:
+                model = MODEL_TYPES[model_type](lookback)
+                model.fit(timestamps, close)
+                self._save(key, model)
+                changed = True
+            else:
+                previous_last = model.timestamps[-1]
+                changed = model.update(timestamps, close) or key not in self._models
+                if changed and model.timestamps[-1] != previous_last:
+                    self._save(key, model)
+            self._models[key] = model
+
+            # Forecasts only change with the model, so repeated requests reuse the last one
+            cached = self._forecasts.get(key)
+            if changed or cached is None or cached[0] != periods:
+                cached = (periods, model.forecast(periods))
+                self._forecasts[key] = cached
+            return cached[1].copy()
+
+    def _load(self, key):
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as state:
+                return MODEL_TYPES[key[3]].from_state(state)
+        except Exception as e:
+            logger.error(f"Error loading model {key}: {str(e)}")
+            return None
+
+    def _save(self, key, model):
+        if not self.directory:
+            return
+        try:
+            np.savez(self._path(key), **model.state())
+        except Exception as e:
+            logger.error(f"Error saving model {key}: {str(e)}")
+
+    def stats(self):
+        """Return the keys of the models held in memory."""
+        with self._lock:
+            return {'models': [list(key) for key in self._models]}
+
+
+# Shared registry used by utils.prediction_model
+model_registry = ModelRegistry()
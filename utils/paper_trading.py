@@ -0,0 +1,493 @@
+import os
+import json
+import time
+import queue
+import atexit
+import bisect
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+from database import db
+from models import PaperTrade
+from utils.binance_api import get_current_price
+from utils.price_stream import price_broadcaster
+
+# Seconds between write-behind flushes of fills, closes and cancellations
+PAPER_TRADE_FLUSH_SECONDS = float(os.environ.get('PAPER_TRADE_FLUSH_SECONDS', 2))
+
+# A streamed price older than this is refreshed before it is used to fill a market order
+PRICE_MAX_AGE_SECONDS = 10
+
+ORDER_TYPES = ('MARKET', 'LIMIT')
+TRADE_TYPES = ('BUY', 'SELL')
+ACTIVE_STATUSES = ('PENDING', 'OPEN')
+TERMINAL_STATUSES = ('CLOSED', 'CANCELLED')
+
+# Fields written back to paper_trades by the write-behind flush
+FLUSHED_FIELDS = ('price', 'status', 'close_price', 'profit_loss', 'filled_at', 'closed_at')
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class PaperTradingError(ValueError):
+    """Raised for an invalid order or an action on a trade that can no longer change."""
+
+
+class LimitOrderBook:
+    """
+    Pending limit orders for one symbol, kept sorted by limit price.
+
+    A tick at price p fills buy orders limited at or above p and sell
+    orders limited at or below p. Both are contiguous runs at one end of
+    their sorted list, so they are found by bisection and only orders that
+    actually fill are touched.
+    """
+
+    def __init__(self):
+        self.bids = []  # (limit_price, trade_id) of pending BUY orders, ascending
+        self.asks = []  # (limit_price, trade_id) of pending SELL orders, ascending
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def add(self, trade_type, limit_price, trade_id):
+        bisect.insort(self.bids if trade_type == 'BUY' else self.asks, (limit_price, trade_id))
+
+    def remove(self, trade_type, limit_price, trade_id):
+        orders = self.bids if trade_type == 'BUY' else self.asks
+        i = bisect.bisect_left(orders, (limit_price, trade_id))
+        if i < len(orders) and orders[i] == (limit_price, trade_id):
+            del orders[i]
+
+    def fill(self, price):
+        """Remove and return the ids of the orders a trade at `price` fills."""
+        i = bisect.bisect_left(self.bids, (price, -1))
+        filled = [trade_id for _, trade_id in self.bids[i:]]
+        del self.bids[i:]
+        j = bisect.bisect_right(self.asks, (price, float('inf')))
+        filled.extend(trade_id for _, trade_id in self.asks[:j])
+        del self.asks[:j]
+        return filled
+
+
+class PositionBook:
+    """Open positions for one symbol as arrays, so they are marked to market in one pass."""
+
+    def __init__(self):
+        self._positions = {}  # trade_id -> (direction, entry price, quantity)
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, trade_id, trade_type, price, quantity):
+        self._positions[trade_id] = (1.0 if trade_type == 'BUY' else -1.0, price, quantity)
+        self._arrays = None
+
+    def remove(self, trade_id):
+        if self._positions.pop(trade_id, None) is not None:
+            self._arrays = None
+
+    def mark(self, price):
+        """
+        Unrealised P&L of every position at `price`
+
+        Returns:
+            dict: trade_id -> (profit_loss, profit_loss_percent)
+        """
+        if not self._positions:
+            return {}
+        if self._arrays is None:
+            ids = np.fromiter(self._positions, dtype=np.int64, count=len(self._positions))
+            values = np.array(list(self._positions.values()), dtype=np.float64)
+            self._arrays = (ids, values[:, 0], values[:, 1], values[:, 2])
+        ids, direction, entry, quantity = self._arrays
+        profit_loss = direction * (price - entry) * quantity
+        percent = profit_loss / (entry * quantity) * 100
+        return dict(zip(ids.tolist(), zip(profit_loss.tolist(), percent.tolist())))
+
+
+class PaperTradingEngine:
+    """
+    Server-side paper trading against the streaming price feed.
+
+    Pending limit orders and open positions of every user are held in
+    memory, indexed per symbol: each price tick fills only the limit orders
+    it crosses (LimitOrderBook) and P&L is marked over all positions of a
+    symbol at once (PositionBook). While a symbol has orders or positions
+    the engine subscribes to its price feed.
+
+    New orders are inserted immediately so they get an id. Fills, closes
+    and cancellations change the in-memory trade and are written back to
+    paper_trades in batches every `flush_interval` seconds (write-behind).
+    State is loaded from the active rows on first use, so a restart only
+    loses changes not yet flushed.
+
+    The engine's state lives in one process, so the app must be served by a
+    single worker process (threads or asyncio inside it are fine): with
+    several, an order placed through one worker is invisible to the others,
+    which would neither fill nor close it.
+    """
+
+    def __init__(self, flush_interval=PAPER_TRADE_FLUSH_SECONDS):
+        """
+        Args:
+            flush_interval (float): Seconds between write-behind flushes
+        """
+        self.flush_interval = flush_interval
+        self.app = None
+        self._trades = {}  # trade_id -> trade dict (active, or terminal and not yet flushed)
+        self._user_trades = {}  # user_id -> ids of active trades
+        self._books = {}  # symbol -> LimitOrderBook
+        self._positions = {}  # symbol -> PositionBook
+        self._prices = {}  # symbol -> (price, monotonic time)
+        self._feeds = {}  # symbol -> feed thread
+        self._dirty = set()
+        self._loaded = False
+        self._flusher = None
+        self._lock = threading.RLock()
+        self.fills = 0
+        self.flushes = 0
+
+    def init_app(self, app):
+        """Bind the engine to the Flask app whose context the flush thread uses."""
+        self.app = app
+        # Honoured by both gunicorn and uvicorn as the default worker count
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+        if workers > 1:
+            logger.warning(f"WEB_CONCURRENCY={workers}: paper trading keeps its order books in one process "
+                           f"and requires a single worker")
+
+    def _ensure_loaded(self):
+        """Load active trades and start the flush thread on first use (inside an app context)."""
+        with self._lock:
+            if self._loaded:
+                return
+            rows = PaperTrade.query.filter(PaperTrade.status.in_(ACTIVE_STATUSES)).all()
+            for row in rows:
+                self._index(self._trade_from_row(row))
+            self._loaded = True
+            self._flusher = threading.Thread(target=self._run_flusher, name='paper-trade-flush', daemon=True)
+            self._flusher.start()
+            atexit.register(self._flush_on_exit)
+            logger.info(f"Loaded {len(rows)} active paper trades")
+
+    @staticmethod
+    def _trade_from_row(row):
+        trade = row.to_dict()
+        for field in ('created_at', 'filled_at', 'closed_at'):
+            trade[field] = getattr(row, field)
+        trade['user_id'] = row.user_id
+        return trade
+
+    def _index(self, trade):
+        """Add an active trade to the per-user and per-symbol indexes. Must hold the lock."""
+        self._trades[trade['id']] = trade
+        self._user_trades.setdefault(trade['user_id'], set()).add(trade['id'])
+        symbol = trade['symbol']
+        if trade['status'] == 'PENDING':
+            self._books.setdefault(symbol, LimitOrderBook()).add(trade['trade_type'], trade['limit_price'],
+                                                                 trade['id'])
+        else:
+            self._positions.setdefault(symbol, PositionBook()).add(trade['id'], trade['trade_type'],
+                                                                   trade['price'], trade['quantity'])
+        self._ensure_feed(symbol)
+
+    def _market_price(self, symbol):
+        with self._lock:
+            last = self._prices.get(symbol)
+        if last is not None and time.monotonic() - last[1] < PRICE_MAX_AGE_SECONDS:
+            return last[0]
+        price = get_current_price(symbol)
+        with self._lock:
+            self._prices[symbol] = (price, time.monotonic())
+        return price
+
+    def place_order(self, user_id, symbol, trade_type, quantity, order_type='MARKET', limit_price=None,
+                    signal_id=None):
+        """
+        Place a paper order
+
+        Market orders fill at the current price. Limit orders fill when the
+        price reaches the limit, immediately if it already has.
+
+        Args:
+            user_id (int): Owner of the order
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            trade_type (str): 'BUY' or 'SELL'
+            quantity (float): Amount of the base asset
+            order_type (str): 'MARKET' or 'LIMIT'
+            limit_price (float): Limit price, required for limit orders
+            signal_id (int): Optional signal the order follows
+
+        Returns:
+            dict: The trade
+
+        Raises:
+            PaperTradingError: If the order is invalid
+        """
+        symbol = symbol.upper()
+        trade_type = str(trade_type).upper()
+        order_type = str(order_type).upper()
+        if trade_type not in TRADE_TYPES:
+            raise PaperTradingError(f"trade_type must be one of: {', '.join(TRADE_TYPES)}")
+        if order_type not in ORDER_TYPES:
+            raise PaperTradingError(f"order_type must be one of: {', '.join(ORDER_TYPES)}")
+        if quantity is None or float(quantity) <= 0:
+            raise PaperTradingError("quantity must be positive")
+        if order_type == 'LIMIT' and (limit_price is None or float(limit_price) <= 0):
+            raise PaperTradingError("limit_price must be positive for limit orders")
+        self._ensure_loaded()
+
+        price = self._market_price(symbol)
+        marketable = order_type == 'MARKET' or (
+            float(limit_price) >= price if trade_type == 'BUY' else float(limit_price) <= price)
+        now = datetime.utcnow()
+        row = PaperTrade(
+            user_id=user_id,
+            signal_id=signal_id,
+            symbol=symbol,
+            trade_type=trade_type,
+            order_type=order_type,
+            limit_price=float(limit_price) if order_type == 'LIMIT' else None,
+            price=price if marketable else float(limit_price),
+            quantity=float(quantity),
+            status='OPEN' if marketable else 'PENDING',
+            created_at=now,
+            filled_at=now if marketable else None
+        )
+        db.session.add(row)
+        db.session.commit()
+
+        trade = self._trade_from_row(row)
+        with self._lock:
+            self._index(trade)
+            if marketable:
+                self.fills += 1
+        logger.info(f"Paper {order_type} {trade_type} {quantity} {symbol} for user {user_id}: {trade['status']}")
+        return self._public(trade)
+
+    def close_trade(self, user_id, trade_id):
+        """
+        Close an open position at the current price, or cancel a pending order
+
+        Returns:
+            dict: The trade, or None if the user has no such active trade
+
+        Raises:
+            PaperTradingError: If the trade is already closed or cancelled
+        """
+        self._ensure_loaded()
+        with self._lock:
+            trade = self._trades.get(trade_id)
+            if trade is None or trade['user_id'] != user_id:
+                trade = None
+            elif trade['status'] in TERMINAL_STATUSES:
+                raise PaperTradingError(f"Trade {trade_id} is already {trade['status'].lower()}")
+            symbol = trade['symbol'] if trade else None
+        if trade is None:
+            row = PaperTrade.query.filter_by(id=trade_id, user_id=user_id).first()
+            if row is not None:
+                raise PaperTradingError(f"Trade {trade_id} is already {row.status.lower()}")
+            return None
+
+        price = None
+        while True:
+            with self._lock:
+                if trade['status'] == 'PENDING':
+                    self._books[symbol].remove(trade['trade_type'], trade['limit_price'], trade_id)
+                    trade['status'] = 'CANCELLED'
+                elif trade['status'] == 'OPEN':
+                    if price is not None:
+                        self._positions[symbol].remove(trade_id)
+                        direction = 1 if trade['trade_type'] == 'BUY' else -1
+                        trade['status'] = 'CLOSED'
+                        trade['close_price'] = price
+                        trade['profit_loss'] = direction * (price - trade['price']) * trade['quantity']
+                else:
+                    raise PaperTradingError(f"Trade {trade_id} is already {trade['status'].lower()}")
+                if trade['status'] in TERMINAL_STATUSES:
+                    trade['closed_at'] = datetime.utcnow()
+                    self._user_trades[user_id].discard(trade_id)
+                    self._dirty.add(trade_id)
+                    return self._public(trade)
+            # Open position (a pending order may have just filled): fetch the price
+            # outside the lock, then re-check the status
+            price = self._market_price(symbol)
+
+    def on_tick(self, symbol, price):
+        """Record a price and fill the limit orders it crosses."""
+        with self._lock:
+            self._prices[symbol] = (price, time.monotonic())
+            book = self._books.get(symbol)
+            if not book:
+                return
+            now = datetime.utcnow()
+            for trade_id in book.fill(price):
+                trade = self._trades[trade_id]
+                # Resting orders fill at their limit price
+                trade['status'] = 'OPEN'
+                trade['price'] = trade['limit_price']
+                trade['filled_at'] = now
+                self._positions.setdefault(symbol, PositionBook()).add(trade_id, trade['trade_type'],
+                                                                       trade['price'], trade['quantity'])
+                self._dirty.add(trade_id)
+                self.fills += 1
+
+    def active_trades(self, user_id):
+        """
+        A user's pending orders and open positions, positions marked to the latest price
+
+        Returns:
+            list: Trades, newest first
+        """
+        self._ensure_loaded()
+        with self._lock:
+            trades = [self._trades[trade_id] for trade_id in self._user_trades.get(user_id, ())]
+            symbols = {trade['symbol'] for trade in trades if trade['status'] == 'OPEN'}
+        # Price lookups may hit the network, so they run outside the lock
+        prices = {symbol: self._market_price(symbol) for symbol in symbols}
+        with self._lock:
+            marks = {}
+            for symbol, price in prices.items():
+                marks.update(self._positions[symbol].mark(price) if symbol in self._positions else {})
+            result = []
+            for trade in trades:
+                public = self._public(trade)
+                if trade['id'] in marks:
+                    public['profit_loss'], public['profit_loss_percent'] = marks[trade['id']]
+                    public['current_price'] = prices[trade['symbol']]
+                result.append(public)
+        return sorted(result, key=lambda trade: trade['created_at'] or '', reverse=True)
+
+    def trade_history(self, user_id, limit=50):
+        """
+        A user's closed and cancelled trades, including those not flushed yet
+
+        Returns:
+            list: Trades, most recently closed first
+        """
+        rows = PaperTrade.query.filter(
+            PaperTrade.user_id == user_id,
+            PaperTrade.status.in_(TERMINAL_STATUSES)
+        ).order_by(PaperTrade.closed_at.desc()).limit(limit).all()
+        history = {row.id: row.to_dict() for row in rows}
+        with self._lock:
+            for trade in self._trades.values():
+                if trade['user_id'] == user_id and trade['status'] in TERMINAL_STATUSES:
+                    history[trade['id']] = self._public(trade)
+        for trade in history.values():
+            if trade['profit_loss'] is not None and trade['price']:
+                trade['profit_loss_percent'] = trade['profit_loss'] / (trade['price'] * trade['quantity']) * 100
+        return sorted(history.values(), key=lambda trade: trade['closed_at'] or '', reverse=True)[:limit]
+
+    @staticmethod
+    def _public(trade):
+        """Serialise an in-memory trade for the API."""
+        public = {key: value for key, value in trade.items() if key != 'user_id'}
+        for field in ('created_at', 'filled_at', 'closed_at'):
+            public[field] = trade[field].isoformat() if trade[field] else None
+        return public
+
+    def _ensure_feed(self, symbol):
+        """Start consuming a symbol's price feed if it is not already. Must hold the lock."""
+        feed = self._feeds.get(symbol)
+        if feed is None or not feed.is_alive():
+            feed = threading.Thread(target=self._run_feed, args=(symbol,), name=f'paper-feed-{symbol}', daemon=True)
+            self._feeds[symbol] = feed
+            feed.start()
+
+    def _run_feed(self, symbol):
+        """Feed thread: apply a symbol's ticks while it has pending orders or open positions."""
+        subscriber = None
+        try:
+            while True:
+                with self._lock:
+                    if not self._books.get(symbol) and not self._positions.get(symbol):
+                        del self._feeds[symbol]
+                        return
+                if subscriber is None:
+                    subscriber = price_broadcaster.subscribe(symbol, internal=True)
+                    if subscriber is None:
+                        # Refused by the broadcaster; keep the feed registered and try again
+                        logger.warning(f"Price feed for {symbol} refused a paper trading subscription")
+                        time.sleep(1)
+                        continue
+                try:
+                    event = subscriber.get(timeout=1)
+                except queue.Empty:
+                    continue
+                try:
+                    tick = json.loads(event[len(b'data: '):])
+                    self.on_tick(symbol, float(tick['price']))
+                except Exception as e:
+                    logger.error(f"Error applying {symbol} tick to paper trades: {str(e)}")
+        finally:
+            if subscriber is not None:
+                price_broadcaster.unsubscribe(symbol, subscriber)
+
+    def flush(self):
+        """Write changed trades to paper_trades in one bulk UPDATE (inside an app context)."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty = self._dirty
+            self._dirty = set()
+            rows = [dict({field: self._trades[trade_id][field] for field in FLUSHED_FIELDS}, id=trade_id)
+                    for trade_id in dirty]
+        # Open trades carry no realised P&L; leave the portfolio marker's unrealised value alone
+        open_rows = [{field: value for field, value in row.items() if field != 'profit_loss'}
+                     for row in rows if row['status'] == 'OPEN']
+        other_rows = [row for row in rows if row['status'] != 'OPEN']
+        try:
+            for batch in (open_rows, other_rows):
+                if batch:
+                    db.session.execute(db.update(PaperTrade), batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        with self._lock:
+            # Terminal trades are only kept until they are persisted
+            for trade_id in dirty - self._dirty:
+                if self._trades[trade_id]['status'] in TERMINAL_STATUSES:
+                    del self._trades[trade_id]
+            self.flushes += 1
+        return len(rows)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing paper trades: {str(e)}")
+
+    def _flush_on_exit(self):
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing paper trades on exit: {str(e)}")
+
+    def stats(self):
+        """Return engine counters for monitoring."""
+        with self._lock:
+            return {
+                'active_trades': sum(len(ids) for ids in self._user_trades.values()),
+                'pending_orders': sum(len(book) for book in self._books.values()),
+                'open_positions': sum(len(book) for book in self._positions.values()),
+                'unflushed': len(self._dirty),
+                'fills': self.fills,
+                'flushes': self.flushes,
+                'feeds': sorted(self._feeds)
+            }
+
+
+# Shared engine used by the paper trading routes
+paper_trading_engine = PaperTradingEngine()
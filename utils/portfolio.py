@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select, update, delete, func, bindparam
+from database import db, bulk_insert
+from models import PaperTrade, PortfolioSnapshot, TaskRun
+from utils.binance_api import get_current_price
+
+# Seconds between mark-to-market runs (0 disables the background thread)
+PORTFOLIO_MARK_SECONDS = float(os.environ.get('PORTFOLIO_MARK_SECONDS', 30))
+
+# TaskRun name under which each periodic mark-to-market run is claimed
+PORTFOLIO_MARK_TASK = 'portfolio_mark'
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Unrealised P&L is only written to rows that are still open, so a trade closed
+# while a run was in progress keeps its realised P&L
+_mark_open_trade = (
+    update(PaperTrade.__table__)
+    .where(PaperTrade.__table__.c.id == bindparam('trade_id'), PaperTrade.__table__.c.status == 'OPEN')
+    .values(profit_loss=bindparam('pnl'))
+)
+
+
+def mark_to_market(prices=None, run_key=None):
+    """
+    Mark every open paper position to the latest price and refresh the portfolio snapshots
+
+    Open positions are loaded as arrays and valued in one vectorised pass,
+    their unrealised P&L is written back in a single bulk UPDATE, and one
+    PortfolioSnapshot row per user is rebuilt with the unrealised and
+    realised totals. Must be called inside an app context.
+
+    Args:
+        prices (dict): Optional symbol -> price to mark at (latest prices are fetched otherwise)
+        run_key (str): Claim the run under this key before writing, so that of several
+            processes running the same periodic run only one writes
+
+    Returns:
+        dict: 'positions' marked, 'users' snapshotted and the 'prices' used,
+            or None if another process already claimed `run_key`
+    """
+    rows = db.session.execute(
+        select(PaperTrade.id, PaperTrade.user_id, PaperTrade.symbol, PaperTrade.trade_type,
+               PaperTrade.price, PaperTrade.quantity).where(PaperTrade.status == 'OPEN')
+    ).all()
+
+    marked = {}
+    if rows:
+        ids, user_ids, symbols, trade_types, entry, quantity = (np.array(column) for column in zip(*rows))
+        unique_symbols, symbol_index = np.unique(symbols, return_inverse=True)
+        symbol_prices = np.full(len(unique_symbols), np.nan)
+        for i, symbol in enumerate(unique_symbols):
+            try:
+                symbol_prices[i] = prices[symbol] if prices and symbol in prices else get_current_price(symbol)
+            except Exception as e:
+                logger.error(f"Error fetching {symbol} price for mark-to-market: {str(e)}")
+
+        # Positions whose price is unavailable keep their last mark
+        mark = symbol_prices[symbol_index]
+        priced = ~np.isnan(mark)
+        direction = np.where(trade_types == 'BUY', 1.0, -1.0)
+        entry = entry.astype(np.float64)
+        quantity = quantity.astype(np.float64)
+        pnl = direction * (mark - entry) * quantity
+        if not _claim(run_key):
+            return None
+        if priced.any():
+            db.session.execute(_mark_open_trade, [
+                {'trade_id': int(trade_id), 'pnl': float(value)}
+                for trade_id, value in zip(ids[priced], pnl[priced])
+            ])
+
+        users, user_index = np.unique(user_ids.astype(np.int64), return_inverse=True)
+        counts = np.bincount(user_index, minlength=len(users))
+        cost_basis = np.bincount(user_index, weights=entry * quantity, minlength=len(users))
+        unrealized = np.bincount(user_index, weights=np.where(priced, pnl, 0.0), minlength=len(users))
+        for i, user_id in enumerate(users.tolist()):
+            marked[user_id] = (int(counts[i]), float(cost_basis[i]), float(unrealized[i]))
+        prices = {symbol: float(price) for symbol, price in zip(unique_symbols.tolist(), symbol_prices)
+                  if not np.isnan(price)}
+
+    realized = {
+        user_id: (count, total or 0.0)
+        for user_id, count, total in db.session.execute(
+            select(PaperTrade.user_id, func.count(PaperTrade.id), func.sum(PaperTrade.profit_loss))
+            .where(PaperTrade.status == 'CLOSED').group_by(PaperTrade.user_id)
+        )
+    }
+
+    if not rows and not _claim(run_key):
+        return None
+
+    now = datetime.utcnow()
+    prices_json = json.dumps(prices or {})
+    snapshots = []
+    for user_id in set(marked) | set(realized):
+        open_positions, cost_basis, unrealized_pnl = marked.get(user_id, (0, 0.0, 0.0))
+        closed_trades, realized_pnl = realized.get(user_id, (0, 0.0))
+        snapshots.append({
+            'user_id': user_id,
+            'open_positions': open_positions,
+            'cost_basis': cost_basis,
+            'unrealized_pnl': unrealized_pnl,
+            'closed_trades': closed_trades,
+            'realized_pnl': realized_pnl,
+            'prices': prices_json,
+            'marked_at': now
+        })
+    # Readers see either the previous or the new snapshot set
+    db.session.execute(delete(PortfolioSnapshot))
+    bulk_insert(PortfolioSnapshot, snapshots)
+    db.session.commit()
+    return {'positions': len(rows), 'users': len(snapshots), 'prices': prices or {}}
+
+
+def _claim(run_key):
+    """Claim a mark-to-market run before its first write; False (rolled back) if another process has it."""
+    if run_key is None or TaskRun.claim(PORTFOLIO_MARK_TASK, run_key):
+        return True
+    db.session.rollback()
+    return False
+
+
+def get_portfolio_summary(user_id):
+    """
+    Return a user's latest portfolio snapshot
+
+    Args:
+        user_id (int): User ID
+
+    Returns:
+        dict: Snapshot fields (zeros if the user has no snapshot yet)
+    """
+    snapshot = db.session.get(PortfolioSnapshot, user_id)
+    if snapshot is None:
+        snapshot = PortfolioSnapshot(user_id=user_id, open_positions=0, cost_basis=0.0, unrealized_pnl=0.0,
+                                     closed_trades=0, realized_pnl=0.0, marked_at=None)
+    return snapshot.to_dict()
+
+
+class PortfolioMarker:
+    """
+    Runs mark_to_market periodically on a background thread.
+
+    Every web worker runs a marker; each interval's run is claimed as a
+    TaskRun in the transaction that rewrites the snapshots, so only one
+    process performs it and the others skip it.
+    """
+
+    def __init__(self, interval=PORTFOLIO_MARK_SECONDS):
+        """
+        Args:
+            interval (float): Seconds between runs
+        """
+        self.interval = interval
+        self.app = None
+        self.runs = 0
+        self.claimed_elsewhere = 0
+        self.last_run = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind to the Flask app and start the background thread."""
+        self.app = app
+        if self.interval > 0:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='portfolio-marker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    # Workers waking in the same interval share one run key
+                    result = mark_to_market(run_key=str(int(time.time() // self.interval)))
+                    db.session.remove()
+                if result is None:
+                    self.claimed_elsewhere += 1
+                    continue
+                self.runs += 1
+                self.last_run = dict(result, seconds=time.perf_counter() - started)
+                logger.debug(f"Marked {result['positions']} paper positions for {result['users']} users")
+            except Exception as e:
+                logger.error(f"Error in portfolio mark-to-market: {str(e)}")
+
+    def stats(self):
+        """Return run counters for monitoring."""
+        return {'interval': self.interval, 'runs': self.runs, 'claimed_elsewhere': self.claimed_elsewhere,
+                'last_run': self.last_run}
+
+
+# Shared marker started by the app
+portfolio_marker = PortfolioMarker()
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        print(json.dumps(mark_to_market(), indent=2))
@@ -3,96 +3,125 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.linear_model import LinearRegression
 import logging
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.model_registry import model_registry
+from utils.forecasting import ar_forecast, MODEL_TYPES
+from utils.binance_api import interval_to_ms
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def predict_price(data, prediction_periods=24):
+def predict_price(data, prediction_periods=24, symbol=None, interval=None, lookback=30, model='linear'):
     """
-    Simple price prediction model using linear regression
+    Price prediction using one of the models in utils.forecasting (linear regression by default)
+    
+    When a symbol and interval are given the fitted model is taken from the
+    shared model registry and only updated with candles it has not seen;
+    otherwise a model is fitted on `data` for this call alone.
     
     Args:
-        data (list): List of OHLCV data from Binance
+        data (DataFrame or list): Columnar OHLCV data or list of OHLCV data from Binance
         prediction_periods (int): Number of periods to predict
+        symbol (str): Optional trading pair the data belongs to, e.g. 'BTCUSDT'
+        interval (str): Optional kline interval of the data, e.g. '1h'
+        lookback (int): Number of previous closes used to predict the next one
+        model (str): Forecasting model name, one of utils.forecasting.MODEL_TYPES
         
     Returns:
         dict: Dictionary with predictions and confidence levels
     """
     try:
-        # Convert data to DataFrame and prepare features
-        df = pd.DataFrame(data)
+        if model not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model}")
+        
+        # Columnar data is used directly; legacy list input is converted once
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        
+        if symbol is not None and interval is not None:
+            predictions = model_registry.forecast(symbol, interval, df, prediction_periods, lookback, model)
+            return _prediction_result(df, predictions, interval)
+        
+        if model != 'linear':
+            forecaster = MODEL_TYPES[model](lookback)
+            forecaster.fit(df['timestamp'].to_numpy(), df['close'].to_numpy(dtype=np.float64))
+            return _prediction_result(df, forecaster.forecast(prediction_periods), interval)
         
         # Extract only the close prices
-        close_prices = df['close'].astype(float).values.reshape(-1, 1)
+        close_prices = df['close'].to_numpy(dtype=np.float64).reshape(-1, 1)
         
         # Scale the data
         scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_prices = scaler.fit_transform(close_prices)
-        
-        # Prepare the data for training
-        X = []
-        y = []
-        
-        # Use the last 30 data points to predict the next point
-        lookback = 30
+        scaled_prices = scaler.fit_transform(close_prices)[:, 0]
         
-        for i in range(lookback, len(scaled_prices)):
-            X.append(scaled_prices[i-lookback:i, 0])
-            y.append(scaled_prices[i, 0])
-            
-        X = np.array(X)
-        y = np.array(y)
+        # Each row holds the `lookback` prices before its target (a zero-copy view)
+        X = sliding_window_view(scaled_prices[:-1], lookback)
+        y = scaled_prices[lookback:]
         
         # Create and train the linear regression model
         model = LinearRegression()
         model.fit(X, y)
         
-        # Make predictions
-        last_sequence = scaled_prices[-lookback:]
-        
-        predictions = []
-        confidence_levels = []
-        
-        # Generate predictions for the requested number of periods
-        current_sequence = last_sequence.reshape(1, -1)[0]
-        
-        for _ in range(prediction_periods):
-            # Predict the next price
-            next_pred = model.predict(current_sequence.reshape(1, -1))[0]
-            
-            # Add the prediction to our list
-            predictions.append(next_pred)
-            
-            # Simple confidence calculation - decreases with each future prediction
-            # as uncertainty increases
-            confidence = max(0.95 - (0.015 * len(predictions)), 0.5)
-            confidence_levels.append(confidence)
-            
-            # Update the sequence with the new prediction
-            current_sequence = np.append(current_sequence[1:], next_pred)
+        # Roll the model forward from the last `lookback` prices
+        scaled_predictions = ar_forecast(model.coef_, model.intercept_, scaled_prices[-lookback:], prediction_periods)
         
         # Convert predictions back to original scale
-        scaled_predictions = np.array(predictions).reshape(-1, 1)
-        predictions_original_scale = scaler.inverse_transform(
-            np.concatenate((np.zeros((scaled_predictions.shape[0], 0)), scaled_predictions), axis=1)
-        )[:, 0]
+        predictions_original_scale = scaler.inverse_transform(scaled_predictions.reshape(-1, 1))[:, 0]
         
-        # Create time points for the predictions (hours from the last data point)
-        last_timestamp = int(df['timestamp'].iloc[-1])
-        future_timestamps = [last_timestamp + (i+1) * 3600 * 1000 for i in range(prediction_periods)]
-        
-        # Create the results
-        result = {
-            'timestamps': future_timestamps,
-            'predictions': predictions_original_scale.tolist(),
-            'confidence': confidence_levels,
-            'last_price': float(df['close'].iloc[-1])
-        }
-        
-        return result
+        return _prediction_result(df, predictions_original_scale, interval)
     
     except Exception as e:
         logger.error(f"Error in predict_price: {str(e)}")
         raise Exception(f"Prediction error: {str(e)}")
+
+def predict_price_batch(frames, interval, prediction_periods=24, lookback=30, model='linear'):
+    """
+    Forecast many symbols of one interval in a single call
+    
+    Every symbol goes through the shared model registry, so symbols whose
+    model is already fitted only pay for the forecast step.
+    
+    Args:
+        frames (dict): Symbol to columnar OHLCV DataFrame
+        interval (str): Kline interval of the frames, e.g. '1h'
+        prediction_periods (int): Number of periods to predict
+        lookback (int): Number of previous closes used to predict the next one
+        model (str): Forecasting model name, one of utils.forecasting.MODEL_TYPES
+        
+    Returns:
+        dict: Symbol to prediction dictionary (symbols that fail are logged and left out)
+    """
+    results = {}
+    for symbol, df in frames.items():
+        try:
+            predictions = model_registry.forecast(symbol, interval, df, prediction_periods, lookback, model)
+            results[symbol] = _prediction_result(df, predictions, interval)
+        except Exception as e:
+            logger.error(f"Error predicting {symbol} {interval}: {str(e)}")
+    return results
+
+def _prediction_result(df, predictions, interval=None):
+    """Build the predict_price response for forecast closes following the last candle of df."""
+    # Simple confidence calculation - decreases with each future prediction
+    # as uncertainty increases
+    steps = np.arange(1, len(predictions) + 1)
+    confidence_levels = np.maximum(0.95 - 0.015 * steps, 0.5)
+    
+    # Create time points for the predictions, one candle apart from the last data point
+    timestamps = df['timestamp'].to_numpy(dtype=np.int64)
+    if interval is not None:
+        spacing = interval_to_ms(interval)
+    elif len(timestamps) > 1:
+        spacing = int(np.median(np.diff(timestamps)))
+    else:
+        spacing = 3600 * 1000
+    future_timestamps = int(timestamps[-1]) + steps * spacing
+    
+    # Create the results
+    return {
+        'timestamps': future_timestamps.tolist(),
+        'predictions': np.asarray(predictions).tolist(),
+        'confidence': confidence_levels.tolist(),
+        'last_price': float(df['close'].iloc[-1])
+    }
     
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+from utils.binance_api import get_ticker, is_valid_symbol
+
+# Seconds between upstream price requests per symbol
+PRICE_STREAM_INTERVAL = float(os.environ.get('PRICE_STREAM_INTERVAL', 5))
+
+# Seconds an upstream feed keeps running after its last subscriber leaves
+PRICE_STREAM_IDLE_TIMEOUT = float(os.environ.get('PRICE_STREAM_IDLE_TIMEOUT', 30))
+
+# Ticks buffered per connection before the oldest is dropped (slow clients only miss stale prices)
+SUBSCRIBER_QUEUE_SIZE = 8
+
+# Streams served by request threads per process; each holds its thread while open,
+# so this must stay well below the worker's thread count
+PRICE_STREAM_MAX_THREAD_CLIENTS = int(os.environ.get('PRICE_STREAM_MAX_THREAD_CLIENTS', 16))
+
+# Distinct symbols with a running feed per process (each feed is a thread polling the exchange)
+PRICE_STREAM_MAX_FEEDS = int(os.environ.get('PRICE_STREAM_MAX_FEEDS', 32))
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class FeedLimitError(Exception):
+    """Raised when subscribing would start a feed beyond max_feeds."""
+
+
+class AsyncSubscriber:
+    """A subscriber served on an asyncio event loop; ticks are handed over from the feed thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event):
+        """Queue an event from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put_latest, event)
+        except RuntimeError:
+            # The loop has been closed; the subscriber is about to be removed
+            pass
+
+    def _put_latest(self, event):
+        if self.queue.full():
+            # Drop the oldest tick for a client that is not keeping up
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class PriceBroadcaster:
+    """
+    Fans one upstream price feed per symbol out to every connected client.
+
+    The first subscriber for a symbol starts a feed thread that requests the
+    ticker every `poll_interval` seconds, however many clients are
+    connected. Each tick is serialised once as a server-sent event and the
+    same bytes are queued for every subscriber. A feed stops once it has had
+    no subscribers for `idle_timeout` seconds.
+    """
+
+    def __init__(self, poll_interval=PRICE_STREAM_INTERVAL, idle_timeout=PRICE_STREAM_IDLE_TIMEOUT,
+                 max_thread_subscribers=PRICE_STREAM_MAX_THREAD_CLIENTS, max_feeds=PRICE_STREAM_MAX_FEEDS):
+        """
+        Args:
+            poll_interval (float): Seconds between upstream requests per symbol
+            idle_timeout (float): Seconds a feed outlives its last subscriber
+            max_thread_subscribers (int): Most thread-served (queue.Queue) subscribers at once
+            max_feeds (int): Most symbols with a running feed at once (internal subscribers excepted)
+        """
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.max_thread_subscribers = max_thread_subscribers
+        self.max_feeds = max_feeds
+        self.thread_subscribers = 0
+        self.rejected = 0
+        self._subscribers = {}  # symbol -> set of queue.Queue / AsyncSubscriber
+        self._capped = set()  # subscribers counted in thread_subscribers
+        self._feeds = {}  # symbol -> feed thread
+        self._last_event = {}  # symbol -> last serialised tick
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbol, internal=False):
+        """
+        Register a client served by a thread, starting the feed if needed
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            internal (bool): The subscriber is a background consumer in this process (e.g. the
+                paper trading engine), not a request thread, so the stream cap does not apply
+
+        Returns:
+            queue.Queue: Serialised events for this client (the latest tick is queued immediately),
+                or None if the process already serves max_thread_subscribers request streams
+
+        Raises:
+            ValueError: If the symbol is not a valid trading pair
+            FeedLimitError: If the symbol would need a feed beyond max_feeds
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+            if not internal:
+                self._check_feed(symbol)
+                if self.thread_subscribers >= self.max_thread_subscribers:
+                    self.rejected += 1
+                    return None
+                self.thread_subscribers += 1
+                self._capped.add(subscriber)
+            self._add(symbol, subscriber)
+        return subscriber
+
+    def subscribe_async(self, symbol):
+        """
+        Register a client served by the running asyncio event loop, starting the feed if needed
+
+        Async subscribers hold no thread, so they are not capped.
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+
+        Returns:
+            AsyncSubscriber: Await get() for each serialised event
+
+        Raises:
+            ValueError: If the symbol is not a valid trading pair
+            FeedLimitError: If the symbol would need a feed beyond max_feeds
+        """
+        symbol = symbol.upper()
+        subscriber = AsyncSubscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._check_feed(symbol)
+            self._add(symbol, subscriber)
+        return subscriber
+
+    def _check_feed(self, symbol):
+        """Validate a client-supplied symbol and the feed count before subscribing. Must hold the lock."""
+        if not is_valid_symbol(symbol):
+            raise ValueError(f"Invalid symbol {symbol!r}")
+        feed = self._feeds.get(symbol)
+        if (feed is None or not feed.is_alive()) and len(self._feeds) >= self.max_feeds:
+            self.rejected += 1
+            raise FeedLimitError(f"Price streams are limited to {self.max_feeds} symbols at once")
+
+    def _add(self, symbol, subscriber):
+        """Register a subscriber under the lock, queueing the latest tick and starting the feed."""
+        self._subscribers.setdefault(symbol, set()).add(subscriber)
+        if symbol in self._last_event:
+            self._deliver(subscriber, self._last_event[symbol])
+        feed = self._feeds.get(symbol)
+        if feed is None or not feed.is_alive():
+            feed = threading.Thread(target=self._run_feed, args=(symbol,), name=f'price-feed-{symbol}',
+                                    daemon=True)
+            self._feeds[symbol] = feed
+            feed.start()
+
+    def unsubscribe(self, symbol, subscriber):
+        """Remove a client; its symbol's feed stops after the idle timeout if nobody else listens."""
+        with self._lock:
+            subscribers = self._subscribers.get(symbol.upper(), set())
+            subscribers.discard(subscriber)
+            if subscriber in self._capped:
+                self._capped.discard(subscriber)
+                self.thread_subscribers -= 1
+
+    def publish(self, symbol, tick):
+        """Serialise a tick once and queue it for every subscriber of the symbol."""
+        event = f"data: {json.dumps(tick)}\n\n".encode('utf-8')
+        with self._lock:
+            self._last_event[symbol] = event
+            subscribers = list(self._subscribers.get(symbol, ()))
+        for subscriber in subscribers:
+            self._deliver(subscriber, event)
+
+    @staticmethod
+    def _deliver(subscriber, event):
+        if isinstance(subscriber, AsyncSubscriber):
+            subscriber.offer(event)
+            return
+        try:
+            subscriber.put_nowait(event)
+        except queue.Full:
+            # Drop the oldest tick for a client that is not keeping up
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def _run_feed(self, symbol):
+        """Feed thread: poll the ticker while the symbol has subscribers."""
+        logger.info(f"Starting price feed for {symbol}")
+        idle_since = None
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                if self._subscribers.get(symbol):
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = started
+                elif started - idle_since >= self.idle_timeout:
+                    # Deregister under the lock so a new subscriber starts a fresh feed
+                    del self._feeds[symbol]
+                    self._subscribers.pop(symbol, None)
+                    self._last_event.pop(symbol, None)
+                    logger.info(f"Stopping idle price feed for {symbol}")
+                    return
+
+            if idle_since is None:
+                try:
+                    ticker = get_ticker(symbol)
+                    self.publish(symbol, dict(ticker, symbol=symbol, timestamp=int(time.time() * 1000)))
+                except Exception as e:
+                    logger.error(f"Error in price feed for {symbol}: {str(e)}")
+
+            time.sleep(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def stats(self):
+        """Return the number of subscribers per symbol with a running feed, and the thread-served stream cap."""
+        with self._lock:
+            return {
+                'symbols': {symbol: len(self._subscribers.get(symbol, ())) for symbol in self._feeds},
+                'thread_subscribers': self.thread_subscribers,
+                'max_thread_subscribers': self.max_thread_subscribers,
+                'max_feeds': self.max_feeds,
+                'rejected': self.rejected
+            }
+
+
+# Shared broadcaster used by the streaming routes (Flask and ASGI)
+price_broadcaster = PriceBroadcaster()
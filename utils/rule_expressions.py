@@ -0,0 +1,362 @@
+import re
+import json
+import logging
+import operator
+from functools import lru_cache
+import numpy as np
+
+# Compiled expressions and rule sets kept per process
+RULE_CACHE_SIZE = 1024
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+      | (?P<op>>=|<=|==|!=|>|<|\+|-|\*|/|\(|\))
+    )""", re.VERBOSE)
+
+_KEYWORDS = {'and', 'or', 'not', 'true', 'false'}
+
+_COMPARISONS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+_ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv
+}
+
+
+class RuleSyntaxError(ValueError):
+    """Raised when a rule expression cannot be parsed."""
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise RuleSyntaxError(f"Unexpected character {text[position:].lstrip()[:1]!r} at {position} in {text!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.lower() in _KEYWORDS:
+            kind, value = 'keyword', value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser producing tuple AST nodes
+
+    Precedence, loosest first: OR, AND, NOT, comparisons, + -, * /, unary minus.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleSyntaxError("Empty rule expression")
+        node = self._or()
+        if self.index < len(self.tokens):
+            raise RuleSyntaxError(f"Unexpected {self.tokens[self.index][1]!r} in {self.text!r}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else (None, None)
+
+    def _accept(self, *values):
+        kind, value = self._peek()
+        if kind in ('keyword', 'op') and value in values:
+            self.index += 1
+            return value
+        return None
+
+    def _or(self):
+        node = self._and()
+        while self._accept('or'):
+            node = ('or', node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._accept('and'):
+            node = ('and', node, self._not())
+        return node
+
+    def _not(self):
+        if self._accept('not'):
+            return ('not', self._not())
+        return self._comparison()
+
+    def _comparison(self):
+        node = self._sum()
+        op = self._accept(*_COMPARISONS)
+        if op:
+            node = ('compare', op, node, self._sum())
+        return node
+
+    def _sum(self):
+        node = self._term()
+        while True:
+            op = self._accept('+', '-')
+            if not op:
+                return node
+            node = ('arith', op, node, self._term())
+
+    def _term(self):
+        node = self._unary()
+        while True:
+            op = self._accept('*', '/')
+            if not op:
+                return node
+            node = ('arith', op, node, self._unary())
+
+    def _unary(self):
+        if self._accept('-'):
+            return ('neg', self._unary())
+        return self._atom()
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind is None:
+            raise RuleSyntaxError(f"Unexpected end of {self.text!r}")
+        self.index += 1
+        if kind == 'number':
+            return ('const', float(value))
+        if kind == 'string':
+            return ('const', value[1:-1])
+        if kind == 'keyword' and value in ('true', 'false'):
+            return ('const', value == 'true')
+        if kind == 'name':
+            return ('name', value)
+        if value == '(':
+            node = self._or()
+            if not self._accept(')'):
+                raise RuleSyntaxError(f"Missing ')' in {self.text!r}")
+            return node
+        raise RuleSyntaxError(f"Unexpected {value!r} in {self.text!r}")
+
+
+def _truthy(value):
+    """Element-wise truth: NaN, 0, '' and None are false."""
+    array = np.asarray(value)
+    if array.dtype.kind == 'f':
+        return ~np.isnan(array) & (array != 0)
+    if array.dtype.kind in 'US':
+        return array != ''
+    if array.dtype.kind == 'O':
+        return np.vectorize(lambda item: bool(item) and item == item, otypes=[bool])(array)
+    return array.astype(bool)
+
+
+def _compile_node(node):
+    """Turn an AST node into a closure over a values mapping."""
+    kind = node[0]
+    if kind == 'const':
+        constant = node[1]
+        return lambda values: constant
+    if kind == 'name':
+        name = node[1]
+        # Names missing from the values behave like NaN: comparisons with them are false
+        return lambda values: values.get(name, np.nan)
+    if kind == 'not':
+        operand = _compile_node(node[1])
+        return lambda values: ~_truthy(operand(values))
+    if kind in ('and', 'or'):
+        left, right = _compile_node(node[1]), _compile_node(node[2])
+        combine = np.logical_and if kind == 'and' else np.logical_or
+        return lambda values: combine(_truthy(left(values)), _truthy(right(values)))
+    if kind == 'neg':
+        operand = _compile_node(node[1])
+        return lambda values: -np.asarray(operand(values), dtype=np.float64)
+    if kind == 'arith':
+        function = _ARITHMETIC[node[1]]
+        left, right = _compile_node(node[2]), _compile_node(node[3])
+        return lambda values: function(np.asarray(left(values), dtype=np.float64),
+                                       np.asarray(right(values), dtype=np.float64))
+    if kind == 'compare':
+        function = _COMPARISONS[node[1]]
+        left, right = _compile_node(node[2]), _compile_node(node[3])
+
+        def compare(values):
+            try:
+                return function(np.asarray(left(values)), np.asarray(right(values)))
+            except TypeError:
+                # e.g. a string compared with a number
+                return False
+        return compare
+    raise RuleSyntaxError(f"Unknown node {kind!r}")
+
+
+def _names(node):
+    if node[0] == 'name':
+        return {node[1]}
+    return set().union(*(_names(child) for child in node[1:] if isinstance(child, tuple)))
+
+
+class CompiledRule:
+    """A parsed rule expression, evaluable on scalars or whole arrays."""
+
+    def __init__(self, text):
+        """
+        Args:
+            text (str): Expression, e.g. "(rsi < 30 OR close < sma_50 * 0.95) AND NOT candle_doji"
+
+        Raises:
+            RuleSyntaxError: If the expression cannot be parsed
+        """
+        self.text = text
+        self.ast = _Parser(text).parse()
+        self.names = frozenset(_names(self.ast))
+        self._function = _compile_node(self.ast)
+
+    def evaluate(self, values, length=None):
+        """
+        Evaluate the rule
+
+        Args:
+            values (dict): Name -> scalar or NumPy array (arrays must share one length)
+            length (int): Row count when evaluating over arrays
+
+        Returns:
+            bool or np.ndarray: A bool for scalar values, else a boolean array of `length`
+        """
+        try:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = _truthy(self._function(values))
+        except (TypeError, ValueError):
+            # e.g. arithmetic on a string signal
+            result = np.False_
+        if length is None:
+            return bool(np.all(result))
+        return np.broadcast_to(result, (length,))
+
+    def __repr__(self):
+        return f'<CompiledRule {self.text!r}>'
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def compile_rule(text):
+    """
+    Parse a rule expression once; later calls with the same text reuse it
+
+    Args:
+        text (str): Rule expression
+
+    Returns:
+        CompiledRule: The compiled rule
+
+    Raises:
+        RuleSyntaxError: If the expression cannot be parsed
+    """
+    return CompiledRule(text)
+
+
+class RuleSet:
+    """
+    A strategy's signal_combination_rules, compiled
+
+    Each rule is {'condition': expression, 'signal': name, 'weight': float};
+    the signal with the largest total weight of matching rules wins, and its
+    share of the matched weight is the confidence.
+    """
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (list): signal_combination_rules dicts
+        """
+        self.rules = []
+        for rule in rules:
+            try:
+                compiled = compile_rule(rule.get('condition') or '')
+            except RuleSyntaxError as e:
+                logger.warning(f"Skipping invalid rule: {str(e)}")
+                continue
+            self.rules.append((compiled, rule.get('signal'), rule.get('weight', 1.0)))
+        self.names = frozenset().union(*(compiled.names for compiled, _, _ in self.rules))
+        # Signals in order of first appearance, for array results
+        self.signals = list(dict.fromkeys(signal for _, signal, _ in self.rules))
+
+    def matches(self, values):
+        """
+        Evaluate every rule on scalar values
+
+        Returns:
+            list: (CompiledRule, signal, weight) for the rules that hold
+        """
+        return [rule for rule in self.rules if rule[0].evaluate(values)]
+
+    def combine_many(self, values, length):
+        """
+        Combine the rules over whole indicator arrays, one result per row
+
+        Gives the same signal and confidence per row as combining the rules on
+        that row's scalar values.
+
+        Args:
+            values (dict): Name -> NumPy array of `length` (or scalar)
+            length (int): Row count
+
+        Returns:
+            tuple: (signal_type, confidence) arrays; rows where no rule holds are 'HOLD' with 0.0
+        """
+        if not self.rules:
+            return np.full(length, 'HOLD', dtype=object), np.zeros(length)
+
+        signal_index = {signal: i for i, signal in enumerate(self.signals)}
+        weights = np.zeros((len(self.signals), length))
+        first_match = np.full((len(self.signals), length), len(self.rules))
+        matched_any = np.zeros(length, dtype=bool)
+        for position, (compiled, signal, weight) in enumerate(self.rules):
+            mask = compiled.evaluate(values, length)
+            row = signal_index[signal]
+            weights[row] += np.where(mask, weight, 0.0)
+            first_match[row] = np.where(mask & (first_match[row] == len(self.rules)), position, first_match[row])
+            matched_any |= mask
+
+        # Largest weight wins; ties go to the signal whose first matching rule comes first
+        candidates = (weights == weights.max(axis=0)) & (first_match < len(self.rules))
+        winner = np.where(candidates, first_match, len(self.rules) + 1).argmin(axis=0)
+        total = weights.sum(axis=0)
+        best = weights[winner, np.arange(length)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            confidence = np.where(matched_any & (total > 0), best / total, 0.0)
+        signal_type = np.where(matched_any, np.array(self.signals, dtype=object)[winner], 'HOLD')
+        return signal_type.astype(object), confidence
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _rule_set_for_json(rules_json):
+    return RuleSet(json.loads(rules_json))
+
+
+def rule_set_for(rules):
+    """
+    Return the compiled RuleSet for a list of rules, reusing it across calls and strategies
+
+    Args:
+        rules (list): signal_combination_rules dicts
+
+    Returns:
+        RuleSet: The compiled rules
+    """
+    return _rule_set_for_json(json.dumps(rules or [], sort_keys=True, default=str))
@@ -0,0 +1,137 @@
+import time
+import logging
+import threading
+import numpy as np
+from utils.binance_api import get_market_frame, interval_to_ms, DEFAULT_SYMBOL
+from utils.technical_indicators import calculate_latest_rsi_macd
+
+# Closed candles the default signal is evaluated on
+SIGNAL_LOOKBACK = 100
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def default_signal_rules(indicators):
+    """
+    Apply the default RSI/MACD rules to the latest indicator values
+
+    Args:
+        indicators (dict): Latest 'rsi', 'macd' and 'macd_signal' values
+
+    Returns:
+        tuple: (signal_type, reasons) where signal_type is 'BUY', 'SELL' or None
+    """
+    rsi = indicators['rsi']
+    macd = indicators['macd']
+    signal = indicators['macd_signal']
+    signal_type = None
+    reason = []
+    if rsi < 30:
+        reason.append("RSI oversold")
+        signal_type = "BUY"
+    elif rsi > 70:
+        reason.append("RSI overbought")
+        signal_type = "SELL"
+    if macd > signal and macd > 0:
+        reason.append("MACD bullish crossover")
+        signal_type = "BUY"
+    elif macd < signal and macd < 0:
+        reason.append("MACD bearish crossover")
+        signal_type = "SELL"
+    return signal_type, reason
+
+
+class DefaultSignalCache:
+    """
+    Shares the default RSI/MACD signal evaluation across users.
+
+    The signal is evaluated on closed candles only, so its result is valid
+    until the next candle closes. One evaluation per (symbol, interval) is
+    kept, and concurrent requests for an expired entry wait for a single
+    recomputation instead of each fetching and computing it.
+    """
+
+    def __init__(self, lookback=SIGNAL_LOOKBACK):
+        """
+        Args:
+            lookback (int): Number of closed candles the indicators are computed on
+        """
+        self.lookback = lookback
+        self._entries = {}  # (symbol, interval) -> (expires_at, evaluation)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _lookup(self, key, now_ms):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now_ms:
+            return entry[1]
+        return None
+
+    def get(self, symbol=DEFAULT_SYMBOL, interval='1h'):
+        """
+        Return the default signal evaluation for the last closed candle
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1h'
+
+        Returns:
+            dict: 'symbol', 'interval', 'candle_time', 'price', 'rsi', 'macd',
+                'macd_signal', 'signal_type' (BUY, SELL or None) and 'reason'
+        """
+        key = (symbol.upper(), interval)
+        evaluation = self._lookup(key, int(time.time() * 1000))
+        if evaluation is not None:
+            self.hits += 1
+            return evaluation
+
+        with self._key_lock(key):
+            # Another request may have recomputed it while we waited
+            now_ms = int(time.time() * 1000)
+            evaluation = self._lookup(key, now_ms)
+            if evaluation is not None:
+                self.hits += 1
+                return evaluation
+
+            self.misses += 1
+            evaluation, expires_at = self._evaluate(key[0], interval, now_ms)
+            self._entries[key] = (expires_at, evaluation)
+            return evaluation
+
+    def _evaluate(self, symbol, interval, now_ms):
+        """Compute the signal on the latest closed candles and the time it stays valid until."""
+        # One extra candle for the one still open
+        data = get_market_frame(symbol, interval, self.lookback + 1)
+        closed = data[data['close_time'].to_numpy() < now_ms]
+        if len(closed) < 2:
+            raise ValueError(f"Not enough closed {symbol} {interval} candles to evaluate a signal")
+
+        indicators = calculate_latest_rsi_macd(closed['close'].to_numpy(dtype=np.float64)[-self.lookback:])
+        signal_type, reason = default_signal_rules(indicators)
+        last_close_time = int(closed['close_time'].iloc[-1])
+        evaluation = dict(
+            indicators,
+            symbol=symbol,
+            interval=interval,
+            candle_time=int(closed['timestamp'].iloc[-1]),
+            price=float(closed['close'].iloc[-1]),
+            signal_type=signal_type,
+            reason=', '.join(reason)
+        )
+        # Valid until the candle after the evaluated one has closed
+        return evaluation, last_close_time + 1 + interval_to_ms(interval)
+
+    def stats(self):
+        """Return cache counters for monitoring."""
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared cache used by the API routes
+default_signal_cache = DefaultSignalCache()
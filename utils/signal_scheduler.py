@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque, defaultdict
+from datetime import datetime
+from sqlalchemy import select
+from database import db, bulk_insert
+from models import TradingStrategy, TradingSignal, TaskRun, BatchAdvancedAnalyzer
+from utils.binance_api import get_market_frame, interval_to_ms, INTERVAL_MS, DEFAULT_SYMBOL
+
+# Set SIGNAL_SCHEDULER_ENABLED=0 to stop the app from starting the scheduler thread
+# (every worker process may run it: each candle's signals are claimed by exactly one)
+SIGNAL_SCHEDULER_ENABLED = os.environ.get('SIGNAL_SCHEDULER_ENABLED', '1') != '0'
+
+# Closed candles each cycle analyses
+SIGNAL_SCHEDULER_LOOKBACK = int(os.environ.get('SIGNAL_SCHEDULER_LOOKBACK', 200))
+
+# Longest sleep between checks, so new strategies and intervals are picked up
+SIGNAL_SCHEDULER_POLL_SECONDS = float(os.environ.get('SIGNAL_SCHEDULER_POLL_SECONDS', 30))
+
+# Wait after a candle closes before fetching it, giving the exchange time to publish it
+SIGNAL_SCHEDULER_CLOSE_DELAY_SECONDS = float(os.environ.get('SIGNAL_SCHEDULER_CLOSE_DELAY_SECONDS', 2))
+
+# Cycles kept for the stats endpoint
+SIGNAL_SCHEDULER_HISTORY = 50
+
+# TaskRun name under which each candle's signal generation is claimed
+SIGNAL_TASK = 'signals'
+
+# Weekly candles open on Monday; the epoch was a Thursday
+_WEEK_OFFSET_MS = 4 * 24 * 60 * 60 * 1000
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def next_candle_close(interval, now_ms):
+    """
+    Time in milliseconds at which the candle open at `now_ms` closes
+
+    Args:
+        interval (str): Kline interval, e.g. '1h' ('1M' is approximated as 30 days)
+        now_ms (int): Current time in milliseconds
+
+    Returns:
+        int: Close boundary in milliseconds
+    """
+    length = interval_to_ms(interval)
+    offset = _WEEK_OFFSET_MS if interval == '1w' else 0
+    return (now_ms - offset) // length * length + offset + length
+
+
+class SignalScheduler:
+    """
+    Generates trading signals for every active strategy when a candle closes.
+
+    Active strategies are grouped by the (symbol, interval) in their
+    parameters. When a subscription's candle closes, its market data is
+    fetched once, all of its strategies are evaluated together by a
+    BatchAdvancedAnalyzer (each unique indicator computed once), and the
+    resulting BUY/SELL signals are inserted in one bulk transaction.
+
+    Every web worker runs a scheduler; the transaction also claims the
+    (symbol, interval, candle) as a TaskRun, so only one process stores
+    each candle's signals and the others skip it.
+    """
+
+    def __init__(self, lookback=SIGNAL_SCHEDULER_LOOKBACK, poll_seconds=SIGNAL_SCHEDULER_POLL_SECONDS,
+                 close_delay=SIGNAL_SCHEDULER_CLOSE_DELAY_SECONDS):
+        """
+        Args:
+            lookback (int): Closed candles analysed per cycle
+            poll_seconds (float): Longest sleep between checks
+            close_delay (float): Seconds to wait after a candle closes
+        """
+        self.lookback = lookback
+        self.poll_seconds = poll_seconds
+        self.close_delay_ms = int(close_delay * 1000)
+        self.app = None
+        self.cycles = 0
+        self.errors = 0
+        self.claimed_elsewhere = 0
+        self.history = deque(maxlen=SIGNAL_SCHEDULER_HISTORY)
+        self._next_close = {}  # (symbol, interval) -> close time of the candle to process next
+        self._last_candle = {}  # (symbol, interval) -> open time of the last candle processed
+        self._parameters = {}  # strategy id -> (updated_at, parsed parameters)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind to the Flask app and start the scheduler thread."""
+        self.app = app
+        if SIGNAL_SCHEDULER_ENABLED:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='signal-scheduler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    sleep_ms = self.run_due()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Error in signal scheduler: {str(e)}")
+                sleep_ms = self.poll_seconds * 1000
+            time.sleep(min(max(sleep_ms / 1000, 1.0), self.poll_seconds))
+
+    def subscriptions(self):
+        """
+        Load the active strategies grouped by the (symbol, interval) they trade
+
+        Returns:
+            dict: (symbol, interval) -> list of (user_id, parameters) pairs
+        """
+        rows = db.session.execute(
+            select(TradingStrategy.id, TradingStrategy.user_id, TradingStrategy.parameters, TradingStrategy.updated_at)
+            .where(TradingStrategy.is_active.is_(True))
+        ).all()
+
+        grouped = defaultdict(list)
+        parameters_by_id = {}
+        for strategy_id, user_id, parameters, updated_at in rows:
+            # Parameters are only re-parsed when the strategy changes
+            cached = self._parameters.get(strategy_id)
+            if cached is None or cached[0] != updated_at:
+                try:
+                    cached = (updated_at, json.loads(parameters))
+                except (TypeError, ValueError):
+                    logger.warning(f"Skipping strategy {strategy_id}: invalid parameters JSON")
+                    continue
+            parameters_by_id[strategy_id] = cached
+            params = cached[1]
+            interval = params.get('interval', '1h')
+            if interval not in INTERVAL_MS:
+                logger.warning(f"Skipping strategy {strategy_id}: unsupported interval {interval!r}")
+                continue
+            grouped[(params.get('symbol', DEFAULT_SYMBOL).upper(), interval)].append((user_id, params))
+        self._parameters = parameters_by_id
+        return grouped
+
+    def run_due(self, now_ms=None):
+        """
+        Run a cycle for every subscription whose candle has closed
+
+        Args:
+            now_ms (int): Current time in milliseconds (defaults to the clock)
+
+        Returns:
+            float: Milliseconds until the next subscription is due
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        grouped = self.subscriptions()
+        for key in list(self._next_close):
+            if key not in grouped:
+                del self._next_close[key]
+
+        for key, strategies in grouped.items():
+            symbol, interval = key
+            # A new subscription starts at the next close rather than firing at once
+            next_close = self._next_close.setdefault(key, next_candle_close(interval, now_ms))
+            if now_ms < next_close + self.close_delay_ms:
+                continue
+            try:
+                cycle = self.run_cycle(symbol, interval, strategies, now_ms)
+            except Exception as e:
+                self.errors += 1
+                db.session.rollback()
+                logger.error(f"Error generating {symbol} {interval} signals: {str(e)}")
+                cycle = None
+            # Retry until the closed candle is published, but never past the following close
+            if cycle is not None or now_ms >= next_close + interval_to_ms(interval):
+                self._next_close[key] = next_candle_close(interval, now_ms)
+
+        if not self._next_close:
+            return self.poll_seconds * 1000
+        return min(self._next_close.values()) + self.close_delay_ms - now_ms
+
+    def run_cycle(self, symbol, interval, strategies, now_ms=None):
+        """
+        Evaluate a subscription's strategies on its latest closed candle and store the signals
+
+        Args:
+            symbol (str): Trading pair, e.g. 'BTCUSDT'
+            interval (str): Kline interval, e.g. '1h'
+            strategies (list): (user_id, parameters) pairs
+            now_ms (int): Current time in milliseconds (defaults to the clock)
+
+        Returns:
+            dict: Cycle metrics ('claimed_elsewhere' if another process handled the candle),
+                or None if no new closed candle was available yet
+        """
+        started = time.perf_counter()
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        key = (symbol, interval)
+
+        # One extra candle for the one still open
+        data = get_market_frame(symbol, interval, self.lookback + 1)
+        closed = data[data['close_time'].to_numpy() < now_ms]
+        if closed.empty:
+            return None
+        candle_time = int(closed['timestamp'].iloc[-1])
+        if candle_time <= self._last_candle.get(key, -1):
+            return None
+        run_key = f'{symbol}:{interval}:{candle_time}'
+        if TaskRun.is_claimed(SIGNAL_TASK, run_key):
+            self._last_candle[key] = candle_time
+            self.claimed_elsewhere += 1
+            return {'symbol': symbol, 'interval': interval, 'candle_time': candle_time, 'claimed_elsewhere': True}
+        fetched = time.perf_counter()
+
+        analyzer = BatchAdvancedAnalyzer()
+        analyses = analyzer.analyze_many(closed, [params for _, params in strategies])
+        analyzed = time.perf_counter()
+
+        # HOLD means no rule matched; storing one per strategy per candle would only bloat the table
+        price = float(closed['close'].iloc[-1])
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                'user_id': user_id,
+                'signal_type': analysis['signal_type'],
+                'price': price,
+                'confidence': analysis['confidence'],
+                'reason': analysis['reason'],
+                'created_at': created_at
+            }
+            for (user_id, _), analysis in zip(strategies, analyses)
+            if analysis['signal_type'] != 'HOLD'
+        ]
+        if not TaskRun.claim(SIGNAL_TASK, run_key):
+            # Another worker stored this candle's signals while we were analysing it
+            db.session.rollback()
+            self._last_candle[key] = candle_time
+            self.claimed_elsewhere += 1
+            return {'symbol': symbol, 'interval': interval, 'candle_time': candle_time, 'claimed_elsewhere': True}
+        bulk_insert(TradingSignal, rows)
+        db.session.commit()
+        finished = time.perf_counter()
+
+        self._last_candle[key] = candle_time
+        cycle = dict(
+            analyzer.last_run,
+            symbol=symbol,
+            interval=interval,
+            candle_time=candle_time,
+            signals=len(rows),
+            fetch_seconds=fetched - started,
+            analyze_seconds=analyzed - fetched,
+            insert_seconds=finished - analyzed,
+            total_seconds=finished - started,
+            # How long after the candle closed its signals were stored
+            lag_seconds=time.time() - (int(closed['close_time'].iloc[-1]) + 1) / 1000
+        )
+        self.cycles += 1
+        self.history.append(cycle)
+        logger.info(f"Generated {len(rows)} {symbol} {interval} signals for {len(strategies)} strategies "
+                    f"in {cycle['total_seconds']:.3f}s")
+        return cycle
+
+    def stats(self):
+        """Return cycle counters and the most recent cycle metrics for monitoring."""
+        return {
+            'cycles': self.cycles,
+            'errors': self.errors,
+            'claimed_elsewhere': self.claimed_elsewhere,
+            'subscriptions': [
+                {'symbol': symbol, 'interval': interval, 'next_close': next_close}
+                for (symbol, interval), next_close in self._next_close.items()
+            ],
+            'recent_cycles': list(self.history)
+        }
+
+
+# Shared scheduler started by the app
+signal_scheduler = SignalScheduler()
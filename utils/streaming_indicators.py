@@ -0,0 +1,311 @@
+import math
+import threading
+from collections import deque, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Number of indicator values kept per series (matches the Binance klines limit)
+DEFAULT_HISTORY = 1000
+
+# Engines kept by the registry (one per symbol, interval and window length), least recently used evicted
+MAX_ENGINES = 128
+
+
+class _RollingWindow:
+    """Fixed-size window with a running sum, supporting revision of the newest value."""
+
+    __slots__ = ('size', 'values', 'total', '_pushes')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self._pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def push(self, value: float):
+        if self.full:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self._pushes += 1
+        # Re-sum exactly once per window turnover so rounding drift stays bounded
+        if self._pushes % self.size == 0:
+            self.total = math.fsum(self.values)
+
+    def revise(self, value: float):
+        self.total += value - self.values[-1]
+        self.values[-1] = value
+
+    def mean(self) -> float:
+        """Window mean, or 0 while the window is filling (like rolling().mean().fillna(0))."""
+        return self.total / self.size if self.full else 0.0
+
+    def std(self) -> float:
+        """Sample standard deviation, or 0 while the window is filling."""
+        if not self.full:
+            return 0.0
+        mean = self.total / self.size
+        return math.sqrt(sum((v - mean) ** 2 for v in self.values) / (self.size - 1))
+
+
+class _Ema:
+    """Recursive EMA equivalent to ewm(span=window, adjust=False), supporting revision."""
+
+    __slots__ = ('alpha', 'value', 'prev')
+
+    def __init__(self, window: int):
+        self.alpha = 2.0 / (window + 1)
+        self.value = None
+        self.prev = None
+
+    def push(self, x: float) -> float:
+        self.prev = self.value
+        return self.revise(x)
+
+    def revise(self, x: float) -> float:
+        self.value = x if self.prev is None else self.alpha * x + (1 - self.alpha) * self.prev
+        return self.value
+
+
+class StreamingIndicators:
+    """
+    Stateful, incremental version of TechnicalIndicators.calculate_all.
+
+    Keeps rolling sums, EMA state, RSI gain/loss averages and ATR state for one
+    (symbol, interval) series. Each call to update() costs O(1) in the length
+    of the history: a candle with a new timestamp is appended, a candle with
+    the same timestamp as the last one revises it (e.g. the still-open candle).
+
+    Values match TechnicalIndicators over the same candle sequence, including
+    its warm-up conventions (0 until a rolling window is full, RSI starting at
+    the second candle).
+    """
+
+    SERIES = [
+        'sma_20', 'sma_50', 'sma_200', 'ema_12', 'ema_26', 'macd', 'macd_signal',
+        'macd_histogram', 'rsi', 'bollinger_upper', 'bollinger_middle',
+        'bollinger_lower', 'atr'
+    ]
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        """
+        Args:
+            history: Number of values kept for each indicator series.
+        """
+        self.history = history
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.count = 0
+        self._last_candle = None
+        self._prev_close = None
+
+        self._sma = {20: _RollingWindow(20), 50: _RollingWindow(50), 200: _RollingWindow(200)}
+        self._ema_12 = _Ema(12)
+        self._ema_26 = _Ema(26)
+        self._macd_signal = _Ema(9)
+        self._gains = _RollingWindow(14)
+        self._losses = _RollingWindow(14)
+        self._true_ranges = _RollingWindow(14)
+        self.values = {name: deque(maxlen=history) for name in self.SERIES}
+
+    def update(self, candle) -> Dict[str, float]:
+        """
+        Feed one candle (new or a revision of the last one).
+
+        Args:
+            candle: Mapping with 'timestamp', 'high', 'low' and 'close' keys.
+
+        Returns:
+            Dict[str, float]: Latest value of every indicator.
+
+        Raises:
+            ValueError: If the candle is older than the last candle seen.
+        """
+        return self._update(int(candle['timestamp']), float(candle['high']),
+                            float(candle['low']), float(candle['close']))
+
+    def _update(self, timestamp: int, high: float, low: float, close: float) -> Dict[str, float]:
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Candle {timestamp} is older than the last candle {self.last_timestamp}")
+
+        revise = timestamp == self.last_timestamp
+        if revise and self._last_candle == (high, low, close):
+            return self.latest()
+
+        if revise:
+            prev_close = self._prev_close
+        else:
+            prev_close = self._last_candle[2] if self._last_candle else None
+            self._prev_close = prev_close
+            self.last_timestamp = timestamp
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.count += 1
+        self._last_candle = (high, low, close)
+
+        def feed(window, value):
+            if revise:
+                window.revise(value)
+            else:
+                window.push(value)
+
+        def emit(name, value):
+            if revise:
+                self.values[name][-1] = value
+            else:
+                self.values[name].append(value)
+
+        # Simple moving averages (and the Bollinger middle band)
+        for window in self._sma.values():
+            feed(window, close)
+        emit('sma_20', self._sma[20].mean())
+        emit('sma_50', self._sma[50].mean())
+        emit('sma_200', self._sma[200].mean())
+
+        # Exponential moving averages and MACD
+        ema_fast = self._ema_12.revise(close) if revise else self._ema_12.push(close)
+        ema_slow = self._ema_26.revise(close) if revise else self._ema_26.push(close)
+        macd = ema_fast - ema_slow
+        signal = self._macd_signal.revise(macd) if revise else self._macd_signal.push(macd)
+        emit('ema_12', ema_fast)
+        emit('ema_26', ema_slow)
+        emit('macd', macd)
+        emit('macd_signal', signal)
+        emit('macd_histogram', macd - signal)
+
+        # RSI over the close-to-close deltas (no value for the first candle)
+        if prev_close is not None:
+            delta = close - prev_close
+            feed(self._gains, delta if delta > 0 else 0.0)
+            feed(self._losses, -delta if delta < 0 else 0.0)
+            avg_gain = self._gains.mean()
+            avg_loss = self._losses.mean() or 0.000001  # Avoid division by zero
+            emit('rsi', 100 - (100 / (1 + avg_gain / avg_loss)))
+
+        # Bollinger Bands
+        middle = self._sma[20].mean()
+        std_dev = self._sma[20].std()
+        emit('bollinger_upper', middle + std_dev * 2)
+        emit('bollinger_middle', middle)
+        emit('bollinger_lower', middle - std_dev * 2)
+
+        # Average True Range
+        if prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        feed(self._true_ranges, true_range)
+        emit('atr', self._true_ranges.mean())
+
+        return self.latest()
+
+    def update_frame(self, df: pd.DataFrame):
+        """Feed every row of a columnar OHLCV DataFrame, in order."""
+        for timestamp, high, low, close in zip(df['timestamp'].to_numpy(), df['high'].to_numpy(dtype=np.float64),
+                                               df['low'].to_numpy(dtype=np.float64), df['close'].to_numpy(dtype=np.float64)):
+            self._update(int(timestamp), float(high), float(low), float(close))
+
+    def latest(self) -> Dict[str, float]:
+        """Return the latest value of every indicator."""
+        return {name: values[-1] for name, values in self.values.items() if values}
+
+    def to_dict(self, limit: Optional[int] = None) -> Dict[str, List]:
+        """
+        Return indicator series in the format of get_technical_indicators.
+
+        Args:
+            limit: Number of most recent candles to return (RSI has one value fewer).
+
+        Returns:
+            Dict[str, List]: Indicator name to list of values.
+        """
+        result = {}
+        for name, values in self.values.items():
+            n = len(values) if limit is None else min(len(values), limit - 1 if name == 'rsi' else limit)
+            result[name] = list(values)[len(values) - n:]
+        return result
+
+
+class StreamingIndicatorRegistry:
+    """
+    Keeps StreamingIndicators engines for the candle windows requested and syncs them with fetched candles.
+
+    Indicator values depend on where a window starts (warm-up zeros, the
+    EMA seed), so an engine only serves the exact window it was built on:
+    engines are keyed by (symbol, interval, window length) and reused while
+    the window starts at the same candle. Polling the same window then only
+    revises the still-open candle; when a new candle shifts the window the
+    engine is rebuilt, so results always match get_technical_indicators on
+    the same candles.
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY, max_engines: int = MAX_ENGINES):
+        self.history = history
+        self.max_engines = max_engines
+        self._engines = OrderedDict()  # (symbol, interval, window length) -> engine
+        self._locks = {}  # (symbol, interval) -> lock
+        self._lock = threading.Lock()
+
+    def _engine_lock(self, symbol, interval):
+        with self._lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def get_indicators(self, symbol: str, interval: str, df: pd.DataFrame, limit: Optional[int] = None) -> Dict[str, List]:
+        """
+        Sync the engine for the window in `df` and return its series.
+
+        Args:
+            symbol: Trading pair, e.g. 'BTCUSDT'.
+            interval: Kline interval, e.g. '1h'.
+            df: Columnar OHLCV data ending at the latest candle; indicators are computed over exactly these candles.
+            limit: Number of most recent candles to return.
+
+        Returns:
+            Dict[str, List]: Indicator name to list of values.
+        """
+        with self._engine_lock(symbol, interval):
+            engine = self._sync((symbol, interval, len(df)), df)
+            return engine.to_dict(limit if limit is not None else len(df))
+
+    def get_engine(self, symbol: str, interval: str, df: pd.DataFrame) -> StreamingIndicators:
+        """Sync and return the engine for the window in `df`."""
+        with self._engine_lock(symbol, interval):
+            return self._sync((symbol, interval, len(df)), df)
+
+    def _sync(self, key, df: pd.DataFrame) -> StreamingIndicators:
+        if df.empty:
+            raise ValueError("Input data cannot be empty.")
+        timestamps = df['timestamp'].to_numpy()
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+
+        start = None
+        if engine is not None and engine.first_timestamp == timestamps[0]:
+            # Same window: feed the candles after the engine's last one (and a revision of it)
+            pos = int(np.searchsorted(timestamps, engine.last_timestamp))
+            if pos < len(timestamps) and timestamps[pos] == engine.last_timestamp:
+                start = pos
+
+        if start is None:
+            # First use, or the window moved: replay it from its first candle
+            engine = StreamingIndicators(self.history)
+            with self._lock:
+                self._engines[key] = engine
+                while len(self._engines) > self.max_engines:
+                    self._engines.popitem(last=False)
+            start = 0
+        engine.update_frame(df.iloc[start:])
+        return engine
+
+
+# Shared registry used by the API routes
+streaming_indicators = StreamingIndicatorRegistry()
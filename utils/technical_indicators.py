@@ -1,7 +1,9 @@
 import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
 
 
 class TechnicalIndicators:
@@ -9,36 +11,50 @@ class TechnicalIndicators:
     A class for calculating technical indicators from financial data.
     """
 
-    def __init__(self, data: List[Dict]):
+    def __init__(self, data: Union[pd.DataFrame, List[Dict]]):
         """
         Initializes the TechnicalIndicators object with OHLCV data.
 
         Args:
-            data: List of dictionaries with OHLCV data from Binance.
+            data: Columnar OHLCV DataFrame (as returned by get_market_frame) or
+                list of dictionaries with OHLCV data from Binance.
         """
         self.df = self._preprocess_data(data)
         self.indicators = {}
 
-    def _preprocess_data(self, data: List[Dict]) -> pd.DataFrame:
+    def _preprocess_data(self, data: Union[pd.DataFrame, List[Dict]]) -> pd.DataFrame:
         """
         Converts raw data to a Pandas DataFrame and ensures correct data types.
 
+        Columnar input that already has float64 OHLCV columns is used as-is,
+        without copying or per-row validation.
+
         Args:
-            data: List of dictionaries with OHLCV data.
+            data: OHLCV DataFrame or list of dictionaries with OHLCV data.
 
         Returns:
             pd.DataFrame: DataFrame with preprocessed data.
 
         Raises:
-            TypeError: If input data is not a list of dictionaries.
-            ValueError: If the input data list is empty or any dictionary lacks essential OHLCV keys.
+            TypeError: If input data is neither a DataFrame nor a list of dictionaries.
+            ValueError: If the input data is empty or lacks essential OHLCV keys.
         """
+        essential_keys = ['close', 'high', 'low', 'open', 'volume']
+        if isinstance(data, pd.DataFrame):
+            if data.empty:
+                raise ValueError("Input data cannot be empty.")
+            missing = [key for key in essential_keys if key not in data.columns]
+            if missing:
+                raise ValueError(f"Input DataFrame must contain the following columns: {essential_keys}")
+            if all(data[col].dtype == np.float64 for col in essential_keys):
+                return data
+            return data.astype({col: float for col in essential_keys})
+
         if not isinstance(data, list):
-            raise TypeError("Input data must be a list of dictionaries.")
+            raise TypeError("Input data must be a DataFrame or a list of dictionaries.")
         if not data:
             raise ValueError("Input data list cannot be empty.")
         #check for the correct keys
-        essential_keys = ['close', 'high', 'low', 'open', 'volume']
         for row in data:
             if not all(key in row for key in essential_keys):
                 raise ValueError(f"Each dictionary in data must contain the following keys: {essential_keys}")
@@ -225,13 +241,13 @@ class TechnicalIndicators:
         atr = tr.rolling(window=window).mean().fillna(0).values
         return atr
     
-def get_technical_indicators(data: List[Dict]) -> Dict[str, List]:
+def get_technical_indicators(data: Union[pd.DataFrame, List[Dict]]) -> Dict[str, List]:
     """
     Calculates technical indicators from price data using the TechnicalIndicators class.  This
     function acts as a wrapper around the class to maintain the original functional interface.
 
     Args:
-        data: List of dictionaries with OHLCV data from Binance.
+        data: Columnar OHLCV DataFrame or list of dictionaries with OHLCV data from Binance.
 
     Returns:
         dict: Dictionary containing calculated indicators.
@@ -242,3 +258,175 @@ def get_technical_indicators(data: List[Dict]) -> Dict[str, List]:
     except Exception as e:
         logging.error(f"Error calculating technical indicators: {str(e)}")
         raise
+
+
+def _rolling_mean_2d(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Row-wise rolling mean over the time axis, 0 while the window is filling.
+
+    Args:
+        values: 2-D array (symbols x time).
+        window: int Number of periods.
+
+    Returns:
+        np.ndarray: Array of the same shape with the rolling means.
+    """
+    result = np.zeros_like(values)
+    if values.shape[1] < window:
+        return result
+    cumsum = np.cumsum(values, axis=1)
+    result[:, window - 1] = cumsum[:, window - 1]
+    result[:, window:] = cumsum[:, window:] - cumsum[:, :-window]
+    result[:, window - 1:] /= window
+    return result
+
+
+def _ema_2d(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Row-wise EMA equivalent to ewm(span=window, adjust=False).mean().
+
+    Args:
+        values: 2-D array (symbols x time).
+        window: int Number of periods.
+
+    Returns:
+        np.ndarray: Array of the same shape with the EMA values.
+    """
+    alpha = 2.0 / (window + 1)
+    # Seed the filter state so the first output equals the first input
+    zi = (1 - alpha) * values[:, :1]
+    ema, _ = lfilter([alpha], [1, -(1 - alpha)], values, axis=1, zi=zi)
+    return ema
+
+
+def calculate_indicators_matrix(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calculates the TechnicalIndicators suite for many symbols at once.
+
+    Every indicator is computed as a vectorised operation on 2-D (symbols x time)
+    arrays, with the same definitions and warm-up conventions as
+    TechnicalIndicators.calculate_all. RSI has one column fewer than the inputs.
+
+    Args:
+        high: 2-D array of high prices (symbols x time).
+        low: 2-D array of low prices (symbols x time).
+        close: 2-D array of close prices (symbols x time).
+
+    Returns:
+        Dict[str, np.ndarray]: Indicator name to 2-D array of values.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    indicators = {}
+
+    indicators['sma_20'] = _rolling_mean_2d(close, 20)
+    indicators['sma_50'] = _rolling_mean_2d(close, 50)
+    indicators['sma_200'] = _rolling_mean_2d(close, 200)
+
+    ema_fast = _ema_2d(close, 12)
+    ema_slow = _ema_2d(close, 26)
+    macd_line = ema_fast - ema_slow
+    signal_line = _ema_2d(macd_line, 9)
+    indicators['ema_12'] = ema_fast
+    indicators['ema_26'] = ema_slow
+    indicators['macd'] = macd_line
+    indicators['macd_signal'] = signal_line
+    indicators['macd_histogram'] = macd_line - signal_line
+
+    delta = np.diff(close, axis=1)
+    avg_gain = _rolling_mean_2d(np.where(delta > 0, delta, 0.0), 14)
+    avg_loss = _rolling_mean_2d(np.where(delta < 0, -delta, 0.0), 14)
+    avg_loss[avg_loss == 0] = 0.000001  # Avoid division by zero
+    indicators['rsi'] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    middle_band = indicators['sma_20']
+    std_dev = np.zeros_like(close)
+    if close.shape[1] >= 20:
+        std_dev[:, 19:] = sliding_window_view(close, 20, axis=1).std(axis=-1, ddof=1)
+    indicators['bollinger_upper'] = middle_band + (std_dev * 2)
+    indicators['bollinger_middle'] = middle_band
+    indicators['bollinger_lower'] = middle_band - (std_dev * 2)
+
+    true_range = high - low
+    prev_close = close[:, :-1]
+    true_range[:, 1:] = np.maximum(true_range[:, 1:],
+                                   np.maximum(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)))
+    indicators['atr'] = _rolling_mean_2d(true_range, 14)
+    return indicators
+
+
+def get_technical_indicators_batch(frames: Dict[str, pd.DataFrame], limit: Optional[int] = None,
+                                   symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, List]]:
+    """
+    Calculates technical indicators for many symbols in one vectorised pass per frame length.
+
+    Symbols are grouped by how many candles they have (capped at `limit`);
+    each group is stacked into (symbols x time) arrays, so every symbol keeps
+    its full history instead of being cut to the shortest frame.
+
+    Args:
+        frames: Symbol to columnar OHLCV DataFrame.
+        limit: Optional number of most recent candles to use per symbol.
+        symbols: Optional symbols requested; those without a usable frame get an error entry.
+
+    Returns:
+        Dict[str, Dict[str, List]]: Symbol to indicator dictionary, in the format of get_technical_indicators,
+            or to {'error': message} for a symbol with no data.
+    """
+    results = {}
+    groups = {}
+    for symbol in symbols if symbols is not None else frames:
+        df = frames.get(symbol)
+        if df is None or df.empty:
+            results[symbol] = {'error': f"No market data available for {symbol}"}
+            continue
+        length = len(df) if limit is None else min(len(df), limit)
+        groups.setdefault(length, []).append(symbol)
+
+    for length, group in groups.items():
+        stacked = {
+            col: np.vstack([frames[symbol][col].to_numpy(dtype=np.float64)[-length:] for symbol in group])
+            for col in ('high', 'low', 'close')
+        }
+        indicators = calculate_indicators_matrix(stacked['high'], stacked['low'], stacked['close'])
+        for i, symbol in enumerate(group):
+            results[symbol] = {name: values[i].tolist() for name, values in indicators.items()}
+    return results
+
+
+def calculate_latest_rsi_macd(close: np.ndarray, rsi_window: int = 14) -> Dict[str, float]:
+    """
+    Calculates only the latest RSI, MACD and MACD signal values.
+
+    RSI only needs the last `rsi_window` price changes, so it is computed on
+    that tail alone; the EMAs behind MACD are recursive and run over the whole
+    series. Values match the last elements of TechnicalIndicators.calculate_all.
+
+    Args:
+        close: 1-D array of close prices.
+        rsi_window: int Number of periods for the RSI.
+
+    Returns:
+        Dict[str, float]: 'rsi', 'macd' and 'macd_signal'.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if close.size < 2:
+        raise ValueError("At least two candles are needed to calculate RSI.")
+
+    delta = np.diff(close[-(rsi_window + 1):])
+    if delta.size < rsi_window:
+        avg_gain = avg_loss = 0.0
+    else:
+        avg_gain = delta[delta > 0].sum() / rsi_window
+        avg_loss = -delta[delta < 0].sum() / rsi_window
+    rsi = 100 - (100 / (1 + avg_gain / (avg_loss or 0.000001)))  # Avoid division by zero
+
+    row = close[np.newaxis, :]
+    macd_line = _ema_2d(row, 12) - _ema_2d(row, 26)
+    signal_line = _ema_2d(macd_line, 9)
+    return {
+        'rsi': float(rsi),
+        'macd': float(macd_line[0, -1]),
+        'macd_signal': float(signal_line[0, -1])
+    }